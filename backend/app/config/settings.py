@@ -19,15 +19,69 @@ class Settings(BaseSettings):
     # LLM nastavení
     DEFAULT_LLM_MODEL: str = "microsoft/phi-3-mini-4k-instruct"
     EMBEDDING_MODEL: str = "BAAI/bge-base-en-v1.5"
+    EMBEDDING_BACKEND: str = "sentence-transformers"  # sentence-transformers, onnx
+    EMBEDDING_BATCH_SIZE: int = 32
+    ONNX_QUANTIZE: bool = True  # Dynamická int8 kvantizace ONNX modelu
+    ONNX_INTRA_OP_THREADS: int = 0  # 0 = automaticky
+    ONNX_CACHE_DIR: str = "data/onnx"
+    EMBEDDING_CACHE_ENABLED: bool = True  # Cache embeddingů chunků podle (model, sha256 textu)
+    EMBEDDING_CACHE_PATH: str = "data/embedding_cache.db"
+    EMBEDDING_CACHE_MAX_MB: int = 1024
+    QUERY_CACHE_SIZE: int = 1024  # Počet embeddingů dotazů v paměti
+    RESULT_CACHE_SIZE: int = 256  # Počet výsledků vyhledávání v paměti
     
     # Vektorová DB
-    VECTOR_DB_TYPE: str = "chromadb"  # chromadb, faiss
+    VECTOR_DB_TYPE: str = "chromadb"  # chromadb, faiss, numpy
+    VECTOR_UPSERT_BATCH_SIZE: int = 2000
+    EMBEDDING_QUANTIZATION: str = "none"  # none, int8, binary - vedlejší index pro hrubé vyhledávání (paměť nešetří)
+    QUANTIZATION_RESCORE_MULTIPLIER: int = 8  # Kandidáti pro přesné přeskórování = limit * násobek
+    FAISS_INDEX_TYPE: str = "hnsw"  # hnsw, ivf, flat
+    FAISS_HNSW_M: int = 32
+    FAISS_HNSW_EF_CONSTRUCTION: int = 200
+    FAISS_HNSW_EF_SEARCH: int = 64
+    FAISS_IVF_NLIST: int = 1024
+    FAISS_IVF_NPROBE: int = 16
+    FAISS_MMAP: bool = True  # Načítat uložený index jako memory-mapped soubor
+    NUMPY_VECTOR_DTYPE: str = "float32"  # float32, float16 (přesný backend "numpy")
+    
+    # Hybridní vyhledávání (BM25 + vektory)
+    HYBRID_FUSION: str = "rrf"  # rrf, weighted
+    HYBRID_RRF_K: int = 60
+    HYBRID_SEMANTIC_WEIGHT: float = 0.5  # Váha sémantické části pro weighted fúzi
+    
+    # Reranking cross-encoderem
+    RERANKER_ENABLED: bool = False
+    RERANKER_MODEL: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    RERANK_TOP_N: int = 20  # Počet kandidátů z prvního kola k přehodnocení
+    RERANK_BUDGET_MS: int = 300  # Časový limit na jeden dotaz, pak zůstane pořadí prvního kola
+    RERANK_BATCH_SIZE: int = 16
+    RERANK_MAX_CHARS: int = 2000
+    
+    # Návrhy při psaní (prefixový index termů, názvů souborů a složek)
+    SUGGESTION_MAX_TERMS: int = 200000  # Nejčastější termy z FTS slovníku
+    SUGGESTION_REFRESH_SECONDS: int = 300  # Max. stáří indexu, pak se na pozadí přestaví
+    
+    # Ollama klient
+    OLLAMA_EMBED_BATCH_SIZE: int = 64  # Texty v jednom požadavku na /api/embed
+    OLLAMA_MAX_PARALLEL: int = 4  # Souběžné požadavky (odpovídá OLLAMA_NUM_PARALLEL serveru)
+    OLLAMA_CONNECT_TIMEOUT: float = 5.0
+    OLLAMA_READ_TIMEOUT: float = 120.0
+    
+    # Kontext odpovědí LLM
+    LLM_CONTEXT_TOKEN_BUDGET: int = 2048  # Tokeny pro úryvky dokumentů v promptu
+    LLM_CONTEXT_CANDIDATES: int = 20  # Chunky načtené pro výběr kontextu (/ask)
+    LLM_TOKENIZER: str = ""  # HuggingFace tokenizer odpovídající LLM; "" = odhad 4 znaky na token
+    
+    # Zahřátí enginů po startu (na pozadí, stav na /api/ready)
+    WARMUP_ENGINES: List[str] = ["ai_search", "reranker", "suggestions"]  # + "ollama"; [] = vypnuto
     
     # Plánování
     DEFAULT_SCHEDULE_START: str = "23:00"
     DEFAULT_SCHEDULE_END: str = "07:00"
     DEFAULT_CPU_THRESHOLD: int = 30
     DEFAULT_RAM_THRESHOLD: int = 50
+    SYSTEM_SAMPLE_INTERVAL: float = 1.0  # Perioda vzorkování zátěže v sekundách
+    SYSTEM_SAMPLE_WINDOW: int = 30  # Počet vzorků v klouzavém okně
     
     # Podporované formáty
     SUPPORTED_FORMATS: List[str] = [".pdf", ".docx", ".doc", ".txt", ".md"]
@@ -35,6 +89,14 @@ class Settings(BaseSettings):
     # Embedding nastavení
     CHUNK_SIZE: int = 1000
     CHUNK_OVERLAP: int = 200
+    CHUNK_TOKEN_AWARE: bool = False  # Dělit podle tokenizeru embedding modelu
+    AI_SYNC_BATCH_SIZE: int = 64  # Počet souborů v jedné dávce synchronizace AI indexu
+    CHUNK_SEARCH_MULTIPLIER: int = 4  # AI vyhledávání načte limit * násobek chunků a spojí je podle souborů
+    
+    # Pipeline indexace
+    INDEXING_EXTRACT_WORKERS: int = 4  # Souběžné extrakce textu
+    INDEXING_EXTRACT_PROCESSES: int = 0  # > 0 = extrakce v procesech místo vláken
+    INDEXING_QUEUE_SIZE: int = 16  # Max. extrahovaných souborů čekajících na embedding
     
     class Config:
         env_file = ".env"
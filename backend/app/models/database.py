@@ -1,13 +1,21 @@
 import sqlite3
 import os
+import re
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 import json
 
+# Značky v úryvcích z FTS5 snippet() - začátek/konec shody a oříznutý okraj
+SNIPPET_MATCH_START = "\x02"
+SNIPPET_MATCH_END = "\x03"
+SNIPPET_ELLIPSIS = "\x01"
+SNIPPET_TOKENS = 32
+
 class Database:
     def __init__(self, db_path: str = "data/dex_search.db"):
         self.db_path = db_path
+        self.fts_enabled = False
         self._ensure_db_directory()
         self._create_tables()
     
@@ -69,8 +77,62 @@ class Database:
                 )
             ''')
             
+            self._create_fts_index(cursor)
+            
             conn.commit()
     
+    def _create_fts_index(self, cursor: sqlite3.Cursor):
+        """Vytvoří FTS5 index nad indexovanými soubory (BM25 řazení)"""
+        try:
+            cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS indexed_files_fts USING fts5(
+                    file_name, content_text,
+                    content='indexed_files', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2'
+                )
+            ''')
+        except sqlite3.OperationalError as e:
+            # SQLite bez FTS5 - zůstane jen vyhledávání přes LIKE
+            print(f"⚠️ FTS5 není dostupné: {e}")
+            return
+        
+        # Triggery udržují FTS index synchronní s tabulkou indexed_files
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS indexed_files_fts_insert AFTER INSERT ON indexed_files BEGIN
+                INSERT INTO indexed_files_fts (rowid, file_name, content_text)
+                VALUES (new.id, new.file_name, new.content_text);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS indexed_files_fts_delete AFTER DELETE ON indexed_files BEGIN
+                INSERT INTO indexed_files_fts (indexed_files_fts, rowid, file_name, content_text)
+                VALUES ('delete', old.id, old.file_name, old.content_text);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS indexed_files_fts_update AFTER UPDATE ON indexed_files BEGIN
+                INSERT INTO indexed_files_fts (indexed_files_fts, rowid, file_name, content_text)
+                VALUES ('delete', old.id, old.file_name, old.content_text);
+                INSERT INTO indexed_files_fts (rowid, file_name, content_text)
+                VALUES (new.id, new.file_name, new.content_text);
+            END
+        ''')
+        
+        # Slovník termů s počty dokumentů (zdroj pro návrhy při psaní)
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS indexed_files_vocab
+            USING fts5vocab(indexed_files_fts, 'row')
+        ''')
+        
+        # Naplnění indexu pro databáze vytvořené před zavedením FTS
+        cursor.execute('SELECT COUNT(*) FROM indexed_files_fts_docsize')
+        fts_count = cursor.fetchone()[0]
+        cursor.execute('SELECT COUNT(*) FROM indexed_files')
+        if fts_count != cursor.fetchone()[0]:
+            cursor.execute("INSERT INTO indexed_files_fts (indexed_files_fts) VALUES ('rebuild')")
+        
+        self.fts_enabled = True
+    
     def add_watched_item(self, path: str, name: str, item_type: str, recursive: bool = False, 
                         tags: List[str] = None, file_types: List[str] = None) -> int:
         """Přidá novou sledovanou položku"""
@@ -214,11 +276,21 @@ class Database:
         """Přidá indexovaný soubor"""
         with sqlite3.connect(self.db_path) as conn:
             cursor = conn.cursor()
+            # Upsert místo REPLACE - zachová ID souboru a spustí update trigger FTS indexu
             cursor.execute('''
-                INSERT OR REPLACE INTO indexed_files 
+                INSERT INTO indexed_files 
                 (watched_item_id, file_path, file_name, file_size, file_type, 
                  content_hash, content_text, embeddings, indexed_at)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(file_path) DO UPDATE SET
+                    watched_item_id = excluded.watched_item_id,
+                    file_name = excluded.file_name,
+                    file_size = excluded.file_size,
+                    file_type = excluded.file_type,
+                    content_hash = excluded.content_hash,
+                    content_text = excluded.content_text,
+                    embeddings = excluded.embeddings,
+                    indexed_at = CURRENT_TIMESTAMP
             ''', (
                 watched_item_id, file_path, file_name, file_size, file_type,
                 content_hash, content_text, json.dumps(embeddings or [])
@@ -258,12 +330,179 @@ class Database:
                 'file_name': row['file_name'],
                 'file_size': row['file_size'],
                 'file_type': row['file_type'],
+                'content_hash': row['content_hash'],
                 'content_text': row['content_text'],
                 'watched_item_name': row['watched_item_name'],
                 'watched_item_path': row['watched_item_path'],
                 'indexed_at': row['indexed_at']
             } for row in rows]
     
+    # Sloupce výsledků search_files_bm25 (bez obsahu a hashe)
+    BM25_FIELDS = ('id', 'file_path', 'file_name', 'file_size', 'file_type',
+                   'watched_item_name', 'watched_item_path', 'indexed_at')
+    
+    @staticmethod
+    def _fts_query(query: str) -> str:
+        """Převede dotaz uživatele na FTS5 výraz (slova spojená OR, bez speciální syntaxe)"""
+        terms = re.findall(r"\w+", query.lower())
+        return " OR ".join(f'"{term}"' for term in dict.fromkeys(terms))
+    
+    def search_files_bm25(self, query: str, limit: int = 50,
+                          file_types: Optional[List[str]] = None,
+                          watched_item_names: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Fulltextové vyhledávání seřazené podle BM25
+        
+        Args:
+            query: Vyhledávací dotaz
+            limit: Maximální počet výsledků
+            file_types: Filtrování podle typů souborů
+            watched_item_names: Filtrování podle názvů sledovaných položek
+            
+        Returns:
+            Seznam souborů bez obsahu, 'bm25_score' je vyšší pro relevantnější.
+            'match_snippet' je úryvek obsahu z FTS5 snippet() se značkami
+            SNIPPET_* (None bez FTS5)
+        """
+        fts_query = self._fts_query(query)
+        if not fts_query:
+            return []
+        if not self.fts_enabled:
+            return [{
+                **{key: row[key] for key in self.BM25_FIELDS},
+                'bm25_score': 0.0,
+                'match_snippet': None
+            } for row in self.search_files(query, limit)]
+        
+        conditions = ['indexed_files_fts MATCH ?']
+        params: List = [fts_query]
+        if file_types:
+            conditions.append(f"f.file_type IN ({','.join('?' * len(file_types))})")
+            params.extend(file_types)
+        if watched_item_names:
+            conditions.append(f"w.name IN ({','.join('?' * len(watched_item_names))})")
+            params.extend(watched_item_names)
+        params.append(limit)
+        
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            
+            # Název souboru má vyšší váhu než obsah. Obsah se nenačítá, úryvek
+            # kolem shod (sloupec 1 = content_text) vrátí FTS5
+            cursor.execute(f'''
+                SELECT f.id, f.file_path, f.file_name, f.file_size, f.file_type, f.indexed_at,
+                       w.name as watched_item_name, w.path as watched_item_path,
+                       bm25(indexed_files_fts, 4.0, 1.0) as rank,
+                       snippet(indexed_files_fts, 1, ?, ?, ?, ?) as match_snippet
+                FROM indexed_files_fts
+                JOIN indexed_files f ON f.id = indexed_files_fts.rowid
+                JOIN watched_items w ON f.watched_item_id = w.id
+                WHERE {' AND '.join(conditions)}
+                ORDER BY rank
+                LIMIT ?
+            ''', [SNIPPET_MATCH_START, SNIPPET_MATCH_END, SNIPPET_ELLIPSIS, SNIPPET_TOKENS] + params)
+            
+            rows = cursor.fetchall()
+            return [{
+                **{key: row[key] for key in self.BM25_FIELDS},
+                'bm25_score': -row['rank'],  # SQLite vrací BM25 záporně (menší = lepší)
+                'match_snippet': row['match_snippet']
+            } for row in rows]
+    
+    def get_file_hashes(self, watched_item_ids: Optional[List[int]] = None,
+                        enabled_only: bool = True) -> Dict[int, str]:
+        """
+        Získá hashe obsahu indexovaných souborů (bez načítání textu)
+        
+        Args:
+            watched_item_ids: Omezení na sledované položky
+            enabled_only: Jen soubory povolených sledovaných položek
+            
+        Returns:
+            Slovník ID souboru -> content_hash
+        """
+        conditions = []
+        params: List = []
+        if watched_item_ids:
+            conditions.append(f"f.watched_item_id IN ({','.join('?' * len(watched_item_ids))})")
+            params.extend(watched_item_ids)
+        if enabled_only:
+            conditions.append('w.enabled')
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT f.id, f.content_hash
+                FROM indexed_files f
+                JOIN watched_items w ON f.watched_item_id = w.id
+                {where}
+            ''', params)
+            return {row[0]: row[1] or '' for row in cursor.fetchall()}
+    
+    def get_term_frequencies(self, min_length: int = 1, limit: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Termy z FTS slovníku s počtem dokumentů, nejčastější první"""
+        if not self.fts_enabled:
+            return []
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT term, doc FROM indexed_files_vocab
+                WHERE length(term) >= ?
+                ORDER BY doc DESC
+                LIMIT ?
+            ''', (min_length, limit if limit is not None else -1))
+            return cursor.fetchall()
+    
+    def get_file_names(self) -> List[Tuple[str, str]]:
+        """Názvy a cesty všech indexovaných souborů (bez obsahu)"""
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT file_name, file_path FROM indexed_files')
+            return cursor.fetchall()
+    
+    def get_file_ids(self) -> List[int]:
+        """Získá ID všech indexovaných souborů"""
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT id FROM indexed_files')
+            return [row[0] for row in cursor.fetchall()]
+    
+    def get_files_by_ids(self, file_ids: List[int], with_content: bool = True) -> List[Dict]:
+        """
+        Získá indexované soubory podle ID (ve stejném tvaru jako get_all_files)
+        
+        Args:
+            file_ids: ID souborů
+            with_content: Načíst i content_text a content_hash (jinak jen sloupce BM25_FIELDS)
+        """
+        files = []
+        columns = 'f.*' if with_content else ', '.join(
+            f'f.{field}' for field in self.BM25_FIELDS if not field.startswith('watched_item_')
+        )
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            
+            # SQLite má limit počtu parametrů v dotazu
+            for start in range(0, len(file_ids), 500):
+                batch = file_ids[start:start + 500]
+                cursor.execute(f'''
+                    SELECT {columns}, w.name as watched_item_name, w.path as watched_item_path
+                    FROM indexed_files f
+                    JOIN watched_items w ON f.watched_item_id = w.id
+                    WHERE f.id IN ({','.join('?' * len(batch))})
+                ''', batch)
+                
+                for row in cursor.fetchall():
+                    file = {key: row[key] for key in self.BM25_FIELDS}
+                    if with_content:
+                        file['content_hash'] = row['content_hash']
+                        file['content_text'] = row['content_text']
+                    files.append(file)
+        return files
+    
     def get_all_files(self) -> List[Dict]:
         """Získá všechny indexované soubory pro AI indexování"""
         with sqlite3.connect(self.db_path) as conn:
@@ -284,6 +523,7 @@ class Database:
                 'file_name': row['file_name'],
                 'file_size': row['file_size'],
                 'file_type': row['file_type'],
+                'content_hash': row['content_hash'],
                 'content_text': row['content_text'],
                 'watched_item_name': row['watched_item_name'],
                 'watched_item_path': row['watched_item_path'],
@@ -40,7 +40,7 @@ class ScheduleConfig(BaseModel):
 
 class SystemStatus(BaseModel):
     """Model pro systémový status"""
-    cpu_usage: float
+    cpu_usage: Optional[float] = None  # None, dokud sampler nezměří první vzorek
     ram_usage: float
     disk_usage: float
     is_idle: bool
@@ -1,35 +1,79 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from pydantic import BaseModel
 from typing import List, Optional, Dict
 from ..services.ai_search import AISearchService
+from ..services.ai_index_sync import AIIndexSync
+from ..services.suggestion_index import get_suggestion_index
 from ..models.database import Database
+from .streaming import stream_format, stream_results
+import asyncio
+import threading
+from functools import partial
+import time
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/ai-search", tags=["ai-search"])
 
+# Maximální počet dotazů v jednom dávkovém požadavku
+MAX_BATCH_QUERIES = 256
+# Po neúspěšném načtení služby se další pokus odloží (načítání modelu je drahé)
+SERVICE_RETRY_SECONDS = 60
+
 # Inicializace služeb
 db = Database()
 ai_search_service = None
+_service_failed_at: Optional[float] = None
+_service_lock = threading.Lock()
 
 def get_ai_search_service() -> AISearchService:
     """Dependency pro získání AI search služby"""
-    global ai_search_service
-    if ai_search_service is None:
-        try:
-            ai_search_service = AISearchService()
-        except Exception as e:
-            logger.error(f"Chyba při inicializaci AI search služby: {e}")
-            raise HTTPException(status_code=500, detail="AI search služba není dostupná")
+    global ai_search_service, _service_failed_at
+    if ai_search_service is not None:
+        return ai_search_service
+    if _service_failed_at is not None and time.monotonic() - _service_failed_at < SERVICE_RETRY_SECONDS:
+        raise HTTPException(status_code=500, detail="AI search služba není dostupná")
+    # Zámek - služba se může načítat zároveň ze zahřívání při startu a z požadavku
+    with _service_lock:
+        if ai_search_service is None:
+            try:
+                ai_search_service = AISearchService()
+                _service_failed_at = None
+            except Exception as e:
+                _service_failed_at = time.monotonic()
+                logger.error(f"Chyba při inicializaci AI search služby: {e}")
+                raise HTTPException(status_code=500, detail="AI search služba není dostupná")
     return ai_search_service
 
+async def get_ai_search_service_async() -> Optional[AISearchService]:
+    """
+    AI search služba načtená mimo event loop (studený start načítá model)
+
+    Returns:
+        Služba, nebo None, pokud není dostupná
+    """
+    if ai_search_service is not None:
+        return ai_search_service
+    try:
+        return await asyncio.get_running_loop().run_in_executor(None, get_ai_search_service)
+    except HTTPException:
+        return None
+
 class AISearchRequest(BaseModel):
     query: str
     limit: int = 10
     file_types: Optional[List[str]] = None
     watched_items: Optional[List[str]] = None
     search_type: str = "semantic"  # "semantic" nebo "basic"
+    rerank: Optional[bool] = None  # None = podle nastavení serveru
+    stream: Optional[str] = None  # "ndjson" nebo "sse" (None = podle hlavičky Accept)
+
+class BatchSearchRequest(BaseModel):
+    queries: List[str]
+    limit: int = 10
+    file_types: Optional[List[str]] = None
+    watched_items: Optional[List[str]] = None
 
 class AISearchResult(BaseModel):
     id: str
@@ -40,8 +84,10 @@ class AISearchResult(BaseModel):
     content_text: str
     relevance_score: float
     distance: float
+    rerank_score: Optional[float] = None
     relevance_analysis: Optional[Dict] = None
     context_snippets: Optional[List[str]] = None
+    snippets: Optional[List[Dict]] = None  # Úryvky s offsety shod pro zvýraznění
 
 class IndexRequest(BaseModel):
     watched_item_ids: Optional[List[int]] = None  # Pokud None, indexuje všechny
@@ -49,27 +95,42 @@ class IndexRequest(BaseModel):
 @router.post("/search")
 async def ai_search(
     request: AISearchRequest,
+    http_request: Request,
     ai_service: AISearchService = Depends(get_ai_search_service)
 ):
     """
     Pokročilé AI vyhledávání s sémantickou analýzou
+    
+    Se streamem (NDJSON nebo SSE) se každý výsledek odešle hned po analýze.
     """
     try:
         if not request.query.strip():
             raise HTTPException(status_code=400, detail="Dotaz nemůže být prázdný")
         
+        fmt = stream_format(http_request, request.stream)
+        loop = asyncio.get_running_loop()
+        # Embedding dotazu, vektorová DB i reranking blokují - běží mimo event loop
+        search_documents = partial(
+            ai_service.search_documents,
+            query=request.query,
+            limit=request.limit,
+            file_types=request.file_types,
+            watched_items=request.watched_items
+        )
+        if fmt:
+            if request.search_type == "semantic":
+                # Generátor se čte ve threadpoolu (stream_results)
+                results = ai_service.iter_semantic_search(request.query, request.limit, request.rerank)
+            else:
+                results = await loop.run_in_executor(None, search_documents)
+            return stream_results(results, {"query": request.query, "search_type": request.search_type}, fmt)
+        
         if request.search_type == "semantic":
-            results = ai_service.semantic_search(
-                query=request.query,
-                limit=request.limit
+            results = await loop.run_in_executor(
+                None, ai_service.semantic_search, request.query, request.limit, request.rerank
             )
         else:
-            results = ai_service.search_documents(
-                query=request.query,
-                limit=request.limit,
-                file_types=request.file_types,
-                watched_items=request.watched_items
-            )
+            results = await loop.run_in_executor(None, search_documents)
         
         return {
             "query": request.query,
@@ -84,6 +145,48 @@ async def ai_search(
         logger.error(f"Chyba při AI vyhledávání: {e}")
         raise HTTPException(status_code=500, detail=f"Chyba při AI vyhledávání: {str(e)}")
 
+@router.post("/search/batch")
+async def ai_search_batch(
+    request: BatchSearchRequest,
+    ai_service: AISearchService = Depends(get_ai_search_service)
+):
+    """
+    Sémantické vyhledávání pro více dotazů v jednom požadavku
+    """
+    try:
+        queries = [query.strip() for query in request.queries]
+        if not queries or not all(queries):
+            raise HTTPException(status_code=400, detail="Dotazy nemohou být prázdné")
+        if len(queries) > MAX_BATCH_QUERIES:
+            raise HTTPException(status_code=400, detail=f"Maximálně {MAX_BATCH_QUERIES} dotazů v dávce")
+        
+        # Embeddingy a dotazy do vektorové DB blokují - běží mimo event loop
+        batch_results = await asyncio.get_running_loop().run_in_executor(None, partial(
+            ai_service.search_documents_batch,
+            queries=queries,
+            limit=request.limit,
+            file_types=request.file_types,
+            watched_items=request.watched_items
+        ))
+        
+        return {
+            "total_queries": len(queries),
+            "results": [
+                {
+                    "query": query,
+                    "total_results": len(results),
+                    "results": results
+                }
+                for query, results in zip(queries, batch_results)
+            ]
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Chyba při dávkovém AI vyhledávání: {e}")
+        raise HTTPException(status_code=500, detail=f"Chyba při dávkovém AI vyhledávání: {str(e)}")
+
 @router.post("/index")
 async def index_documents(
     request: IndexRequest,
@@ -91,34 +194,20 @@ async def index_documents(
 ):
     """
     Indexuje dokumenty pro AI vyhledávání
+    
+    Embeddingy se počítají jen pro nové a změněné soubory, smazané soubory
+    se z indexu odstraní.
     """
     try:
-        # Získá sledované položky
-        watched_items = db.get_watched_items()
-        
-        if request.watched_item_ids:
-            watched_items = [item for item in watched_items if item['id'] in request.watched_item_ids]
-        
-        total_indexed = 0
-        
-        for item in watched_items:
-            if not item['enabled']:
-                continue
-                
-            # Získá indexované soubory pro tuto položku
-            indexed_files = db.search_files("", limit=1000)  # Získá všechny soubory
-            item_files = [f for f in indexed_files if f.get('watched_item_name') == item['name']]
-            
-            if item_files:
-                # Přidá do AI indexu
-                success = ai_service.add_documents(item_files)
-                if success:
-                    total_indexed += len(item_files)
-                    logger.info(f"Indexováno {len(item_files)} souborů pro {item['name']}")
+        sync = AIIndexSync(db, ai_service)
+        loop = asyncio.get_running_loop()
+        stats = await loop.run_in_executor(None, sync.sync, request.watched_item_ids)
+        total_indexed = stats["added"] + stats["updated"]
         
         return {
             "message": f"Indexováno {total_indexed} dokumentů",
-            "total_indexed": total_indexed
+            "total_indexed": total_indexed,
+            "sync": stats
         }
         
     except Exception as e:
@@ -128,17 +217,16 @@ async def index_documents(
 @router.get("/suggestions")
 async def get_ai_suggestions(
     query: str,
-    limit: int = 5,
-    ai_service: AISearchService = Depends(get_ai_search_service)
+    limit: int = 5
 ):
     """
-    Generuje inteligentní návrhy pro vyhledávání
+    Generuje návrhy pro vyhledávání z prefixového indexu termů
     """
     try:
         if not query.strip():
             return {"suggestions": []}
         
-        suggestions = ai_service.get_search_suggestions(query, limit)
+        suggestions = get_suggestion_index(db).suggest(query, limit)
         
         return {
             "query": query,
@@ -199,20 +287,22 @@ async def reindex_all(
     """
     try:
         # Vyčistí současný index
-        ai_service.clear_index()
+        if not ai_service.clear_index():
+            raise HTTPException(status_code=500, detail="Nepodařilo se vyčistit AI index")
         
-        # Získá všechny indexované soubory
-        all_files = db.search_files("", limit=10000)  # Velký limit pro všechny soubory
+        # Prázdný index - synchronizace přidá všechny soubory po dávkách
+        sync = AIIndexSync(db, ai_service)
+        loop = asyncio.get_running_loop()
+        stats = await loop.run_in_executor(None, sync.sync)
         
-        if all_files:
-            success = ai_service.add_documents(all_files)
-            if success:
-                return {
-                    "message": f"Přeindexováno {len(all_files)} dokumentů",
-                    "total_indexed": len(all_files)
-                }
-            else:
-                raise HTTPException(status_code=500, detail="Nepodařilo se přeindexovat dokumenty")
+        if stats["failed"]:
+            raise HTTPException(status_code=500, detail="Nepodařilo se přeindexovat dokumenty")
+        
+        if stats["added"]:
+            return {
+                "message": f"Přeindexováno {stats['added']} dokumentů",
+                "total_indexed": stats["added"]
+            }
         else:
             return {
                 "message": "Žádné dokumenty k indexování",
@@ -223,4 +313,4 @@ async def reindex_all(
         raise
     except Exception as e:
         logger.error(f"Chyba při přeindexování: {e}")
-        raise HTTPException(status_code=500, detail=f"Chyba při přeindexování: {str(e)}") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Chyba při přeindexování: {str(e)}")
@@ -5,6 +5,7 @@ import os
 from pathlib import Path
 from ..models.database import Database
 from ..services.file_indexer import FileIndexer
+from ..services.suggestion_index import get_suggestion_index
 
 router = APIRouter(prefix="/api/files", tags=["files"])
 
@@ -80,6 +81,7 @@ async def delete_watched_item(item_id: int):
         if not success:
             raise HTTPException(status_code=404, detail="Položka nenalezena")
         
+        get_suggestion_index(db).invalidate()
         return {"message": "Položka smazána"}
         
     except HTTPException:
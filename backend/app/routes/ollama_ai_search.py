@@ -1,8 +1,13 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from pydantic import BaseModel
 from typing import List, Optional, Dict
 from ..services.ollama_ai_search import OllamaAISearchService
+from ..services.ai_index_sync import AIIndexSync
+from ..services.suggestion_index import get_suggestion_index
 from ..models.database import Database
+from .streaming import cancel_on_disconnect, stream_events
+import asyncio
+import threading
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,16 +17,21 @@ router = APIRouter(prefix="/api/ollama-ai-search", tags=["ollama-ai-search"])
 # Inicializace služeb
 db = Database()
 ollama_ai_search_service = None
+_service_lock = threading.Lock()
 
 def get_ollama_ai_search_service() -> OllamaAISearchService:
     """Dependency pro získání Ollama AI search služby"""
     global ollama_ai_search_service
-    if ollama_ai_search_service is None:
-        try:
-            ollama_ai_search_service = OllamaAISearchService()
-        except Exception as e:
-            logger.error(f"Chyba při inicializaci Ollama AI search služby: {e}")
-            raise HTTPException(status_code=500, detail="Ollama AI search služba není dostupná")
+    if ollama_ai_search_service is not None:
+        return ollama_ai_search_service
+    # Zámek - služba se může načítat zároveň ze zahřívání při startu a z požadavku
+    with _service_lock:
+        if ollama_ai_search_service is None:
+            try:
+                ollama_ai_search_service = OllamaAISearchService()
+            except Exception as e:
+                logger.error(f"Chyba při inicializaci Ollama AI search služby: {e}")
+                raise HTTPException(status_code=500, detail="Ollama AI search služba není dostupná")
     return ollama_ai_search_service
 
 # Pydantic modely
@@ -36,6 +46,13 @@ class GenerateAnswerRequest(BaseModel):
     context_documents: List[Dict]
     max_length: int = 500
 
+class AskRequest(BaseModel):
+    query: str
+    max_length: int = 500
+    file_types: Optional[List[str]] = None
+    watched_items: Optional[List[str]] = None
+    stream: bool = False  # True = odpověď po tokenech jako server-sent events
+
 class IndexRequest(BaseModel):
     pass
 
@@ -60,15 +77,16 @@ async def health_check():
 @router.post("/search")
 async def search_documents(
     request: SearchRequest,
+    http_request: Request,
     service: OllamaAISearchService = Depends(get_ollama_ai_search_service)
 ):
     """Vyhledá dokumenty pomocí Ollama sémantického vyhledávání"""
     try:
-        results = service.search_documents(
+        results = await cancel_on_disconnect(http_request, service.search_documents_async(
             query=request.query,
             limit=request.limit,
             file_types=request.file_types
-        )
+        ))
         
         return {
             "query": request.query,
@@ -76,6 +94,8 @@ async def search_documents(
             "total_results": len(results),
             "results": results
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Chyba při vyhledávání: {e}")
         raise HTTPException(status_code=500, detail=f"Chyba při vyhledávání: {str(e)}")
@@ -83,51 +103,118 @@ async def search_documents(
 @router.post("/generate-answer")
 async def generate_answer(
     request: GenerateAnswerRequest,
+    http_request: Request,
     service: OllamaAISearchService = Depends(get_ollama_ai_search_service)
 ):
     """Generuje odpověď na základě nalezených dokumentů"""
     try:
-        answer = service.generate_answer(
+        answer = await cancel_on_disconnect(http_request, service.generate_answer_async(
             query=request.query,
             context_documents=request.context_documents,
             max_length=request.max_length
-        )
+        ))
         
         return {
             "query": request.query,
             "answer": answer,
             "context_documents_count": len(request.context_documents)
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Chyba při generování odpovědi: {e}")
         raise HTTPException(status_code=500, detail=f"Chyba při generování odpovědi: {str(e)}")
 
+@router.post("/generate-answer/stream")
+async def generate_answer_stream(
+    request: GenerateAnswerRequest,
+    http_request: Request,
+    service: OllamaAISearchService = Depends(get_ollama_ai_search_service)
+):
+    """
+    Generuje odpověď a posílá ji po tokenech jako server-sent events
+
+    Události: "meta", "token" ({"text"}) pro každou část odpovědi, "done" s metrikami
+    (ttft_ms, tokens, tokens_per_second, elapsed_ms), případně "error".
+    Odpojení klienta zastaví generování v Ollama.
+    """
+    events = service.stream_answer(
+        query=request.query,
+        context_documents=request.context_documents,
+        max_length=request.max_length
+    )
+    header = {
+        "query": request.query,
+        "model": service.llm_model,
+        "context_documents_count": len(request.context_documents)
+    }
+    return stream_events(events, header, "sse", http_request)
+
+@router.post("/ask")
+async def ask(
+    request: AskRequest,
+    http_request: Request,
+    service: OllamaAISearchService = Depends(get_ollama_ai_search_service)
+):
+    """
+    Odpoví na dotaz z indexovaných dokumentů v jednom požadavku
+
+    Chunky se vyhledají a kontext sestaví na serveru, odpověď obsahuje jen
+    kompaktní citace (soubor, chunk, rozsah znaků, skóre) místo textu dokumentů.
+    Se stream=true jde odpověď jako server-sent events: "meta", "context"
+    s citacemi, "token" a "done" s metrikami.
+    """
+    if request.stream:
+        events = service.stream_ask(
+            query=request.query,
+            max_length=request.max_length,
+            file_types=request.file_types,
+            watched_items=request.watched_items
+        )
+        return stream_events(events, {"query": request.query, "model": service.llm_model}, "sse", http_request)
+    
+    try:
+        result = await cancel_on_disconnect(http_request, service.ask(
+            query=request.query,
+            max_length=request.max_length,
+            file_types=request.file_types,
+            watched_items=request.watched_items
+        ))
+        
+        return {
+            "query": request.query,
+            **result
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Chyba při odpovídání na dotaz: {e}")
+        raise HTTPException(status_code=500, detail=f"Chyba při odpovídání na dotaz: {str(e)}")
+
 @router.post("/index")
 async def index_documents(
     request: IndexRequest,
     service: OllamaAISearchService = Depends(get_ollama_ai_search_service)
 ):
-    """Indexuje všechny dokumenty pomocí Ollama"""
+    """Indexuje dokumenty pomocí Ollama (jen nové a změněné soubory)"""
     try:
-        # Získá všechny indexované soubory
-        files = db.get_all_files()
+        sync = AIIndexSync(db, service)
+        loop = asyncio.get_running_loop()
+        stats = await loop.run_in_executor(None, sync.sync)
+        indexed_count = stats["added"] + stats["updated"]
         
-        if not files:
-            return {"message": "Žádné soubory k indexování", "indexed_count": 0}
-        
-        # Přidá dokumenty do Ollama indexu
-        success = service.add_documents(files)
-        
-        if success:
-            stats = service.get_index_stats()
-            return {
-                "message": f"Indexováno {len(files)} dokumentů pomocí Ollama",
-                "indexed_count": len(files),
-                "stats": stats
-            }
-        else:
+        if stats["failed"]:
             raise HTTPException(status_code=500, detail="Chyba při indexování")
+        
+        return {
+            "message": f"Indexováno {indexed_count} dokumentů pomocí Ollama",
+            "indexed_count": indexed_count,
+            "sync": stats,
+            "stats": service.get_index_stats()
+        }
             
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Chyba při indexování: {e}")
         raise HTTPException(status_code=500, detail=f"Chyba při indexování: {str(e)}")
@@ -171,12 +258,11 @@ async def get_stats(
 @router.get("/suggestions")
 async def get_suggestions(
     query: str,
-    limit: int = 5,
-    service: OllamaAISearchService = Depends(get_ollama_ai_search_service)
+    limit: int = 5
 ):
-    """Získá návrhy pro vyhledávání pomocí Ollama"""
+    """Získá návrhy pro vyhledávání z prefixového indexu (bez volání LLM při každém stisku klávesy)"""
     try:
-        suggestions = service.get_search_suggestions(query, limit)
+        suggestions = get_suggestion_index(db).suggest(query, limit)
         
         return {
             "query": query,
@@ -1,7 +1,11 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
 from typing import List, Optional
 from ..models.database import Database
+from ..services.hybrid_search import HybridSearchService, HYBRID_FUSION_MODES
+from ..services.suggestion_index import get_suggestion_index
+from .ai_search import get_ai_search_service_async
+from .streaming import stream_format, stream_results
 
 router = APIRouter(prefix="/api/search", tags=["search"])
 
@@ -13,6 +17,16 @@ class SearchRequest(BaseModel):
     limit: int = 50
     file_types: Optional[List[str]] = None
     watched_items: Optional[List[int]] = None
+    stream: Optional[str] = None  # "ndjson" nebo "sse" (None = podle hlavičky Accept)
+
+class HybridSearchRequest(BaseModel):
+    query: str
+    limit: int = 10
+    file_types: Optional[List[str]] = None
+    watched_items: Optional[List[str]] = None  # Názvy sledovaných položek
+    fusion: Optional[str] = None  # "rrf" nebo "weighted"
+    semantic_weight: Optional[float] = None
+    stream: Optional[str] = None  # "ndjson" nebo "sse" (None = podle hlavičky Accept)
 
 class SearchResult(BaseModel):
     id: int
@@ -26,11 +40,12 @@ class SearchResult(BaseModel):
     indexed_at: str
 
 @router.post("/files")
-async def search_files(request: SearchRequest):
+async def search_files(request: SearchRequest, http_request: Request):
     """Vyhledá v indexovaných souborech"""
     try:
         if not request.query.strip():
             raise HTTPException(status_code=400, detail="Dotaz nemůže být prázdný")
+        fmt = stream_format(http_request, request.stream)
         
         # Získá výsledky z databáze
         results = db.search_files(request.query, request.limit)
@@ -45,6 +60,9 @@ async def search_files(request: SearchRequest):
             watched_item_ids = [item['id'] for item in watched_items if item['id'] in request.watched_items]
             # Tady by bylo potřeba upravit search_files aby podporoval filtrování podle watched_item_id
         
+        if fmt:
+            return stream_results(results, {"query": request.query}, fmt)
+        
         return {
             "query": request.query,
             "total_results": len(results),
@@ -56,6 +74,62 @@ async def search_files(request: SearchRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Chyba při vyhledávání: {str(e)}")
 
+@router.post("/hybrid")
+async def hybrid_search(request: HybridSearchRequest, http_request: Request):
+    """
+    Hybridní vyhledávání - BM25 a sémantické výsledky spojené v jednom žebříčku
+    
+    Se streamem (NDJSON nebo SSE) se výsledky odesílají hned po fúzi, úryvky
+    se počítají pro každý výsledek zvlášť.
+    """
+    try:
+        if not request.query.strip():
+            raise HTTPException(status_code=400, detail="Dotaz nemůže být prázdný")
+        if request.fusion and request.fusion not in HYBRID_FUSION_MODES:
+            raise HTTPException(status_code=400, detail=f"Nepodporovaný způsob fúze: {request.fusion}")
+        if request.semantic_weight is not None and not 0 <= request.semantic_weight <= 1:
+            raise HTTPException(status_code=400, detail="Váha sémantické části musí být mezi 0 a 1")
+        
+        # Bez AI služby se vrátí jen lexikální výsledky
+        ai_service = await get_ai_search_service_async()
+        
+        hybrid_service = HybridSearchService(db, ai_service)
+        fmt = stream_format(http_request, request.stream)
+        if fmt:
+            results = hybrid_service.iter_search(
+                query=request.query,
+                limit=request.limit,
+                file_types=request.file_types,
+                watched_items=request.watched_items,
+                fusion=request.fusion,
+                semantic_weight=request.semantic_weight
+            )
+            return stream_results(results, {
+                "query": request.query,
+                "semantic_available": ai_service is not None
+            }, fmt)
+        
+        results = await hybrid_service.search(
+            query=request.query,
+            limit=request.limit,
+            file_types=request.file_types,
+            watched_items=request.watched_items,
+            fusion=request.fusion,
+            semantic_weight=request.semantic_weight
+        )
+        
+        return {
+            "query": request.query,
+            "semantic_available": ai_service is not None,
+            "total_results": len(results),
+            "results": results
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Chyba při hybridním vyhledávání: {str(e)}")
+
 @router.get("/suggestions")
 async def get_search_suggestions(query: str, limit: int = 10):
     """Získá návrhy pro vyhledávání"""
@@ -63,31 +137,10 @@ async def get_search_suggestions(query: str, limit: int = 10):
         if not query.strip():
             return {"suggestions": []}
         
-        # Jednoduché návrhy založené na názvech souborů
-        # V budoucnu by se dalo implementovat sofistikovanější řešení
-        results = db.search_files(query, limit)
-        
-        suggestions = []
-        seen_suggestions = set()
-        
-        for result in results:
-            # Návrhy z názvu souboru
-            file_name = result['file_name'].lower()
-            if query.lower() in file_name and file_name not in seen_suggestions:
-                suggestions.append(file_name)
-                seen_suggestions.add(file_name)
-            
-            # Návrhy z cesty
-            path_parts = result['file_path'].lower().split('/')
-            for part in path_parts:
-                if query.lower() in part and part not in seen_suggestions:
-                    suggestions.append(part)
-                    seen_suggestions.add(part)
-            
-            if len(suggestions) >= limit:
-                break
-        
-        return {"suggestions": suggestions[:limit]}
+        # Prefixový index termů, názvů souborů a složek (bez prohledávání obsahu)
+        suggestions = get_suggestion_index(db).suggest(query, limit)
+        
+        return {"suggestions": suggestions}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Chyba při načítání návrhů: {str(e)}")
@@ -4,6 +4,7 @@ import os
 from pathlib import Path
 
 from ..config.settings import settings
+from ..services.system_monitor import get_system_sampler
 
 router = APIRouter()
 
@@ -19,6 +20,9 @@ async def get_settings():
         "config_dir": settings.CONFIG_DIR,
         "default_llm_model": settings.DEFAULT_LLM_MODEL,
         "embedding_model": settings.EMBEDDING_MODEL,
+        "embedding_backend": settings.EMBEDDING_BACKEND,
+        "onnx_quantize": settings.ONNX_QUANTIZE,
+        "onnx_intra_op_threads": settings.ONNX_INTRA_OP_THREADS,
         "vector_db_type": settings.VECTOR_DB_TYPE,
         "supported_formats": settings.SUPPORTED_FORMATS,
         "chunk_size": settings.CHUNK_SIZE,
@@ -94,6 +98,26 @@ async def get_available_embedding_models():
     
     return {"models": models}
 
+@router.get("/embedding-backends")
+async def get_available_embedding_backends():
+    """Získání dostupných embedding backendů"""
+    backends = [
+        {
+            "id": "sentence-transformers",
+            "name": "PyTorch (sentence-transformers)",
+            "description": "Výchozí backend, podporuje GPU",
+            "recommended": False
+        },
+        {
+            "id": "onnx",
+            "name": "ONNX Runtime",
+            "description": "Rychlejší inference na CPU, volitelně int8 kvantizace",
+            "recommended": True
+        }
+    ]
+    
+    return {"backends": backends}
+
 @router.get("/vector-dbs")
 async def get_available_vector_dbs():
     """Získání dostupných vektorových databází"""
@@ -107,7 +131,13 @@ async def get_available_vector_dbs():
         {
             "id": "faiss",
             "name": "FAISS",
-            "description": "Rychlá vektorová DB od Facebooku",
+            "description": "Rychlá vektorová DB od Facebooku (HNSW/IVF, memory-mapped index)",
+            "recommended": False
+        },
+        {
+            "id": "numpy",
+            "name": "NumPy (přesné)",
+            "description": "Přesné vyhledávání hrubou silou, vhodné do ~1M chunků",
             "recommended": False
         },
         {
@@ -189,11 +219,16 @@ async def get_system_info():
         # Síť
         network = psutil.net_io_counters()
         
+        # Zátěž z běžícího sampleru (bez blokujícího měření)
+        load = get_system_sampler().get_status()
+        
         return {
             "cpu": {
                 "count": cpu_count,
                 "frequency_mhz": cpu_freq.current if cpu_freq else None,
-                "usage_percent": psutil.cpu_percent(interval=1)
+                "sampler_warming_up": load["warming_up"],
+                "usage_percent": load["cpu_usage"],
+                "usage_percent_avg": round(load["cpu_usage_avg"], 1) if not load["warming_up"] else None
             },
             "memory": {
                 "total_gb": round(memory.total / (1024**3), 2),
@@ -205,7 +240,9 @@ async def get_system_info():
                 "total_gb": round(disk.total / (1024**3), 2),
                 "free_gb": round(disk.free / (1024**3), 2),
                 "used_gb": round(disk.used / (1024**3), 2),
-                "percent": disk.percent
+                "percent": disk.percent,
+                "read_bytes_per_sec": round(load["disk_read_bytes_per_sec_avg"]) if not load["warming_up"] else None,
+                "write_bytes_per_sec": round(load["disk_write_bytes_per_sec_avg"]) if not load["warming_up"] else None
             },
             "network": {
                 "bytes_sent": network.bytes_sent,
@@ -0,0 +1,162 @@
+from fastapi import HTTPException, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import iterate_in_threadpool
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Dict, Iterable, Optional, Tuple, TypeVar, Union
+import asyncio
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+SSE_MEDIA_TYPE = "text/event-stream"
+STREAM_FORMATS = {"ndjson": NDJSON_MEDIA_TYPE, "sse": SSE_MEDIA_TYPE}
+# Stavový kód pro klienta, který zavřel spojení (konvence nginx)
+CLIENT_CLOSED_REQUEST = 499
+
+T = TypeVar("T")
+
+def stream_format(request: Request, requested: Optional[str] = None) -> Optional[str]:
+    """
+    Formát streamované odpovědi
+
+    Explicitní parametr požadavku má přednost před hlavičkou Accept.
+
+    Returns:
+        "ndjson", "sse" nebo None pro běžnou JSON odpověď
+    """
+    if requested:
+        if requested not in STREAM_FORMATS:
+            raise HTTPException(status_code=400, detail=f"Nepodporovaný formát streamu: {requested}")
+        return requested
+
+    accept = request.headers.get("accept", "")
+    if SSE_MEDIA_TYPE in accept:
+        return "sse"
+    if NDJSON_MEDIA_TYPE in accept:
+        return "ndjson"
+    return None
+
+def _json_default(value: Any) -> Any:
+    """Serializace hodnot, které json neumí (numpy skaláry, datumy)"""
+    if hasattr(value, "item"):
+        return value.item()
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return str(value)
+
+def encode_event(event: str, data: Dict, fmt: str) -> str:
+    """
+    Jedna událost streamu
+
+    NDJSON: jeden řádek {"type": event, ...data}
+    SSE: blok "event: ..." + "data: {...}"
+    """
+    if fmt == "sse":
+        payload = json.dumps(data, ensure_ascii=False, default=_json_default)
+        return f"event: {event}\ndata: {payload}\n\n"
+    return json.dumps({"type": event, **data}, ensure_ascii=False, default=_json_default) + "\n"
+
+def streaming_response(events: AsyncIterable[str], fmt: str) -> StreamingResponse:
+    """StreamingResponse bez bufferování na proxy"""
+    return StreamingResponse(
+        events,
+        media_type=STREAM_FORMATS[fmt],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def stream_results(results: Union[Iterable[Dict], AsyncIterable[Dict]], header: Dict, fmt: str) -> StreamingResponse:
+    """
+    Odešle výsledky vyhledávání postupně, jakmile jsou k dispozici
+
+    Pořadí událostí: "meta" (header), "result" pro každý výsledek s pořadím,
+    nakonec "done" s počtem výsledků, případně "error", pokud zdroj selže
+    uprostřed streamu. Synchronní iterátory se čtou ve threadpoolu, takže
+    neblokují event loop. Při odpojení klienta se čtení zdroje ukončí.
+
+    Args:
+        results: Iterátor výsledků (synchronní nebo asynchronní)
+        header: Data úvodní události (např. dotaz a typ vyhledávání)
+        fmt: "ndjson" nebo "sse"
+    """
+    async def events():
+        start = time.perf_counter()
+        yield encode_event("meta", header, fmt)
+
+        iterator = results if hasattr(results, "__aiter__") else iterate_in_threadpool(iter(results))
+        total = 0
+        try:
+            async for result in iterator:
+                total += 1
+                yield encode_event("result", {"rank": total, "result": result}, fmt)
+        except Exception as e:
+            logger.error(f"Chyba při streamování výsledků: {e}")
+            yield encode_event("error", {"detail": str(e)}, fmt)
+            return
+
+        yield encode_event("done", {
+            "total_results": total,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 1)
+        }, fmt)
+
+    return streaming_response(events(), fmt)
+
+def stream_events(events: AsyncIterator[Tuple[str, Dict]], header: Dict, fmt: str,
+                  request: Optional[Request] = None) -> StreamingResponse:
+    """
+    Přepošle události služby klientovi (např. tokeny generované odpovědi)
+
+    Pořadí událostí: "meta" (header), události zdroje, při chybě "error".
+    Po odpojení klienta se zdroj uzavře (aclose), takže se zastaví i práce
+    za ním - např. generování v Ollama.
+
+    Args:
+        events: Asynchronní iterátor dvojic (typ události, data)
+        header: Data úvodní události
+        fmt: "ndjson" nebo "sse"
+        request: Požadavek klienta pro kontrolu odpojení mezi událostmi
+    """
+    async def stream():
+        yield encode_event("meta", header, fmt)
+        try:
+            async for event, data in events:
+                yield encode_event(event, data, fmt)
+                if request is not None and await request.is_disconnected():
+                    logger.info(f"Klient se odpojil, ukončuji stream {request.url.path}")
+                    break
+        except Exception as e:
+            logger.error(f"Chyba při streamování: {e!r}")
+            yield encode_event("error", {"detail": str(e) or e.__class__.__name__}, fmt)
+        finally:
+            await events.aclose()
+
+    return streaming_response(stream(), fmt)
+
+async def cancel_on_disconnect(request: Request, awaitable: Awaitable[T], poll_interval: float = 0.25) -> T:
+    """
+    Počká na výsledek, ale zruší ho, pokud se klient mezitím odpojí
+
+    Zrušení se propaguje až do HTTP volání (např. Ollama), takže se
+    nepočítá odpověď, kterou už nikdo nepřečte.
+
+    Args:
+        request: Požadavek klienta
+        awaitable: Korutina s prací požadavku
+        poll_interval: Interval kontroly odpojení v s
+
+    Raises:
+        HTTPException: 499, pokud se klient odpojil
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                logger.info(f"Klient se odpojil, ruším požadavek {request.url.path}")
+                raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Klient ukončil spojení")
+    finally:
+        if not task.done():
+            task.cancel()
@@ -0,0 +1,106 @@
+import logging
+from typing import List, Dict, Optional
+
+from ..config.settings import settings
+from ..models.database import Database
+
+logger = logging.getLogger(__name__)
+
+class AIIndexSync:
+    """
+    Inkrementální synchronizace souborů z SQLite do AI vektorového indexu
+
+    Porovná content_hash v tabulce indexed_files s hashem uloženým
+    v metadatech prvního chunku každého dokumentu. První chunk se zapisuje
+    jako poslední, takže ho má jen úplně zaindexovaný dokument (prázdný
+    dokument má jeden prázdný chunk). Embeddingy se počítají jen pro nové
+    a změněné soubory, smazané soubory se z indexu odstraní. Soubory se
+    zpracovávají po dávkách, takže paměť nezávisí na velikosti korpusu.
+    """
+
+    def __init__(self, db: Database, service, batch_size: Optional[int] = None):
+        """
+        Args:
+            db: Databáze indexovaných souborů
+            service: AI služba s metodami add_documents, delete_documents a atributem collection
+            batch_size: Počet souborů v jedné dávce (výchozí settings.AI_SYNC_BATCH_SIZE)
+        """
+        self.db = db
+        self.service = service
+        self.batch_size = batch_size or settings.AI_SYNC_BATCH_SIZE
+
+    def _indexed_hashes(self, watched_item_names: Optional[List[str]] = None) -> Dict[int, str]:
+        """
+        Hashe dokumentů ve vektorovém indexu
+
+        Načítají se jen metadata prvních chunků (jeden záznam na dokument).
+        Záznamy z doby před chunky chunk_index nemají, takže se přeindexují.
+        """
+        where: Dict = {'chunk_index': 0}
+        if watched_item_names is not None:
+            where = {'$and': [where, {'watched_item_name': {'$in': watched_item_names}}]}
+
+        existing = self.service.collection.get(where=where, include=['metadatas'])
+        return {
+            metadata['doc_id']: metadata.get('content_hash') or ''
+            for metadata in existing['metadatas']
+            if 'doc_id' in metadata
+        }
+
+    def sync(self, watched_item_ids: Optional[List[int]] = None) -> Dict[str, int]:
+        """
+        Synchronizuje AI index s databází
+
+        Args:
+            watched_item_ids: Omezení na sledované položky (None = všechny)
+
+        Returns:
+            Počty přidaných, změněných, smazaných, nezměněných a neúspěšných souborů
+        """
+        watched_item_names = None
+        if watched_item_ids:
+            watched_item_names = [
+                item['name'] for item in self.db.get_watched_items() if item['id'] in watched_item_ids
+            ]
+
+        current = self.db.get_file_hashes(watched_item_ids)
+        indexed = self._indexed_hashes(watched_item_names)
+
+        added = [file_id for file_id in current if file_id not in indexed]
+        updated = [file_id for file_id, content_hash in current.items()
+                   if file_id in indexed and indexed[file_id] != content_hash]
+
+        # Mažou se jen dokumenty, jejichž soubor už v databázi není
+        existing_ids = set(self.db.get_file_ids())
+        removed = [doc_id for doc_id in indexed if doc_id not in existing_ids]
+
+        stats = {
+            "added": 0,
+            "updated": 0,
+            "deleted": 0,
+            "unchanged": len(current) - len(added) - len(updated),
+            "failed": 0
+        }
+        logger.info(
+            f"AI sync: {len(added)} nových, {len(updated)} změněných, "
+            f"{len(removed)} smazaných, {stats['unchanged']} beze změny"
+        )
+
+        for start in range(0, len(removed), self.batch_size):
+            batch = removed[start:start + self.batch_size]
+            self.service.delete_documents(batch)
+            stats["deleted"] += len(batch)
+
+        updated_ids = set(updated)
+        pending = added + updated
+        for start in range(0, len(pending), self.batch_size):
+            batch_ids = pending[start:start + self.batch_size]
+            documents = self.db.get_files_by_ids(batch_ids)
+            if self.service.add_documents(documents):
+                for doc in documents:
+                    stats["updated" if doc['id'] in updated_ids else "added"] += 1
+            else:
+                stats["failed"] += len(batch_ids)
+            logger.info(f"AI sync: zpracováno {min(start + self.batch_size, len(pending))}/{len(pending)} souborů")
+
+        return stats
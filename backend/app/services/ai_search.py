@@ -1,13 +1,20 @@
 import numpy as np
-from typing import List, Dict, Optional, Tuple
-from sentence_transformers import SentenceTransformer
-import chromadb
-from chromadb.config import Settings
+from typing import List, Dict, Optional, Tuple, Iterator
 import os
 import json
 from pathlib import Path
 import logging
 
+from ..config.settings import settings
+from .quantization import open_quantized_index, query_quantized
+from .embeddings import get_embedding_backend, uncached_backend
+from .search_cache import SearchCache, cache_key
+from .vector_store import create_vector_store
+from .reranker import get_reranker
+from .text_chunker import TextChunker
+from .document_chunks import iter_chunk_records, find_stale_chunk_ids, find_document_chunk_ids, aggregate_by_file
+from .snippets import find_snippets, format_snippet, analyze_relevance
+
 logger = logging.getLogger(__name__)
 
 class AISearchService:
@@ -17,13 +24,16 @@ class AISearchService:
         
         Args:
             model_name: Název embedding modelu z HuggingFace
-            chroma_persist_directory: Adresář pro ukládání ChromaDB
+            chroma_persist_directory: Adresář pro ukládání vektorové DB
         """
         self.model_name = model_name
         self.chroma_persist_directory = chroma_persist_directory
         self.embedding_model = None
-        self.chroma_client = None
+        self.query_model = None  # Stejný model bez perzistentní cache (pro dotazy)
+        self.chunker = None
         self.collection = None
+        self.quantized_index = None
+        self.search_cache = SearchCache(settings.QUERY_CACHE_SIZE, settings.RESULT_CACHE_SIZE)
         
         # Vytvoří adresář pro embeddings
         os.makedirs(chroma_persist_directory, exist_ok=True)
@@ -31,31 +41,70 @@ class AISearchService:
         self._initialize_models()
     
     def _initialize_models(self):
-        """Inicializuje embedding model a ChromaDB"""
+        """Inicializuje embedding model a vektorovou DB"""
         try:
             # Načte embedding model
             logger.info(f"Načítám embedding model: {self.model_name}")
-            self.embedding_model = SentenceTransformer(self.model_name)
-            
-            # Inicializuje ChromaDB
-            logger.info("Inicializuji ChromaDB")
-            self.chroma_client = chromadb.PersistentClient(
-                path=self.chroma_persist_directory,
-                settings=Settings(anonymized_telemetry=False)
+            self.embedding_model = get_embedding_backend(self.model_name)
+            self.query_model = uncached_backend(self.embedding_model)
+            self.chunker = TextChunker.for_model(
+                self.embedding_model,
+                chunk_size=settings.CHUNK_SIZE,
+                chunk_overlap=settings.CHUNK_OVERLAP,
+                token_aware=settings.CHUNK_TOKEN_AWARE
             )
             
-            # Vytvoří nebo načte kolekci
-            self.collection = self.chroma_client.get_or_create_collection(
-                name="dex_search_documents",
+            # Vytvoří nebo načte kolekci ve vektorové DB podle VECTOR_DB_TYPE
+            logger.info(f"Inicializuji vektorovou DB ({settings.VECTOR_DB_TYPE})")
+            self.collection = create_vector_store(
+                "dex_search_documents",
+                self.chroma_persist_directory,
                 metadata={"description": "Dex Search dokumenty pro sémantické vyhledávání"}
             )
             
+            # Kvantizovaný index pro dvoufázové vyhledávání
+            if settings.EMBEDDING_QUANTIZATION != "none":
+                self._initialize_quantized_index(settings.EMBEDDING_QUANTIZATION)
+            
             logger.info("✅ AI Search služba inicializována")
             
         except Exception as e:
             logger.error(f"❌ Chyba při načítání embedding modelu: {e}")
             raise
     
+    def _initialize_quantized_index(self, mode: str):
+        """
+        Načte kvantizovaný index a případně ho doplní z vektorové DB
+        
+        Args:
+            mode: Režim kvantizace ("int8" nebo "binary")
+        """
+        self.quantized_index = open_quantized_index(
+            os.path.join(self.chroma_persist_directory, f"quantized_{mode}"),
+            mode,
+            self.collection,
+            rescore_multiplier=settings.QUANTIZATION_RESCORE_MULTIPLIER,
+            batch_size=settings.VECTOR_UPSERT_BATCH_SIZE
+        )
+    
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Vytvoří embeddings jako float32 matici (bez převodu na Python listy)"""
+        if not self.embedding_model:
+            raise RuntimeError("Embedding model není inicializován")
+        
+        return self.embedding_model.encode(texts)
+    
+    def _encode_queries(self, queries: List[str]) -> np.ndarray:
+        """Embeddingy dotazů (bez perzistentní cache chunků)"""
+        if not self.query_model:
+            raise RuntimeError("Embedding model není inicializován")
+        
+        return self.query_model.encode(queries)
+    
+    def _embed_query(self, query: str) -> np.ndarray:
+        """Embedding dotazu přes LRU cache v paměti"""
+        return self.search_cache.get_query_embedding(query, lambda text: self._encode_queries([text])[0])
+    
     def create_embeddings(self, texts: List[str]) -> List[List[float]]:
         """
         Vytvoří embeddings pro seznam textů
@@ -66,19 +115,18 @@ class AISearchService:
         Returns:
             Seznam embedding vektorů
         """
-        if not self.embedding_model:
-            raise RuntimeError("Embedding model není inicializován")
-        
         try:
-            embeddings = self.embedding_model.encode(texts, convert_to_tensor=False)
-            return embeddings.tolist()
+            return self._encode(texts).tolist()
         except Exception as e:
             logger.error(f"Chyba při vytváření embeddings: {e}")
             raise
     
     def add_documents(self, documents: List[Dict]) -> bool:
         """
-        Přidá dokumenty do ChromaDB pro sémantické vyhledávání
+        Přidá dokumenty do vektorové DB pro sémantické vyhledávání
+        
+        Každý dokument se rozdělí na chunky s jedním vektorem na chunk, takže
+        je prohledatelný celý obsah, ne jen začátek do max. délky modelu.
         
         Args:
             documents: Seznam dokumentů s klíči:
@@ -88,56 +136,98 @@ class AISearchService:
                 - content_text: obsah souboru
                 - file_type: typ souboru
                 - watched_item_name: název sledované položky
+                - content_hash: hash obsahu (volitelný)
                 
         Returns:
             True pokud se povedlo přidat dokumenty
         """
         if not self.collection:
-            raise RuntimeError("ChromaDB kolekce není inicializována")
+            raise RuntimeError("Vektorová kolekce není inicializována")
         
         try:
-            # Připraví data pro ChromaDB
-            ids = []
-            texts = []
-            metadatas = []
+            chunk_counts: Dict[int, int] = {}
+            batch = []
+            first_chunks = []
+            total_chunks = 0
             
-            for doc in documents:
-                # Vytvoří unikátní ID
-                doc_id = f"doc_{doc['id']}"
-                ids.append(doc_id)
-                
-                # Text pro embedding (kombinuje název a obsah)
-                text = f"{doc['file_name']}\n\n{doc['content_text']}"
-                texts.append(text)
-                
-                # Metadata
-                metadata = {
-                    'file_path': doc['file_path'],
-                    'file_name': doc['file_name'],
-                    'file_type': doc['file_type'],
-                    'watched_item_name': doc['watched_item_name'],
-                    'file_size': doc.get('file_size', 0)
-                }
-                metadatas.append(metadata)
+            # Embeddingy a zápis po dávkách - paměť neroste s počtem dokumentů
+            for record in iter_chunk_records(documents, self.chunker):
+                chunk_counts[record.metadata['doc_id']] = record.metadata['total_chunks']
+                # První chunk nese content_hash pro synchronizaci - zapíše se až nakonec,
+                # aby dokument po chybě v další dávce nevypadal jako zaindexovaný
+                if record.metadata['chunk_index'] == 0:
+                    first_chunks.append(record)
+                    continue
+                batch.append(record)
+                if len(batch) >= settings.VECTOR_UPSERT_BATCH_SIZE:
+                    self._upsert_chunks(batch)
+                    total_chunks += len(batch)
+                    batch = []
+            if batch:
+                self._upsert_chunks(batch)
+                total_chunks += len(batch)
             
-            # Vytvoří embeddings
-            embeddings = self.create_embeddings(texts)
+            # Smaže chunky, které po zkrácení dokumentu přebývají
+            stale_ids = find_stale_chunk_ids(self.collection, documents, chunk_counts)
+            if stale_ids:
+                self.collection.delete(ids=stale_ids)
             
-            # Přidá do ChromaDB
-            self.collection.add(
-                embeddings=embeddings,
-                documents=texts,
-                metadatas=metadatas,
-                ids=ids
-            )
+            for start in range(0, len(first_chunks), settings.VECTOR_UPSERT_BATCH_SIZE):
+                self._upsert_chunks(first_chunks[start:start + settings.VECTOR_UPSERT_BATCH_SIZE])
+            total_chunks += len(first_chunks)
+            # Jedno uložení indexu na dávku (faiss/numpy odkládají zápis na disk)
+            self.collection.flush()
             
-            logger.info(f"Přidáno {len(documents)} dokumentů do AI indexu")
+            if self.quantized_index is not None:
+                self.quantized_index.delete(stale_ids)
+                self.quantized_index.save()
+            
+            self.search_cache.bump()
+            logger.info(f"Přidáno {len(documents)} dokumentů ({total_chunks} chunků) do AI indexu")
             return True
             
         except Exception as e:
             logger.error(f"Chyba při přidávání dokumentů: {e}")
             return False
     
+    def _upsert_chunks(self, records: List) -> None:
+        """Vytvoří embeddings pro dávku chunků a zapíše je"""
+        ids = [record.id for record in records]
+        embeddings = self._encode([record.embedding_text for record in records])
+        
+        self.collection.upsert(
+            ids=ids,
+            embeddings=embeddings,
+            documents=[record.document for record in records],
+            metadatas=[record.metadata for record in records]
+        )
+        
+        if self.quantized_index is not None:
+            self.quantized_index.add(ids, embeddings)
+    
+    def delete_documents(self, doc_ids: List[int]) -> int:
+        """
+        Smaže dokumenty (všechny jejich chunky) z AI indexu
+        
+        Args:
+            doc_ids: ID dokumentů (indexed_files.id)
+            
+        Returns:
+            Počet smazaných záznamů
+        """
+        if not self.collection:
+            raise RuntimeError("Vektorová kolekce není inicializována")
+        
+        ids = find_document_chunk_ids(self.collection, doc_ids)
+        if ids:
+            self.collection.delete(ids=ids)
+            self.collection.flush()
+            if self.quantized_index is not None:
+                self.quantized_index.delete(ids)
+                self.quantized_index.save()
+            self.search_cache.bump()
+        return len(ids)
+    
     def search_documents(self, query: str, limit: int = 10, 
                         file_types: Optional[List[str]] = None,
                         watched_items: Optional[List[str]] = None) -> List[Dict]:
@@ -153,201 +243,199 @@ class AISearchService:
         Returns:
             Seznam nalezených dokumentů s relevancí
         """
+        try:
+            return self.search_documents_batch([query], limit, file_types, watched_items)[0]
+        except RuntimeError:
+            raise
+        except Exception as e:
+            logger.error(f"Chyba při vyhledávání: {e}")
+            return []
+    
+    def search_documents_batch(self, queries: List[str], limit: int = 10,
+                               file_types: Optional[List[str]] = None,
+                               watched_items: Optional[List[str]] = None) -> List[List[Dict]]:
+        """
+        Vyhledá výsledky pro více dotazů najednou
+        
+        Dotazy, které nejsou v cache, se vektorizují jedním voláním modelu
+        a vyhledají jedním dotazem do vektorové DB s více vektory.
+        
+        Args:
+            queries: Seznam vyhledávacích dotazů
+            limit: Maximální počet výsledků pro každý dotaz
+            file_types: Filtrování podle typů souborů
+            watched_items: Filtrování podle sledovaných položek
+            
+        Returns:
+            Seznam výsledků ve stejném pořadí jako queries
+        """
         if not self.collection:
-            raise RuntimeError("ChromaDB kolekce není inicializována")
+            raise RuntimeError("Vektorová kolekce není inicializována")
         
-        try:
-            # Vytvoří embedding pro dotaz
-            query_embedding = self.create_embeddings([query])[0]
+        generation = self.search_cache.generation
+        keys = [cache_key("search", query, limit, file_types or (), watched_items or ()) for query in queries]
+        batch_results: List[Optional[List[Dict]]] = [self.search_cache.get_results(key) for key in keys]
+        
+        # Každý nevyřízený dotaz se hledá jen jednou, i když se v dávce opakuje
+        pending = list(dict.fromkeys(
+            query for query, cached in zip(queries, batch_results) if cached is None
+        ))
+        
+        if pending:
+            # Embeddingy chybějících dotazů jedním průchodem modelu
+            embeddings = {}
+            missing = []
+            for query in pending:
+                embedding = self.search_cache.query_embeddings.get(query)
+                if embedding is None:
+                    missing.append(query)
+                else:
+                    embeddings[query] = embedding
+            if missing:
+                for query, embedding in zip(missing, self._encode_queries(missing)):
+                    self.search_cache.query_embeddings.put(query, embedding)
+                    embeddings[query] = embedding
             
-            # Připraví filtry
-            where_clause = {}
-            if file_types:
-                where_clause['file_type'] = {"$in": file_types}
-            if watched_items:
-                where_clause['watched_item_name'] = {"$in": watched_items}
+            where_clause = self._build_where(file_types, watched_items)
+            query_embeddings = [embeddings[query] for query in pending]
+            # Víc chunků než souborů - jeden soubor může mít několik nejlepších chunků
+            chunk_limit = limit * settings.CHUNK_SEARCH_MULTIPLIER
             
             # Provede vyhledávání
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=limit,
-                where=where_clause if where_clause else None,
-                include=['metadatas', 'distances', 'documents']
-            )
+            if self.quantized_index is not None:
+                results = query_quantized(
+                    self.quantized_index, self.collection, np.asarray(query_embeddings), chunk_limit, where_clause
+                )
+            else:
+                results = self.collection.query(
+                    query_embeddings=[embedding.tolist() for embedding in query_embeddings],
+                    n_results=chunk_limit,
+                    where=where_clause,
+                    include=['metadatas', 'distances', 'documents']
+                )
             
-            # Zformátuje výsledky
-            formatted_results = []
-            if results['ids'] and results['ids'][0]:
-                for i in range(len(results['ids'][0])):
-                    result = {
-                        'id': results['ids'][0][i],
-                        'file_path': results['metadatas'][0][i]['file_path'],
-                        'file_name': results['metadatas'][0][i]['file_name'],
-                        'file_type': results['metadatas'][0][i]['file_type'],
-                        'watched_item_name': results['metadatas'][0][i]['watched_item_name'],
-                        'content_text': results['documents'][0][i],
-                        'relevance_score': 1.0 - results['distances'][0][i],  # Převede vzdálenost na relevanci
-                        'distance': results['distances'][0][i]
-                    }
-                    formatted_results.append(result)
+            found = {}
+            for row, query in enumerate(pending):
+                formatted_results = aggregate_by_file(self._format_results(results, row), limit)
+                self.search_cache.put_results(keys[queries.index(query)], formatted_results, generation)
+                found[query] = formatted_results
             
+            batch_results = [
+                cached if cached is not None else found[query]
+                for query, cached in zip(queries, batch_results)
+            ]
+        
+        return [[dict(result) for result in results] for results in batch_results]
+    
+    @staticmethod
+    def _build_where(file_types: Optional[List[str]], watched_items: Optional[List[str]]) -> Optional[Dict]:
+        """Sestaví filtr pro vektorovou DB"""
+        where_clause = {}
+        if file_types:
+            where_clause['file_type'] = {"$in": file_types}
+        if watched_items:
+            where_clause['watched_item_name'] = {"$in": watched_items}
+        return where_clause if where_clause else None
+    
+    @staticmethod
+    def _format_results(results: Dict, row: int) -> List[Dict]:
+        """Zformátuje výsledky (chunky) jednoho dotazu z odpovědi collection.query"""
+        formatted_results = []
+        if not results['ids'] or not results['ids'][row]:
             return formatted_results
-            
-        except Exception as e:
-            logger.error(f"Chyba při vyhledávání: {e}")
-            return []
+        
+        for i in range(len(results['ids'][row])):
+            metadata = results['metadatas'][row][i]
+            formatted_results.append({
+                # Záznamy z doby před chunky mají ID celého dokumentu a nemají doc_id
+                'id': f"doc_{metadata['doc_id']}" if 'doc_id' in metadata else results['ids'][row][i],
+                'chunk_id': results['ids'][row][i],
+                'chunk_index': metadata.get('chunk_index'),
+                'char_start': metadata.get('char_start'),
+                'char_end': metadata.get('char_end'),
+                'file_path': metadata['file_path'],
+                'file_name': metadata['file_name'],
+                'file_type': metadata['file_type'],
+                'watched_item_name': metadata['watched_item_name'],
+                'content_text': results['documents'][row][i],
+                'relevance_score': 1.0 - results['distances'][row][i],  # Převede vzdálenost na relevanci
+                'distance': results['distances'][row][i]
+            })
+        return formatted_results
     
-    def semantic_search(self, query: str, limit: int = 10) -> List[Dict]:
+    def semantic_search(self, query: str, limit: int = 10, rerank: Optional[bool] = None) -> List[Dict]:
         """
         Pokročilé sémantické vyhledávání s analýzou kontextu
         
         Args:
             query: Přirozený jazyk dotaz
             limit: Maximální počet výsledků
+            rerank: Přeřadit kandidáty cross-encoderem (None = podle settings.RERANKER_ENABLED)
             
         Returns:
             Seznam relevantních dokumentů s vysvětlením
         """
         try:
-            # Základní sémantické vyhledávání
-            results = self.search_documents(query, limit=limit)
-            
-            # Analýza kontextu a relevance
-            enhanced_results = []
-            for result in results:
-                # Analýza relevance na základě typu dotazu
-                relevance_analysis = self._analyze_relevance(query, result)
-                
-                enhanced_result = {
-                    **result,
-                    'relevance_analysis': relevance_analysis,
-                    'context_snippets': self._extract_context_snippets(result['content_text'], query)
-                }
-                enhanced_results.append(enhanced_result)
-            
-            # Seřadí podle relevance
-            enhanced_results.sort(key=lambda x: x['relevance_score'], reverse=True)
-            
-            return enhanced_results
-            
+            return list(self.iter_semantic_search(query, limit, rerank))
         except Exception as e:
             logger.error(f"Chyba při sémantickém vyhledávání: {e}")
             return []
     
-    def _analyze_relevance(self, query: str, result: Dict) -> Dict:
+    def iter_semantic_search(self, query: str, limit: int = 10, rerank: Optional[bool] = None) -> Iterator[Dict]:
         """
-        Analyzuje relevanci výsledku pro daný dotaz
+        Sémantické vyhledávání, které vrací výsledky postupně
         
-        Args:
-            query: Vyhledávací dotaz
-            result: Nalezený dokument
-            
-        Returns:
-            Slovník s analýzou relevance
-        """
-        query_lower = query.lower()
-        content_lower = result['content_text'].lower()
-        filename_lower = result['file_name'].lower()
-        
-        analysis = {
-            'exact_matches': 0,
-            'partial_matches': 0,
-            'semantic_matches': 0,
-            'filename_relevance': 0,
-            'content_relevance': 0
-        }
-        
-        # Počítá přesné shody
-        query_words = query_lower.split()
-        for word in query_words:
-            if word in content_lower:
-                analysis['exact_matches'] += 1
-            if word in filename_lower:
-                analysis['filename_relevance'] += 1
-        
-        # Analýza relevance obsahu
-        content_words = content_lower.split()
-        analysis['content_relevance'] = len(set(query_words) & set(content_words)) / len(query_words)
-        
-        return analysis
-    
-    def _extract_context_snippets(self, content: str, query: str, snippet_length: int = 200) -> List[str]:
-        """
-        Extrahuje relevantní úryvky z obsahu
+        Kandidáti se najdou a seřadí najednou, analýza kontextu a úryvky se
+        počítají až při odebírání dalšího výsledku. Do cache se výsledky
+        uloží jen po projití celého seznamu.
         
         Args:
-            content: Obsah dokumentu
-            query: Vyhledávací dotaz
-            snippet_length: Délka úryvku
+            query: Přirozený jazyk dotaz
+            limit: Maximální počet výsledků
+            rerank: Přeřadit kandidáty cross-encoderem (None = podle settings.RERANKER_ENABLED)
             
-        Returns:
-            Seznam relevantních úryvků
+        Yields:
+            Relevantní dokumenty s vysvětlením od nejlepšího
         """
-        snippets = []
-        query_words = query.lower().split()
-        content_lower = content.lower()
+        reranker = get_reranker(force=rerank is True) if rerank is not False else None
+        key = cache_key("semantic", query, limit, reranker is not None)
+        cached = self.search_cache.get_results(key)
+        if cached is not None:
+            for result in cached:
+                yield dict(result)
+            return
+        generation = self.search_cache.generation
         
-        # Najde pozice klíčových slov
-        positions = []
-        for word in query_words:
-            pos = 0
-            while True:
-                pos = content_lower.find(word, pos)
-                if pos == -1:
-                    break
-                positions.append(pos)
-                pos += 1
+        # Základní sémantické vyhledávání (pro reranker víc kandidátů)
+        candidate_limit = max(limit, settings.RERANK_TOP_N) if reranker is not None else limit
+        results = self.search_documents(query, limit=candidate_limit)
         
-        # Vytvoří úryvky kolem nalezených pozic
-        for pos in positions[:3]:  # Maximálně 3 úryvky
-            start = max(0, pos - snippet_length // 2)
-            end = min(len(content), pos + snippet_length // 2)
-            snippet = content[start:end]
-            
-            # Přidá "..." pokud je úryvek oříznutý
-            if start > 0:
-                snippet = "..." + snippet
-            if end < len(content):
-                snippet = snippet + "..."
-            
-            snippets.append(snippet)
-        
-        return snippets
-    
-    def get_search_suggestions(self, query: str, limit: int = 5) -> List[str]:
-        """
-        Generuje návrhy pro vyhledávání na základě sémantické analýzy
+        if reranker is not None:
+            results = reranker.rerank(
+                query, results,
+                top_n=settings.RERANK_TOP_N,
+                budget_ms=settings.RERANK_BUDGET_MS
+            )
+        else:
+            # Seřadí podle relevance
+            results.sort(key=lambda x: x['relevance_score'], reverse=True)
         
-        Args:
-            query: Částečný dotaz
-            limit: Maximální počet návrhů
-            
-        Returns:
-            Seznam návrhů
-        """
-        try:
-            # Najde podobné dokumenty
-            results = self.search_documents(query, limit=limit)
-            
-            suggestions = []
-            for result in results:
-                # Extrahuje klíčová slova z názvu souboru
-                filename_words = result['file_name'].replace('.', ' ').replace('_', ' ').split()
-                suggestions.extend([word.lower() for word in filename_words if len(word) > 2])
-                
-                # Extrahuje klíčová slova z obsahu (prvních 1000 znaků)
-                content_preview = result['content_text'][:1000]
-                content_words = content_preview.split()
-                suggestions.extend([word.lower() for word in content_words if len(word) > 3])
-            
-            # Odstraní duplicity a vrátí nejčastější
-            from collections import Counter
-            word_counts = Counter(suggestions)
-            return [word for word, count in word_counts.most_common(limit)]
+        # Analýza kontextu a relevance (jeden průchod textem chunku na výsledek)
+        enhanced_results = []
+        for result in results[:limit]:
+            content = result['content_text'] or ''
+            snippets, matches = find_snippets(content, query)
             
-        except Exception as e:
-            logger.error(f"Chyba při generování návrhů: {e}")
-            return []
+            enhanced_result = {
+                **result,
+                'relevance_analysis': analyze_relevance(query, content, result['file_name'], matches),
+                'context_snippets': [format_snippet(snippet, len(content)) for snippet in snippets],
+                'snippets': snippets
+            }
+            enhanced_results.append(enhanced_result)
+            yield dict(enhanced_result)
+        
+        self.search_cache.put_results(key, enhanced_results, generation)
     
     def clear_index(self) -> bool:
         """
@@ -358,7 +446,10 @@ class AISearchService:
         """
         try:
             if self.collection:
-                self.collection.delete(where={})
+                self.collection.reset()
+                if self.quantized_index is not None:
+                    self.quantized_index.clear()
+                self.search_cache.bump()
                 logger.info("AI index vyčištěn")
             return True
         except Exception as e:
@@ -380,7 +471,11 @@ class AISearchService:
             return {
                 "total_documents": count,
                 "model_name": self.model_name,
-                "chroma_persist_directory": self.chroma_persist_directory
+                "embedding_backend": self.embedding_model.name if self.embedding_model else None,
+                "vector_db": self.collection.backend,
+                "chroma_persist_directory": self.chroma_persist_directory,
+                "quantization": self.quantized_index.mode if self.quantized_index is not None else "none",
+                "search_cache": self.search_cache.get_stats()
             }
         except Exception as e:
             logger.error(f"Chyba při získávání statistik: {e}")
@@ -0,0 +1,260 @@
+import logging
+from collections import defaultdict
+from functools import lru_cache
+from typing import List, Dict, Optional, Any, NamedTuple, Tuple
+
+from ..config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Odhad počtu znaků na token bez tokenizeru
+CHARS_PER_TOKEN = 4
+# Zbytek rozpočtu menší než toto se už nevyplňuje zkráceným chunkem
+MIN_PARTIAL_TOKENS = 32
+
+@lru_cache(maxsize=4)
+def get_tokenizer(name: str) -> Optional[Any]:
+    """
+    Sdílený HuggingFace tokenizer (načte se jednou pro každý název)
+
+    Returns:
+        Tokenizer, nebo None (prázdný název nebo chyba načtení - počítá se odhadem)
+    """
+    if not name:
+        return None
+    try:
+        from transformers import AutoTokenizer
+        tokenizer = AutoTokenizer.from_pretrained(name)
+        logger.info(f"Tokenizer pro kontext LLM načten: {name}")
+        return tokenizer
+    except Exception as e:
+        logger.warning(f"Tokenizer {name} se nepodařilo načíst, počítám tokeny odhadem: {e}")
+        return None
+
+class ContextPassage(NamedTuple):
+    """Souvislý úsek dokumentu v kontextu odpovědi"""
+    file_path: str
+    file_name: str
+    chunk_index: Optional[int]  # První chunk úseku
+    char_start: Optional[int]
+    char_end: Optional[int]
+    text: str
+    score: float  # Skóre nejlepšího chunku úseku
+
+class PackedContext(NamedTuple):
+    """Vybrané úseky a jejich velikost v tokenech"""
+    passages: List[ContextPassage]
+    tokens: int
+    budget: int
+
+class ContextBuilder:
+    """
+    Sestavení kontextu pro LLM v rozpočtu tokenů
+
+    Chunky se berou od nejvyšší relevance. Části, které se překrývají s už
+    vybraným chunkem stejného souboru (překryv sousedních chunků), se
+    vynechají podle char_start/char_end, takže se žádný text neopakuje.
+    Chunky se přidávají, dokud se vejdou; poslední se zkrátí na zbytek
+    rozpočtu. Navazující úseky jednoho souboru se spojí do jednoho.
+    """
+
+    def __init__(self, token_budget: Optional[int] = None, tokenizer_name: Optional[str] = None):
+        """
+        Args:
+            token_budget: Rozpočet tokenů kontextu (výchozí settings.LLM_CONTEXT_TOKEN_BUDGET)
+            tokenizer_name: HuggingFace tokenizer odpovídající LLM (výchozí settings.LLM_TOKENIZER)
+        """
+        self.token_budget = token_budget or settings.LLM_CONTEXT_TOKEN_BUDGET
+        self.tokenizer_name = settings.LLM_TOKENIZER if tokenizer_name is None else tokenizer_name
+        # Chunky se v kontextech opakují - počty tokenů se pamatují
+        self.count_tokens = lru_cache(maxsize=4096)(self._count_tokens)
+
+    @property
+    def tokenizer(self) -> Optional[Any]:
+        return get_tokenizer(self.tokenizer_name)
+
+    def _count_tokens(self, text: str) -> int:
+        """Počet tokenů textu"""
+        tokenizer = self.tokenizer
+        if tokenizer is not None:
+            return len(tokenizer.encode(text, add_special_tokens=False))
+        return -(-len(text) // CHARS_PER_TOKEN)
+
+    def truncate(self, text: str, max_tokens: int, from_end: bool = False) -> str:
+        """
+        Část textu s nejvýše max_tokens tokeny (řez na hranici slova)
+
+        Args:
+            text: Text
+            max_tokens: Maximální počet tokenů
+            from_end: Ponechat konec textu místo začátku
+        """
+        if max_tokens <= 0:
+            return ""
+        if self.count_tokens(text) <= max_tokens:
+            return text
+
+        tokenizer = self.tokenizer
+        if tokenizer is not None and getattr(tokenizer, "is_fast", False):
+            offsets = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+            size = len(text) - offsets[-max_tokens][0] if from_end else offsets[max_tokens - 1][1]
+        else:
+            size = max_tokens * CHARS_PER_TOKEN
+
+        while size > 0:
+            if from_end:
+                space = text.find(" ", len(text) - size)
+                if space != -1 and len(text) - space > size // 2:
+                    size = len(text) - space
+                cut = text[len(text) - size:].lstrip()
+            else:
+                space = text.rfind(" ", 0, size)
+                if space > size // 2:
+                    size = space
+                cut = text[:size].rstrip()
+            if self.count_tokens(cut) <= max_tokens:
+                return cut
+            size = size * 9 // 10
+        return ""
+
+    @staticmethod
+    def _uncovered(start: int, end: int, covered: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """Části rozsahu [start, end), které nepokrývá žádný z vybraných rozsahů"""
+        pieces = [(start, end)]
+        for covered_start, covered_end in covered:
+            remaining = []
+            for piece_start, piece_end in pieces:
+                if covered_end <= piece_start or covered_start >= piece_end:
+                    remaining.append((piece_start, piece_end))
+                    continue
+                if piece_start < covered_start:
+                    remaining.append((piece_start, covered_start))
+                if covered_end < piece_end:
+                    remaining.append((covered_end, piece_end))
+            pieces = remaining
+        return pieces
+
+    @staticmethod
+    def header(number: int, file_name: str) -> str:
+        """Hlavička úseku v promptu (číslo odpovídá id citace)"""
+        return f"Dokument {number} ({file_name}):\n"
+
+    @staticmethod
+    def _format_passage(number: int, passage: ContextPassage) -> str:
+        return f"{ContextBuilder.header(number, passage.file_name)}{passage.text}\n\n"
+
+    def build(self, chunks: List[Dict]) -> PackedContext:
+        """
+        Vybere úseky chunků do rozpočtu tokenů
+
+        Args:
+            chunks: Chunky nebo dokumenty s content_text a volitelně file_path,
+                file_name, chunk_index, char_start, char_end, relevance_score
+
+        Returns:
+            Úseky seřazené podle souborů (soubor s nejlepším chunkem první)
+            a podle pozice v souboru
+        """
+        # Stabilní řazení - dokumenty bez skóre zůstanou v původním pořadí
+        ranked = sorted(chunks, key=lambda chunk: chunk.get('relevance_score') or 0.0, reverse=True)
+
+        covered: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        selected: List[ContextPassage] = []
+        used = 0
+
+        for chunk in ranked:
+            text = chunk.get('content_text') or ''
+            file_name = chunk.get('file_name') or ''
+            file_path = chunk.get('file_path') or file_name
+            start, end = chunk.get('char_start'), chunk.get('char_end')
+            score = float(chunk.get('relevance_score') or 0.0)
+
+            # Bez offsetů (např. dokumenty od klienta) se překryv nezjišťuje
+            if start is None or end is None or end - start != len(text):
+                pieces = [(None, None, text)]
+            else:
+                pieces = [
+                    (piece_start, piece_end, text[piece_start - start:piece_end - start])
+                    for piece_start, piece_end in self._uncovered(start, end, covered[file_path])
+                ]
+
+            for piece_start, piece_end, piece_text in pieces:
+                stripped = piece_text.strip()
+                if not stripped:
+                    continue
+                if piece_start is not None:
+                    piece_start += len(piece_text) - len(piece_text.lstrip())
+                    piece_end = piece_start + len(stripped)
+                piece_text = stripped
+                # Hlavička a oddělovač se počítají za každý úsek (po spojení úseků je kontext spíš kratší)
+                header_tokens = self.count_tokens(self.header(len(selected) + 1, file_name) + "\n\n")
+                tokens = header_tokens + self.count_tokens(piece_text)
+                remaining = self.token_budget - used
+
+                if tokens > remaining:
+                    if remaining - header_tokens < MIN_PARTIAL_TOKENS:
+                        continue
+                    # Úsek před už vybraným textem si nechá konec, aby na něj navazoval
+                    from_end = piece_end is not None and any(
+                        covered_start == piece_end or covered_start == piece_end + 1
+                        for covered_start, _ in covered[file_path]
+                    )
+                    piece_text = self.truncate(piece_text, remaining - header_tokens, from_end)
+                    if not piece_text:
+                        continue
+                    tokens = header_tokens + self.count_tokens(piece_text)
+                    if piece_start is not None:
+                        if from_end:
+                            piece_start = piece_end - len(piece_text)
+                        else:
+                            piece_end = piece_start + len(piece_text)
+
+                selected.append(ContextPassage(
+                    file_path, file_name, chunk.get('chunk_index'),
+                    piece_start, piece_end, piece_text, score
+                ))
+                used += tokens
+                if piece_start is not None:
+                    covered[file_path].append((piece_start, piece_end))
+
+            if self.token_budget - used < MIN_PARTIAL_TOKENS:
+                break
+
+        return PackedContext(self._merge(selected), used, self.token_budget)
+
+    @staticmethod
+    def _merge(passages: List[ContextPassage]) -> List[ContextPassage]:
+        """Seřadí úseky podle souborů a pozice a spojí navazující úseky jednoho souboru"""
+        best: Dict[str, float] = {}
+        order: Dict[str, int] = {}
+        for passage in passages:
+            order.setdefault(passage.file_path, len(order))
+            best[passage.file_path] = max(best.get(passage.file_path, passage.score), passage.score)
+
+        passages = sorted(passages, key=lambda passage: (
+            -best[passage.file_path], order[passage.file_path],
+            passage.char_start if passage.char_start is not None else float('inf')
+        ))
+
+        merged: List[ContextPassage] = []
+        for passage in passages:
+            previous = merged[-1] if merged else None
+            if (previous is not None and previous.file_path == passage.file_path
+                    and previous.char_end is not None and passage.char_start is not None
+                    and passage.char_start - previous.char_end <= 1):
+                separator = " " if passage.char_start > previous.char_end else ""
+                merged[-1] = previous._replace(
+                    char_end=passage.char_end,
+                    text=previous.text + separator + passage.text,
+                    score=max(previous.score, passage.score)
+                )
+            else:
+                merged.append(passage)
+        return merged
+
+    def format(self, packed: PackedContext) -> str:
+        """Kontext do promptu"""
+        return "".join(
+            self._format_passage(number, passage)
+            for number, passage in enumerate(packed.passages, 1)
+        )
@@ -0,0 +1,126 @@
+from typing import List, Dict, Optional, Iterator, NamedTuple
+
+from .text_chunker import TextChunk, TextChunker
+
+class ChunkRecord(NamedTuple):
+    """Jeden chunk dokumentu připravený pro vektorovou DB"""
+    id: str
+    embedding_text: str  # Text pro embedding (název souboru + chunk)
+    document: str  # Text chunku uložený ve vektorové DB
+    metadata: Dict
+
+def document_id(doc: Dict) -> str:
+    """ID dokumentu ve vektorové DB (stejné jako dřívější ID jednoho vektoru na soubor)"""
+    return f"doc_{doc['id']}"
+
+def iter_chunk_records(documents: List[Dict], chunker: TextChunker) -> Iterator[ChunkRecord]:
+    """
+    Rozdělí dokumenty na chunky
+
+    Args:
+        documents: Dokumenty s klíči id, file_path, file_name, content_text,
+            file_type, watched_item_name a volitelně file_size, content_hash
+        chunker: Chunker pro dělení obsahu
+
+    Yields:
+        Chunky všech dokumentů v pořadí dokumentů. Dokument bez textu má jeden
+        prázdný chunk s názvem souboru - první chunk nese content_hash, podle
+        kterého synchronizace pozná už zaindexovaný dokument.
+    """
+    for doc in documents:
+        chunks = chunker.split(doc['content_text'] or '') or [TextChunk('', 0, 0)]
+        for index, chunk in enumerate(chunks):
+            yield ChunkRecord(
+                id=f"{document_id(doc)}_{index}",
+                embedding_text=f"{doc['file_name']}\n\n{chunk.text}" if chunk.text else doc['file_name'],
+                document=chunk.text,
+                metadata={
+                    'doc_id': doc['id'],
+                    'chunk_index': index,
+                    'total_chunks': len(chunks),
+                    'char_start': chunk.start,
+                    'char_end': chunk.end,
+                    'content_hash': doc.get('content_hash') or '',
+                    'file_path': doc['file_path'],
+                    'file_name': doc['file_name'],
+                    'file_type': doc['file_type'],
+                    'watched_item_name': doc['watched_item_name'],
+                    'file_size': doc.get('file_size') or 0
+                }
+            )
+
+def find_stale_chunk_ids(collection, documents: List[Dict], chunk_counts: Dict[int, int]) -> List[str]:
+    """
+    Najde záznamy dokumentů, které po přeindexování přebývají
+
+    Jsou to chunky za novým koncem dokumentu a vektory celých souborů
+    z doby před dělením na chunky.
+
+    Args:
+        collection: Vektorové úložiště
+        documents: Přeindexované dokumenty
+        chunk_counts: ID dokumentu -> nový počet chunků
+
+    Returns:
+        ID záznamů ke smazání
+    """
+    doc_ids = [doc['id'] for doc in documents]
+    if not doc_ids:
+        return []
+
+    existing = collection.get(where={'doc_id': {'$in': doc_ids}}, include=['metadatas'])
+    stale = [
+        chunk_id for chunk_id, metadata in zip(existing['ids'], existing['metadatas'])
+        if metadata.get('chunk_index', 0) >= chunk_counts.get(metadata.get('doc_id'), 0)
+    ]
+
+    legacy = collection.get(ids=[document_id(doc) for doc in documents], include=[])
+    return stale + list(legacy['ids'])
+
+def find_document_chunk_ids(collection, doc_ids: List[int]) -> List[str]:
+    """
+    Najde všechny záznamy dokumentů (chunky i vektory celých souborů)
+
+    Args:
+        collection: Vektorové úložiště
+        doc_ids: ID dokumentů
+
+    Returns:
+        ID záznamů ve vektorovém úložišti
+    """
+    if not doc_ids:
+        return []
+    chunks = collection.get(where={'doc_id': {'$in': doc_ids}}, include=[])
+    legacy = collection.get(ids=[f"doc_{doc_id}" for doc_id in doc_ids], include=[])
+    return list(chunks['ids']) + list(legacy['ids'])
+
+def aggregate_by_file(chunk_results: List[Dict], limit: Optional[int] = None) -> List[Dict]:
+    """
+    Spojí výsledky chunků do výsledků souborů
+
+    Skóre souboru je skóre jeho nejlepšího chunku, jehož text je v content_text.
+    Všechny nalezené chunky souboru jsou v matched_chunks.
+
+    Args:
+        chunk_results: Výsledky chunků seřazené od nejlepšího
+        limit: Maximální počet souborů
+
+    Returns:
+        Výsledky souborů seřazené od nejlepšího
+    """
+    files: Dict[str, Dict] = {}
+    for result in chunk_results:
+        matched = {
+            'chunk_index': result.get('chunk_index'),
+            'char_start': result.get('char_start'),
+            'char_end': result.get('char_end'),
+            'relevance_score': result['relevance_score']
+        }
+        current = files.get(result['file_path'])
+        if current is None:
+            files[result['file_path']] = {**result, 'matched_chunks': [matched]}
+        else:
+            current['matched_chunks'].append(matched)
+
+    aggregated = list(files.values())
+    return aggregated[:limit] if limit is not None else aggregated
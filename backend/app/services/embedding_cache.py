@@ -0,0 +1,245 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+
+from ..config.settings import settings
+
+def text_hash(text: str) -> str:
+    """SHA-256 hash textu chunku"""
+    return hashlib.sha256(text.encode("utf-8", errors="surrogatepass")).hexdigest()
+
+class EmbeddingCache:
+    """
+    Perzistentní cache embeddingů v SQLite
+
+    Klíčem je (model_id, sha256(text)), hodnotou float32 vektor. Velikost je
+    omezena v bajtech, při překročení se mažou nejdéle nepoužité záznamy (LRU).
+    """
+
+    def __init__(self, db_path: str, max_bytes: int):
+        """
+        Args:
+            db_path: Cesta k SQLite souboru cache
+            max_bytes: Maximální celková velikost uložených vektorů
+        """
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model_id TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model_id, text_hash)
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used)')
+        self._conn.commit()
+
+        self.total_bytes = self._conn.execute(
+            'SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings'
+        ).fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, model_id: str, hashes: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Načtení vektorů podle hashů
+
+        Args:
+            model_id: Identifikátor modelu
+            hashes: Hashe textů
+
+        Returns:
+            Slovník hash -> vektor pro nalezené záznamy
+        """
+        found: Dict[str, np.ndarray] = {}
+        unique = list(dict.fromkeys(hashes))
+        if not unique:
+            return found
+
+        with self._lock:
+            # SQLite má limit počtu parametrů v dotazu
+            for start in range(0, len(unique), 500):
+                batch = unique[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f'SELECT text_hash, vector FROM embeddings WHERE model_id = ? AND text_hash IN ({placeholders})',
+                    [model_id, *batch]
+                ).fetchall()
+                for row_hash, blob in rows:
+                    found[row_hash] = np.frombuffer(blob, dtype=np.float32)
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    'UPDATE embeddings SET last_used = ? WHERE model_id = ? AND text_hash = ?',
+                    [(now, model_id, row_hash) for row_hash in found]
+                )
+                self._conn.commit()
+
+            self.hits += len(found)
+            self.misses += len(unique) - len(found)
+        return found
+
+    def put_many(self, model_id: str, items: List[Tuple[str, np.ndarray]]):
+        """
+        Uložení vektorů
+
+        Args:
+            model_id: Identifikátor modelu
+            items: Dvojice (hash, vektor)
+        """
+        if not items:
+            return
+
+        now = time.time()
+        rows = [
+            (model_id, row_hash, np.asarray(vector, dtype=np.float32).tobytes(), now)
+            for row_hash, vector in items
+        ]
+
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO embeddings (model_id, text_hash, vector, last_used) VALUES (?, ?, ?, ?)',
+                rows
+            )
+            inserted = self._conn.total_changes - before
+            self._conn.commit()
+
+            if inserted:
+                self.total_bytes += inserted * len(rows[0][2])
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Smazání nejdéle nepoužitých záznamů na 90 % limitu"""
+        target = int(self.max_bytes * 0.9)
+        while self.total_bytes > target:
+            rows = self._conn.execute(
+                'SELECT model_id, text_hash, LENGTH(vector) FROM embeddings ORDER BY last_used LIMIT 1000'
+            ).fetchall()
+            if not rows:
+                self.total_bytes = 0
+                break
+
+            removed = []
+            for model_id, row_hash, size in rows:
+                removed.append((model_id, row_hash))
+                self.total_bytes -= size
+                if self.total_bytes <= target:
+                    break
+
+            self._conn.executemany('DELETE FROM embeddings WHERE model_id = ? AND text_hash = ?', removed)
+        self._conn.commit()
+
+    def clear(self):
+        """Smazání celé cache"""
+        with self._lock:
+            self._conn.execute('DELETE FROM embeddings')
+            self._conn.commit()
+            self.total_bytes = 0
+
+    def get_stats(self) -> Dict:
+        """Statistiky cache"""
+        with self._lock:
+            count = self._conn.execute('SELECT COUNT(*) FROM embeddings').fetchone()[0]
+        return {
+            "entries": count,
+            "size_mb": round(self.total_bytes / (1024**2), 2),
+            "max_size_mb": round(self.max_bytes / (1024**2), 2),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+    def get_or_compute(self, model_id: str, texts: List[str], compute) -> np.ndarray:
+        """
+        Vrátí embeddings z cache a spočítá jen chybějící
+
+        Args:
+            model_id: Identifikátor modelu
+            texts: Seznam textů
+            compute: Funkce List[str] -> matice embeddingů pro chybějící texty
+
+        Returns:
+            Matice (len(texts), dim) float32 ve stejném pořadí jako texts
+        """
+        hashes, cached, missing = self._lookup(model_id, texts)
+        if missing:
+            self._store(model_id, cached, missing, compute(list(missing.values())))
+        return self._assemble(texts, hashes, cached)
+
+    async def get_or_compute_async(self, model_id: str, texts: List[str], compute) -> np.ndarray:
+        """
+        Jako get_or_compute, ale s asynchronním compute
+
+        Čtení a zápis SQLite běží v executoru, aby neblokovaly event loop.
+
+        Args:
+            model_id: Identifikátor modelu
+            texts: Seznam textů
+            compute: Korutinová funkce List[str] -> embeddingy chybějících textů
+        """
+        loop = asyncio.get_running_loop()
+        hashes, cached, missing = await loop.run_in_executor(None, self._lookup, model_id, texts)
+        if missing:
+            computed = await compute(list(missing.values()))
+            await loop.run_in_executor(None, self._store, model_id, cached, missing, computed)
+        return self._assemble(texts, hashes, cached)
+
+    def _lookup(self, model_id: str, texts: List[str]) -> Tuple[List[str], Dict[str, np.ndarray], Dict[str, str]]:
+        """Hashe textů, embeddingy nalezené v cache a chybějící texty podle hashe"""
+        hashes = [text_hash(text) for text in texts]
+        cached = self.get_many(model_id, hashes)
+
+        # Každý chybějící text se počítá jen jednou, i když se opakuje
+        missing: Dict[str, str] = {}
+        for row_hash, text in zip(hashes, texts):
+            if row_hash not in cached and row_hash not in missing:
+                missing[row_hash] = text
+        return hashes, cached, missing
+
+    def _store(self, model_id: str, cached: Dict[str, np.ndarray], missing: Dict[str, str], computed) -> None:
+        """Uloží nově spočítané embeddingy do cache a doplní je do cached"""
+        computed = np.asarray(computed, dtype=np.float32)
+        new_items = list(zip(missing.keys(), computed))
+        self.put_many(model_id, new_items)
+        cached.update(new_items)
+
+    @staticmethod
+    def _assemble(texts: List[str], hashes: List[str], cached: Dict[str, np.ndarray]) -> np.ndarray:
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.stack([cached[row_hash] for row_hash in hashes])
+
+_cache: Optional[EmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """Sdílená cache embeddingů (None, pokud je vypnutá)"""
+    global _cache
+    if not settings.EMBEDDING_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = EmbeddingCache(
+                settings.EMBEDDING_CACHE_PATH,
+                max_bytes=settings.EMBEDDING_CACHE_MAX_MB * 1024**2
+            )
+        return _cache
@@ -0,0 +1,309 @@
+import json
+import os
+import threading
+from typing import List, Dict, Optional, Any, Tuple
+
+import numpy as np
+
+from ..config.settings import settings
+from .embedding_cache import EmbeddingCache, get_embedding_cache
+
+EMBEDDING_BACKENDS = ("sentence-transformers", "onnx")
+
+def resolve_model_id(model_id: str) -> str:
+    """Doplnění krátkých názvů sentence-transformers modelů na HuggingFace ID"""
+    if "/" in model_id or os.path.isdir(model_id):
+        return model_id
+    return f"sentence-transformers/{model_id}"
+
+class EmbeddingBackend:
+    """Společné rozhraní embedding backendů"""
+
+    name = "base"
+
+    def __init__(self, model_id: str):
+        self.model_id = model_id
+        self.tokenizer: Any = None
+        self.max_seq_length: Optional[int] = None
+
+    @property
+    def cache_key(self) -> str:
+        """Identifikátor pro cache embeddingů (různé backendy dávají různé vektory)"""
+        return f"{self.name}:{self.model_id}"
+
+    @property
+    def dimension(self) -> int:
+        raise NotImplementedError
+
+    def encode(self, texts: List[str], batch_size: Optional[int] = None) -> np.ndarray:
+        """
+        Vytvoří embeddings
+
+        Args:
+            texts: Seznam textů
+            batch_size: Velikost dávky (výchozí settings.EMBEDDING_BATCH_SIZE)
+
+        Returns:
+            Matice (len(texts), dimension) float32
+        """
+        raise NotImplementedError
+
+class SentenceTransformerBackend(EmbeddingBackend):
+    """PyTorch backend přes sentence-transformers"""
+
+    name = "sentence-transformers"
+
+    def __init__(self, model_id: str):
+        super().__init__(model_id)
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_id)
+        self.tokenizer = self.model.tokenizer
+        self.max_seq_length = self.model.max_seq_length
+
+    @property
+    def dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts: List[str], batch_size: Optional[int] = None) -> np.ndarray:
+        embeddings = self.model.encode(
+            texts,
+            batch_size=batch_size or settings.EMBEDDING_BATCH_SIZE,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        )
+        return embeddings.astype(np.float32, copy=False)
+
+class OnnxEmbeddingBackend(EmbeddingBackend):
+    """
+    CPU backend přes ONNX Runtime
+
+    Model se při prvním použití exportuje do ONNX (torch.onnx) a volitelně
+    dynamicky kvantizuje na int8. Pooling a normalizace se čtou z konfigurace
+    sentence-transformers modelu, aby výstup odpovídal PyTorch backendu.
+    """
+
+    name = "onnx"
+
+    def __init__(self, model_id: str, quantize: bool = True, intra_op_threads: int = 0,
+                 cache_dir: Optional[str] = None):
+        """
+        Args:
+            model_id: HuggingFace ID nebo lokální cesta k modelu
+            quantize: Dynamická int8 kvantizace vah
+            intra_op_threads: Počet vláken pro operace (0 = podle ONNX Runtime)
+            cache_dir: Adresář pro exportované modely
+        """
+        super().__init__(model_id)
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        self.hf_model_id = resolve_model_id(model_id)
+        self.quantize = quantize
+        self.tokenizer = AutoTokenizer.from_pretrained(self.hf_model_id)
+        self.pooling, self.normalize, self.max_seq_length = self._load_st_config()
+
+        export_dir = os.path.join(cache_dir or settings.ONNX_CACHE_DIR, self.hf_model_id.replace("/", "__"))
+        model_path = self._ensure_onnx_model(export_dir)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads > 0:
+            options.intra_op_num_threads = intra_op_threads
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_names = {node.name for node in self.session.get_inputs()}
+        self._dimension = self.session.get_outputs()[0].shape[-1]
+
+    @property
+    def cache_key(self) -> str:
+        return f"{self.name}{'-int8' if self.quantize else ''}:{self.model_id}"
+
+    @property
+    def dimension(self) -> int:
+        return self._dimension
+
+    def _load_st_config(self) -> Tuple[str, bool, int]:
+        """Načtení poolingu, normalizace a max. délky z konfigurace sentence-transformers"""
+        pooling, normalize, max_seq_length = "mean", False, 512
+        try:
+            from huggingface_hub import hf_hub_download
+
+            def load_json(filename: str) -> Dict:
+                if os.path.isdir(self.hf_model_id):
+                    path = os.path.join(self.hf_model_id, filename)
+                else:
+                    path = hf_hub_download(self.hf_model_id, filename)
+                with open(path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+
+            modules = load_json("modules.json")
+            for module in modules:
+                module_type = module.get("type", "")
+                if module_type.endswith("Normalize"):
+                    normalize = True
+                elif module_type.endswith("Pooling"):
+                    pooling_config = load_json(f"{module['path']}/config.json")
+                    if pooling_config.get("pooling_mode_cls_token"):
+                        pooling = "cls"
+                    elif pooling_config.get("pooling_mode_max_tokens"):
+                        pooling = "max"
+            max_seq_length = load_json("sentence_bert_config.json").get("max_seq_length", max_seq_length)
+        except Exception as e:
+            print(f"⚠️ Konfigurace sentence-transformers nenalezena ({e}), použije se mean pooling")
+
+        return pooling, normalize, min(max_seq_length, self.tokenizer.model_max_length)
+
+    def _ensure_onnx_model(self, export_dir: str) -> str:
+        """Export modelu do ONNX a kvantizace (jen poprvé, pak z cache)"""
+        os.makedirs(export_dir, exist_ok=True)
+        fp32_path = os.path.join(export_dir, "model.onnx")
+        int8_path = os.path.join(export_dir, "model_int8.onnx")
+
+        if not os.path.exists(fp32_path):
+            import torch
+            from transformers import AutoModel
+
+            print(f"🔄 Exportuji {self.hf_model_id} do ONNX...")
+            model = AutoModel.from_pretrained(self.hf_model_id)
+            model.eval()
+            sample = self.tokenizer(["export"], return_tensors="pt")
+            input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+            dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+            dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+            with torch.no_grad():
+                torch.onnx.export(
+                    model,
+                    tuple(sample[name] for name in input_names),
+                    fp32_path,
+                    input_names=input_names,
+                    output_names=["last_hidden_state"],
+                    dynamic_axes=dynamic_axes,
+                    opset_version=14
+                )
+
+        if not self.quantize:
+            return fp32_path
+
+        if not os.path.exists(int8_path):
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+
+            print(f"🔄 Kvantizuji {self.hf_model_id} na int8...")
+            quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+
+        return int8_path
+
+    def encode(self, texts: List[str], batch_size: Optional[int] = None) -> np.ndarray:
+        if not texts:
+            return np.empty((0, self.dimension), dtype=np.float32)
+
+        batch_size = batch_size or settings.EMBEDDING_BATCH_SIZE
+        # Řazení podle délky minimalizuje padding v dávkách
+        order = np.argsort([-len(text) for text in texts])
+        result = np.empty((len(texts), self.dimension), dtype=np.float32)
+
+        for start in range(0, len(texts), batch_size):
+            batch_idx = order[start:start + batch_size]
+            encoded = self.tokenizer(
+                [texts[i] for i in batch_idx],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np"
+            )
+            inputs = {name: encoded[name].astype(np.int64) for name in self.input_names if name in encoded}
+            hidden = self.session.run(None, inputs)[0]
+            result[batch_idx] = self._pool(hidden, encoded["attention_mask"])
+
+        if self.normalize:
+            norms = np.linalg.norm(result, axis=1, keepdims=True)
+            result /= np.maximum(norms, 1e-12)
+        return result
+
+    def _pool(self, hidden: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        if self.pooling == "cls":
+            return hidden[:, 0]
+        mask = attention_mask[..., None].astype(np.float32)
+        if self.pooling == "max":
+            return np.where(mask > 0, hidden, -1e9).max(axis=1)
+        return (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+
+class CachedEmbeddingBackend(EmbeddingBackend):
+    """Backend, který před výpočtem hledá embeddings v perzistentní cache"""
+
+    def __init__(self, backend: EmbeddingBackend, cache: EmbeddingCache):
+        super().__init__(backend.model_id)
+        self.backend = backend
+        self.cache = cache
+        self.name = backend.name
+        self.tokenizer = backend.tokenizer
+        self.max_seq_length = backend.max_seq_length
+
+    @property
+    def cache_key(self) -> str:
+        return self.backend.cache_key
+
+    @property
+    def dimension(self) -> int:
+        return self.backend.dimension
+
+    def encode(self, texts: List[str], batch_size: Optional[int] = None) -> np.ndarray:
+        if not texts:
+            return self.backend.encode(texts, batch_size=batch_size)
+        return self.cache.get_or_compute(
+            self.cache_key,
+            texts,
+            lambda missing: self.backend.encode(missing, batch_size=batch_size)
+        )
+
+def uncached_backend(backend: EmbeddingBackend) -> EmbeddingBackend:
+    """
+    Backend bez perzistentní cache pro embeddingy dotazů
+
+    Dotazy jsou jednorázové texty - v cache chunků by jen přidaly zápis
+    do SQLite na cestu vyhledávání a vytlačily z ní embeddingy chunků.
+    Opakované dotazy pokrývá LRU cache v paměti (SearchCache).
+    """
+    if isinstance(backend, CachedEmbeddingBackend):
+        return backend.backend
+    return backend
+
+_backends: Dict[Tuple[str, str], EmbeddingBackend] = {}
+_backends_lock = threading.Lock()
+
+def create_embedding_backend(model_id: str, backend: Optional[str] = None) -> EmbeddingBackend:
+    """Vytvoření nového backendu (bez sdílení)"""
+    backend = backend or settings.EMBEDDING_BACKEND
+    if backend == "onnx":
+        return OnnxEmbeddingBackend(
+            model_id,
+            quantize=settings.ONNX_QUANTIZE,
+            intra_op_threads=settings.ONNX_INTRA_OP_THREADS
+        )
+    if backend == "sentence-transformers":
+        return SentenceTransformerBackend(model_id)
+    raise ValueError(f"Nepodporovaný embedding backend: {backend}")
+
+def get_embedding_backend(model_id: Optional[str] = None, backend: Optional[str] = None) -> EmbeddingBackend:
+    """
+    Sdílený embedding backend (model se načte jen jednou pro celý proces)
+
+    Args:
+        model_id: Název modelu (výchozí settings.EMBEDDING_MODEL)
+        backend: "sentence-transformers" nebo "onnx" (výchozí settings.EMBEDDING_BACKEND)
+
+    Returns:
+        Instance backendu
+    """
+    model_id = model_id or settings.EMBEDDING_MODEL
+    backend = backend or settings.EMBEDDING_BACKEND
+    key = (backend, model_id)
+
+    with _backends_lock:
+        if key not in _backends:
+            instance = create_embedding_backend(model_id, backend)
+            cache = get_embedding_cache()
+            if cache is not None:
+                instance = CachedEmbeddingBackend(instance, cache)
+            _backends[key] = instance
+        return _backends[key]
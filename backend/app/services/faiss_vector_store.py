@@ -0,0 +1,366 @@
+import json
+import logging
+import os
+import threading
+from typing import List, Dict, Optional
+
+import numpy as np
+
+from ..config.settings import settings
+from .vector_store import (
+    VectorStore, PayloadStore, matches_where, select_payload,
+    DEFAULT_GET_INCLUDE, DEFAULT_QUERY_INCLUDE
+)
+
+logger = logging.getLogger(__name__)
+
+FAISS_INDEX_TYPES = ("hnsw", "ivf", "flat")
+
+class FaissVectorStore(VectorStore):
+    """
+    Vektorové úložiště nad FAISS
+
+    Vektory jsou v FAISS indexu (HNSW, IVF nebo flat) pod celočíselnými ID,
+    dokumenty a metadata v SQLite (PayloadStore). Index lze načíst jako
+    memory-mapped soubor - do RAM se pak stránkuje jen to, co vyhledávání
+    skutečně čte. HNSW neumí mazat, smazané vektory se proto jen označí,
+    vyhledávání je vyřadí selektorem přímo při procházení grafu a při
+    velkém podílu se index přestaví.
+
+    Zápisy se na disk ukládají až ve flush() (jednou za dávku nebo běh
+    indexace), ne po každém upsertu. Payload v SQLite se ukládá hned -
+    záznamy, které po pádu chybí v uloženém indexu, se při načtení smažou,
+    takže se při další synchronizaci zaindexují znovu.
+    """
+
+    backend = "faiss"
+
+    # Při tomto podílu smazaných vektorů se HNSW index přestaví
+    REBUILD_DELETED_RATIO = 0.2
+    # FAISS chce pro trénink IVF aspoň ~39 vektorů na centroid
+    IVF_POINTS_PER_CENTROID = 39
+    # IVF se přetrénuje, když index naroste na tolikanásobek velikosti tréninku
+    IVF_RETRAIN_GROWTH = 4
+
+    def __init__(self, directory: str, index_type: str = "hnsw", mmap: bool = True):
+        """
+        Args:
+            directory: Adresář pro index a payload
+            index_type: "hnsw", "ivf" nebo "flat"
+            mmap: Načíst uložený index jako memory-mapped (jen pro čtení do prvního zápisu)
+        """
+        import faiss
+
+        if index_type not in FAISS_INDEX_TYPES:
+            raise ValueError(f"Nepodporovaný typ FAISS indexu: {index_type}")
+
+        self.faiss = faiss
+        self.directory = directory
+        self.index_type = index_type
+        self.index_path = os.path.join(directory, "index.faiss")
+        self.index = None
+        self.dimension: Optional[int] = None
+        self._read_only = False
+        self._deleted: set = set()
+        self._search_params = None  # Parametry HNSW se selektorem bez smazaných ID
+        self._dirty = False
+        self._lock = threading.RLock()
+
+        os.makedirs(directory, exist_ok=True)
+        self.payload = PayloadStore(os.path.join(directory, "payload.db"))
+
+        if os.path.exists(self.index_path):
+            if mmap:
+                self.index = faiss.read_index(self.index_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+                self._read_only = True
+            else:
+                self.index = faiss.read_index(self.index_path)
+            self.dimension = self.index.d
+            self.index_type = self._detect_index_type()
+            self._apply_search_params()
+            self._load_deleted()
+        self._discard_unsaved_payload()
+
+    @property
+    def _deleted_path(self) -> str:
+        return os.path.join(self.directory, "deleted.npy")
+
+    @property
+    def _state_path(self) -> str:
+        return os.path.join(self.directory, "state.json")
+
+    def _discard_unsaved_payload(self):
+        """Smazání payloadu zapsaného po posledním uložení indexu (pád před flush)"""
+        if self.index is None:
+            saved_max_int_id = 0
+        elif os.path.exists(self._state_path):
+            with open(self._state_path, "r") as f:
+                saved_max_int_id = json.load(f)["max_int_id"]
+        else:
+            # Index uložený starší verzí - payload se bere jako platný
+            return
+        removed = self.payload.remove_after(saved_max_int_id)
+        if removed:
+            logger.warning(f"Smazáno {removed} záznamů payloadu, které nebyly v uloženém indexu")
+
+    def _load_deleted(self):
+        if os.path.exists(self._deleted_path):
+            self._set_deleted(set(np.load(self._deleted_path).tolist()))
+
+    def _set_deleted(self, deleted: set):
+        self._deleted = deleted
+        self._search_params = None
+
+    def _hnsw_search_params(self):
+        """Parametry vyhledávání, které vynechají smazané vektory (None = nic smazaného)"""
+        if not self._deleted:
+            return None
+        if self._search_params is None:
+            faiss = self.faiss
+            deleted = np.array(sorted(self._deleted), dtype=np.int64)
+            batch = faiss.IDSelectorBatch(len(deleted), faiss.swig_ptr(deleted))
+            selector = faiss.IDSelectorNot(batch)
+            params = faiss.SearchParametersHNSW()
+            params.sel = selector
+            params.efSearch = settings.FAISS_HNSW_EF_SEARCH
+            # SWIG nedrží reference na vnořené objekty
+            params.referenced_objects = [batch, selector]
+            self._search_params = params
+        return self._search_params
+
+    def _create_index(self, dimension: int, training_vectors: np.ndarray):
+        """Vytvoření prázdného indexu podle nastavení"""
+        faiss = self.faiss
+        if self.index_type == "hnsw":
+            base = faiss.IndexHNSWFlat(dimension, settings.FAISS_HNSW_M)
+            base.hnsw.efConstruction = settings.FAISS_HNSW_EF_CONSTRUCTION
+        elif self.index_type == "ivf":
+            # Počet seznamů podle velikosti tréninkové sady, při růstu se index přetrénuje
+            nlist = max(1, min(settings.FAISS_IVF_NLIST, len(training_vectors) // self.IVF_POINTS_PER_CENTROID))
+            quantizer = faiss.IndexFlatL2(dimension)
+            base = faiss.IndexIVFFlat(quantizer, dimension, nlist)
+            base.train(training_vectors)
+            # IVF umí vlastní ID, hashtable umožní reconstruct a mazání podle ID
+            base.set_direct_map_type(faiss.DirectMap.Hashtable)
+            self.index = base
+        else:
+            base = faiss.IndexFlatL2(dimension)
+
+        if self.index_type != "ivf":
+            self.index = faiss.IndexIDMap2(base)
+        self.dimension = dimension
+        self._apply_search_params()
+
+    def _base_index(self):
+        """Vnitřní index (pod IndexIDMap2, pokud je použit)"""
+        index = self.faiss.downcast_index(self.index)
+        if hasattr(index, "id_map"):
+            return self.faiss.downcast_index(index.index)
+        return index
+
+    def _detect_index_type(self) -> str:
+        """Typ uloženého indexu (může se lišit od aktuálního nastavení)"""
+        base = self._base_index()
+        if hasattr(base, "hnsw"):
+            return "hnsw"
+        if hasattr(base, "nprobe"):
+            return "ivf"
+        return "flat"
+
+    def _apply_search_params(self):
+        base = self._base_index()
+        if hasattr(base, "hnsw"):
+            base.hnsw.efSearch = settings.FAISS_HNSW_EF_SEARCH
+        if hasattr(base, "nprobe"):
+            base.nprobe = settings.FAISS_IVF_NPROBE
+
+    def _ensure_writable(self):
+        """Memory-mapped index je jen pro čtení - před zápisem se načte do RAM"""
+        if self._read_only:
+            self.index = self.faiss.read_index(self.index_path)
+            self._apply_search_params()
+            self._read_only = False
+
+    def flush(self):
+        """Uložení indexu na disk, pokud se od posledního uložení změnil"""
+        with self._lock:
+            if not self._dirty or self.index is None:
+                return
+            self._maybe_retrain()
+            tmp_path = self.index_path + ".tmp"
+            self.faiss.write_index(self.index, tmp_path)
+            os.replace(tmp_path, self.index_path)
+            np.save(self._deleted_path, np.array(sorted(self._deleted), dtype=np.int64))
+            # Stav až po indexu - payload do max_int_id je v uloženém indexu
+            with open(self._state_path, "w") as f:
+                json.dump({"max_int_id": self.payload.max_int_id()}, f)
+            self._dirty = False
+
+    def _maybe_retrain(self):
+        """
+        Přetrénování IVF indexu po výrazném růstu
+
+        První dávka bývá malá (chunky jednoho souboru) a počet seznamů z ní
+        je malý. Jakmile index naroste na IVF_RETRAIN_GROWTH násobek velikosti
+        tréninku, natrénuje se znovu na všech vektorech - přestavby jsou
+        geometricky řidší, takže celkově jde o lineární práci.
+        """
+        if self.index_type != "ivf" or self.index.ntotal == 0:
+            return
+        nlist = self._base_index().nlist
+        trained_on = nlist * self.IVF_POINTS_PER_CENTROID
+        if nlist >= settings.FAISS_IVF_NLIST or self.index.ntotal < trained_on * self.IVF_RETRAIN_GROWTH:
+            return
+
+        int_ids = np.array(self.payload.all_int_ids(), dtype=np.int64)
+        vectors = np.vstack([self.index.reconstruct(int(int_id)) for int_id in int_ids])
+        self._create_index(self.dimension, vectors)
+        self.index.add_with_ids(vectors, int_ids)
+        logger.info(f"IVF index přetrénován: {nlist} -> {self._base_index().nlist} seznamů ({len(int_ids)} vektorů)")
+
+    def count(self) -> int:
+        return self.payload.count()
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        vectors = np.ascontiguousarray(embeddings, dtype=np.float32)
+        if not len(ids):
+            return
+
+        with self._lock:
+            if self.index is None:
+                self._create_index(vectors.shape[1], vectors)
+            self._ensure_writable()
+
+            # Přepisované záznamy se z indexu odeberou a vloží znovu
+            existing = self.payload.int_ids(list(ids))
+            if existing:
+                self._remove_vectors(list(existing.values()))
+                self.payload.remove(list(existing.values()))
+
+            int_ids = self.payload.insert(list(ids), list(documents), list(metadatas))
+            self.index.add_with_ids(vectors, np.array(int_ids, dtype=np.int64))
+
+            self._maybe_rebuild()
+            self._dirty = True
+
+    def _remove_vectors(self, int_ids: List[int]):
+        if self.index_type == "hnsw":
+            self._set_deleted(self._deleted | set(int_ids))
+        else:
+            ids = np.array(int_ids, dtype=np.int64)
+            if self.index_type == "ivf":
+                # Hashtable direct map maže jen přes IDSelectorArray
+                self.index.remove_ids(self.faiss.IDSelectorArray(len(ids), self.faiss.swig_ptr(ids)))
+            else:
+                self.index.remove_ids(ids)
+
+    def _maybe_rebuild(self):
+        """Přestavba HNSW indexu bez smazaných vektorů"""
+        if not self._deleted or self.index.ntotal == 0:
+            return
+        if len(self._deleted) / self.index.ntotal < self.REBUILD_DELETED_RATIO:
+            return
+
+        id_map = self.faiss.vector_to_array(self.index.id_map)
+        keep = np.array([int_id not in self._deleted for int_id in id_map], dtype=bool)
+        kept_ids = id_map[keep]
+        vectors = np.vstack([self.index.reconstruct(int(int_id)) for int_id in kept_ids]) if len(kept_ids) else None
+
+        self._create_index(self.dimension, vectors if vectors is not None else np.empty((0, self.dimension), dtype=np.float32))
+        if vectors is not None:
+            self.index.add_with_ids(vectors, kept_ids)
+        self._set_deleted(set())
+
+    def get(self, ids=None, where=None, include=DEFAULT_GET_INCLUDE, limit=None, offset=0):
+        rows = select_payload(self.payload, ids, where, limit, offset)
+        result = {"ids": [row[1] for row in rows], "documents": None, "metadatas": None, "embeddings": None}
+        if "documents" in include:
+            result["documents"] = [row[2] for row in rows]
+        if "metadatas" in include:
+            result["metadatas"] = [row[3] for row in rows]
+        if "embeddings" in include:
+            with self._lock:
+                result["embeddings"] = [self.index.reconstruct(int(row[0])).tolist() for row in rows]
+        return result
+
+    def query(self, query_embeddings, n_results=10, where=None, include=DEFAULT_QUERY_INCLUDE):
+        queries = np.ascontiguousarray(query_embeddings, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries.reshape(1, -1)
+
+        result = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        with self._lock:
+            total = 0 if self.index is None else self.index.ntotal
+            if total == 0:
+                for field in result:
+                    result[field] = [[] for _ in range(len(queries))]
+                return result
+
+            # Smazané vektory vyřadí selektor, filtrem vyřazené se kompenzují většími k
+            k = min(total, n_results * 4 if where else n_results)
+            params = self._hnsw_search_params() if self.index_type == "hnsw" else None
+
+            pending = list(range(len(queries)))
+            hits: Dict[int, list] = {}
+            while pending:
+                distances, labels = self.index.search(queries[pending], k, params=params)
+                payload = self.payload.fetch([int(label) for label in np.unique(labels) if label >= 0])
+                retry = []
+                for row, query_index in enumerate(pending):
+                    found = []
+                    for distance, label in zip(distances[row], labels[row]):
+                        item = payload.get(int(label))
+                        if label < 0 or item is None or int(label) in self._deleted:
+                            continue
+                        if not matches_where(item[2], where):
+                            continue
+                        found.append((item, float(distance)))
+                        if len(found) >= n_results:
+                            break
+                    if len(found) < n_results and k < total:
+                        retry.append(query_index)
+                    else:
+                        hits[query_index] = found
+                if not retry:
+                    break
+                pending = retry
+                k = min(total, k * 4)
+
+        for query_index in range(len(queries)):
+            found = hits.get(query_index, [])
+            result["ids"].append([item[0] for item, _ in found])
+            result["documents"].append([item[1] for item, _ in found])
+            result["metadatas"].append([item[2] for item, _ in found])
+            result["distances"].append([distance for _, distance in found])
+
+        for field in ("documents", "metadatas", "distances"):
+            if field not in include:
+                result[field] = None
+        return result
+
+    def delete(self, ids=None, where=None):
+        with self._lock:
+            if ids is None and not where:
+                return
+            rows = select_payload(self.payload, ids, where, None, 0)
+            int_ids = [row[0] for row in rows]
+            if not int_ids or self.index is None:
+                return
+
+            self._ensure_writable()
+            self._remove_vectors(int_ids)
+            self.payload.remove(int_ids)
+            self._maybe_rebuild()
+            self._dirty = True
+
+    def reset(self):
+        with self._lock:
+            self.index = None
+            self.dimension = None
+            self._read_only = False
+            self._set_deleted(set())
+            self._dirty = False
+            self.payload.clear()
+            for path in (self.index_path, self._deleted_path, self._state_path):
+                if os.path.exists(path):
+                    os.remove(path)
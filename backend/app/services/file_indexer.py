@@ -3,10 +3,9 @@ import hashlib
 from pathlib import Path
 from typing import List, Dict, Optional, Generator
 import mimetypes
-import docx
-import PyPDF2
 import io
 from ..models.database import Database
+from .suggestion_index import get_suggestion_index
 
 class FileIndexer:
     def __init__(self, db: Database):
@@ -78,6 +77,7 @@ class FileIndexer:
     def _extract_text_from_pdf(self, file_path: str) -> Optional[str]:
         """Extrahuje text z PDF souboru"""
         try:
+            import PyPDF2
             with open(file_path, 'rb') as file:
                 pdf_reader = PyPDF2.PdfReader(file)
                 text = ""
@@ -91,6 +91,7 @@ class FileIndexer:
     def _extract_text_from_docx(self, file_path: str) -> Optional[str]:
         """Extrahuje text z Word dokumentu"""
         try:
+            import docx
             doc = docx.Document(file_path)
             text = ""
             for paragraph in doc.paragraphs:
@@ -167,6 +168,7 @@ class FileIndexer:
             
             # Dokončí indexování
             self.db.update_indexing_status(watched_item_id, 'completed', 100, total_files, processed_files)
+            get_suggestion_index(self.db).invalidate()
             
             return {
                 'message': f'Indexování dokončeno. Zpracováno {processed_files} souborů.',
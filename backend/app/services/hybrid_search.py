@@ -0,0 +1,269 @@
+import asyncio
+import logging
+from functools import partial
+from typing import List, Dict, Optional, AsyncIterator
+
+from ..config.settings import settings
+from ..models.database import Database, SNIPPET_MATCH_START, SNIPPET_MATCH_END, SNIPPET_ELLIPSIS
+from .ai_search import AISearchService
+from .snippets import find_snippets, format_snippet, parse_marked_snippet
+
+logger = logging.getLogger(__name__)
+
+HYBRID_FUSION_MODES = ("rrf", "weighted")
+
+def semantic_file_id(row: Dict) -> Optional[int]:
+    """ID souboru (indexed_files.id) ze sémantického výsledku (ID ve tvaru doc_<id>)"""
+    prefix, _, file_id = str(row['id']).partition('_')
+    return int(file_id) if prefix == 'doc' and file_id.isdigit() else None
+
+def reciprocal_rank_fusion(rankings: Dict[str, List[str]], k: int = 60) -> Dict[str, float]:
+    """
+    Reciprocal Rank Fusion
+
+    Args:
+        rankings: Název zdroje -> seznam klíčů seřazený od nejlepšího
+        k: Vyhlazovací konstanta (vyšší = menší váha prvních pozic)
+
+    Returns:
+        Klíč -> fúzované skóre
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings.values():
+        for rank, key in enumerate(ranking, start=1):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+    return scores
+
+def weighted_fusion(scored: Dict[str, Dict[str, float]], weights: Dict[str, float]) -> Dict[str, float]:
+    """
+    Vážený součet min-max normalizovaných skóre
+
+    Args:
+        scored: Název zdroje -> {klíč: skóre}
+        weights: Název zdroje -> váha
+
+    Returns:
+        Klíč -> fúzované skóre
+    """
+    fused: Dict[str, float] = {}
+    for source, source_scores in scored.items():
+        if not source_scores:
+            continue
+        low, high = min(source_scores.values()), max(source_scores.values())
+        span = high - low
+        for key, score in source_scores.items():
+            normalized = (score - low) / span if span > 0 else 1.0
+            fused[key] = fused.get(key, 0.0) + weights.get(source, 0.0) * normalized
+    return fused
+
+class HybridSearchService:
+    """
+    Hybridní vyhledávání - BM25 (SQLite FTS5) a vektorové vyhledávání
+    běží souběžně a výsledky se spojí přes RRF nebo vážená skóre
+    """
+
+    def __init__(self, db: Database, ai_service: Optional[AISearchService] = None):
+        """
+        Args:
+            db: Databáze s FTS indexem souborů
+            ai_service: Služba pro sémantické vyhledávání (None = jen lexikální část)
+        """
+        self.db = db
+        self.ai_service = ai_service
+
+    async def search(self, query: str, limit: int = 10,
+                     file_types: Optional[List[str]] = None,
+                     watched_items: Optional[List[str]] = None,
+                     fusion: Optional[str] = None,
+                     semantic_weight: Optional[float] = None) -> List[Dict]:
+        """
+        Vyhledá dokumenty hybridně
+
+        Obě části dostanou stejné filtry a každá vrací nejvýše limit výsledků.
+
+        Args:
+            query: Vyhledávací dotaz
+            limit: Maximální počet výsledků
+            file_types: Filtrování podle typů souborů
+            watched_items: Filtrování podle názvů sledovaných položek
+            fusion: "rrf" nebo "weighted" (výchozí settings.HYBRID_FUSION)
+            semantic_weight: Váha sémantické části pro "weighted" (0-1)
+
+        Returns:
+            Seznam výsledků seřazený podle fúzovaného skóre
+        """
+        return [
+            result async for result in self.iter_search(
+                query, limit, file_types, watched_items, fusion, semantic_weight
+            )
+        ]
+
+    async def iter_search(self, query: str, limit: int = 10,
+                          file_types: Optional[List[str]] = None,
+                          watched_items: Optional[List[str]] = None,
+                          fusion: Optional[str] = None,
+                          semantic_weight: Optional[float] = None) -> AsyncIterator[Dict]:
+        """
+        Hybridní vyhledávání, které vrací výsledky postupně
+
+        Pořadí je dané fúzí obou částí, úryvky se počítají až pro odebíraný
+        výsledek - z nalezeného chunku sémantické části, jinak z úryvku FTS5.
+        Celý obsah dokumentů se nenačítá. Parametry jsou stejné jako u search.
+
+        Yields:
+            Výsledky od nejlepšího fúzovaného skóre
+        """
+        fusion = fusion or settings.HYBRID_FUSION
+        if fusion not in HYBRID_FUSION_MODES:
+            raise ValueError(f"Nepodporovaný způsob fúze: {fusion}")
+        if semantic_weight is None:
+            semantic_weight = settings.HYBRID_SEMANTIC_WEIGHT
+
+        loop = asyncio.get_running_loop()
+        lexical_task = loop.run_in_executor(
+            None,
+            lambda: self.db.search_files_bm25(query, limit, file_types=file_types, watched_item_names=watched_items)
+        )
+        semantic_task = None
+        if self.ai_service is not None:
+            semantic_task = loop.run_in_executor(
+                None,
+                lambda: self.ai_service.search_documents(query, limit, file_types=file_types, watched_items=watched_items)
+            )
+
+        lexical = await lexical_task
+        semantic: List[Dict] = []
+        if semantic_task is not None:
+            try:
+                semantic = await semantic_task
+            except Exception as e:
+                # Lexikální výsledky se vrátí i bez vektorové části
+                logger.error(f"Sémantická část hybridního vyhledávání selhala: {e}")
+
+        # Soubory nalezené jen sémanticky se načtou z DB (bez obsahu), aby
+        # výsledky měly stejné ID a sloupce jako lexikální část
+        lexical_ids = {row['id'] for row in lexical}
+        missing = [
+            file_id for file_id in (semantic_file_id(row) for row in semantic)
+            if file_id is not None and file_id not in lexical_ids
+        ]
+        files: Dict[int, Dict] = {}
+        if missing:
+            files = {
+                file['id']: file
+                for file in await loop.run_in_executor(
+                    None, partial(self.db.get_files_by_ids, missing, with_content=False)
+                )
+            }
+
+        for document in self._fuse(lexical, semantic, files, limit, fusion, semantic_weight):
+            yield self._with_snippets(query, document)
+
+    def _fuse(self, lexical: List[Dict], semantic: List[Dict], files: Dict[int, Dict],
+              limit: int, fusion: str, semantic_weight: float) -> List[Dict]:
+        """
+        Spojí výsledky obou částí podle cesty k souboru
+
+        Args:
+            lexical: Výsledky BM25
+            semantic: Sémantické výsledky (chunky spojené podle souborů)
+            files: Indexované soubory podle ID pro výsledky, které nejsou v lexikální části
+            limit: Maximální počet výsledků
+            fusion: "rrf" nebo "weighted"
+            semantic_weight: Váha sémantické části pro "weighted"
+        """
+        # Sémantické výsledky souborů, které už nejsou v indexu, se vynechají
+        lexical_paths = {row['file_path'] for row in lexical}
+        semantic = [
+            row for row in semantic
+            if row['file_path'] in lexical_paths or semantic_file_id(row) in files
+        ]
+
+        documents: Dict[str, Dict] = {}
+        for rank, row in enumerate(lexical, start=1):
+            documents[row['file_path']] = {
+                'id': row['id'],
+                'file_path': row['file_path'],
+                'file_name': row['file_name'],
+                'file_type': row['file_type'],
+                'watched_item_name': row['watched_item_name'],
+                'match_snippet': row['match_snippet'],
+                'lexical_rank': rank,
+                'lexical_score': row['bm25_score'],
+                'semantic_rank': None,
+                'semantic_score': None
+            }
+        for rank, row in enumerate(semantic, start=1):
+            document = documents.get(row['file_path'])
+            if document is None:
+                file = files[semantic_file_id(row)]
+                document = documents[row['file_path']] = {
+                    'id': file['id'],
+                    'file_path': file['file_path'],
+                    'file_name': file['file_name'],
+                    'file_type': file['file_type'],
+                    'watched_item_name': file['watched_item_name'],
+                    'match_snippet': None,
+                    'lexical_rank': None,
+                    'lexical_score': None
+                }
+            document['semantic_rank'] = rank
+            document['semantic_score'] = row['relevance_score']
+            # Text nejlepšího chunku a jeho offset v dokumentu pro úryvky
+            document['chunk_text'] = row['content_text']
+            document['chunk_start'] = row.get('char_start')
+
+        lexical_keys = [row['file_path'] for row in lexical]
+        semantic_keys = [row['file_path'] for row in semantic]
+        if fusion == "rrf":
+            scores = reciprocal_rank_fusion(
+                {"lexical": lexical_keys, "semantic": semantic_keys},
+                k=settings.HYBRID_RRF_K
+            )
+        else:
+            scores = weighted_fusion(
+                {
+                    "lexical": {row['file_path']: row['bm25_score'] for row in lexical},
+                    "semantic": {row['file_path']: row['relevance_score'] for row in semantic}
+                },
+                {"lexical": 1.0 - semantic_weight, "semantic": semantic_weight}
+            )
+
+        ranked = sorted(documents.values(), key=lambda document: scores.get(document['file_path'], 0.0), reverse=True)
+        return [
+            {**document, 'score': scores.get(document['file_path'], 0.0)}
+            for document in ranked[:limit]
+        ]
+
+    @staticmethod
+    def _with_snippets(query: str, document: Dict) -> Dict:
+        """
+        Doplní do výsledku úryvky
+
+        Přednost má nalezený chunk (krátký text s offsetem v dokumentu, úryvky
+        mají start/end v dokumentu). Bez shody v chunku se použije úryvek
+        z FTS5 snippet(), ten offsety v dokumentu nemá.
+        """
+        document = dict(document)
+        marked = document.pop('match_snippet', None)
+        chunk = document.pop('chunk_text', None) or ''
+        offset = document.pop('chunk_start', None) or 0
+
+        snippets, _ = find_snippets(chunk, query)
+        if snippets:
+            snippets = [
+                {**snippet, 'start': snippet['start'] + offset, 'end': snippet['end'] + offset}
+                for snippet in snippets
+            ]
+            context_snippets = [format_snippet(snippet, offset + len(chunk)) for snippet in snippets]
+        else:
+            context_snippets = []
+            parsed = parse_marked_snippet(marked, SNIPPET_MATCH_START, SNIPPET_MATCH_END, SNIPPET_ELLIPSIS) if marked else None
+            if parsed is not None:
+                snippets = [parsed[0]]
+                context_snippets = [parsed[1]]
+        return {
+            **document,
+            'context_snippets': context_snippets,
+            'snippets': snippets
+        }
@@ -1,14 +1,22 @@
 import os
 import asyncio
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 import json
 import hashlib
-import psutil
+
+import numpy as np
 
 from ..models.folder import WatchedFolder, IndexStatus, FileType
 from ..config.settings import settings
+from .text_chunker import TextChunker, TextChunk
+from .system_monitor import get_system_sampler
+from .embeddings import get_embedding_backend, uncached_backend
+from .vector_store import create_vector_store, ChromaVectorStore
+from .quantization import open_quantized_index, query_quantized
 
 class DocumentProcessor:
     """Zpracování různých typů dokumentů"""
@@ -57,22 +65,54 @@ class DocumentProcessor:
         """Extrakce textu z Markdown"""
         return DocumentProcessor.extract_text_from_txt(file_path)
 
+def extract_text(file_path: str) -> str:
+    """Extrakce textu podle typu souboru (funkce na úrovni modulu kvůli ProcessPoolExecutor)"""
+    suffix = Path(file_path).suffix.lower()
+    
+    if suffix == ".pdf":
+        return DocumentProcessor.extract_text_from_pdf(file_path)
+    elif suffix == ".docx":
+        return DocumentProcessor.extract_text_from_docx(file_path)
+    elif suffix == ".txt":
+        return DocumentProcessor.extract_text_from_txt(file_path)
+    elif suffix == ".md":
+        return DocumentProcessor.extract_text_from_md(file_path)
+    else:
+        return ""
+
 class IndexerService:
     """Služba pro indexaci dokumentů"""
+
+    # Všechny složky sdílí jednu kolekci, složka je v metadatech (folder_path)
+    COLLECTION_NAME = "dex_search_chunks"
+    LEGACY_COLLECTION_PREFIX = "folder_"
+    MIGRATION_BATCH_SIZE = 1000
+
+    # Executory sdílené všemi instancemi (scheduler vytváří instanci pro každý běh)
+    _executor_lock = threading.Lock()
+    _extract_executor: Optional[Executor] = None
+    _embedding_executor: Optional[Executor] = None
     
     def __init__(self):
         self.embedding_model = None
         self.vector_db = None
+        self.collection = None
+        self.quantized_index = None
         self.processing_status: Dict[str, IndexStatus] = {}
         self._load_embedding_model()
         self._init_vector_db()
+        self.chunker = TextChunker.for_model(
+            self.embedding_model,
+            chunk_size=settings.CHUNK_SIZE,
+            chunk_overlap=settings.CHUNK_OVERLAP,
+            token_aware=settings.CHUNK_TOKEN_AWARE
+        )
 
     def _load_embedding_model(self):
         """Načtení embedding modelu"""
         try:
-            from sentence_transformers import SentenceTransformer
-            self.embedding_model = SentenceTransformer(settings.EMBEDDING_MODEL)
-            print(f"✅ Embedding model načten: {settings.EMBEDDING_MODEL}")
+            self.embedding_model = get_embedding_backend(settings.EMBEDDING_MODEL)
+            print(f"✅ Embedding model načten: {settings.EMBEDDING_MODEL} ({self.embedding_model.name})")
         except Exception as e:
             print(f"❌ Chyba při načítání embedding modelu: {e}")
             self.embedding_model = None
@@ -80,26 +120,93 @@ class IndexerService:
     def _init_vector_db(self):
         """Inicializace vektorové databáze"""
         try:
-            import chromadb
-            self.vector_db = chromadb.PersistentClient(path=settings.EMBEDDINGS_DIR)
-            print("✅ ChromaDB inicializována")
+            self.vector_db = create_vector_store(
+                self.COLLECTION_NAME,
+                metadata={"description": "Chunky všech sledovaných složek"}
+            )
+            self.collection = self.vector_db
+            if isinstance(self.vector_db, ChromaVectorStore):
+                self._migrate_legacy_collections()
+            print(f"✅ Vektorová DB inicializována ({self.vector_db.backend})")
         except Exception as e:
             print(f"❌ Chyba při inicializaci vektorové DB: {e}")
             self.vector_db = None
+            self.collection = None
+            return
+
+        # Kvantizovaný vedlejší index pro dvoufázové vyhledávání (stejně jako AI search)
+        mode = settings.EMBEDDING_QUANTIZATION
+        if mode != "none":
+            try:
+                self.quantized_index = open_quantized_index(
+                    os.path.join(settings.EMBEDDINGS_DIR, f"quantized_{mode}_{self.COLLECTION_NAME}"),
+                    mode,
+                    self.collection,
+                    rescore_multiplier=settings.QUANTIZATION_RESCORE_MULTIPLIER,
+                    batch_size=settings.VECTOR_UPSERT_BATCH_SIZE
+                )
+                print(f"✅ Kvantizovaný index načten ({mode}, {len(self.quantized_index)} vektorů)")
+            except Exception as e:
+                print(f"❌ Chyba při načítání kvantizovaného indexu: {e}")
+                self.quantized_index = None
+
+    def _migrate_legacy_collections(self):
+        """Přesun chunků ze starých kolekcí folder_<md5> do společné kolekce"""
+        client = self.vector_db.client
+        for legacy in client.list_collections():
+            if not legacy.name.startswith(self.LEGACY_COLLECTION_PREFIX):
+                continue
+
+            try:
+                moved = 0
+                while True:
+                    # Stránkování od začátku - přesunuté záznamy se průběžně mažou
+                    batch = legacy.get(
+                        limit=self.MIGRATION_BATCH_SIZE,
+                        include=["embeddings", "documents", "metadatas"]
+                    )
+                    if not batch["ids"]:
+                        break
+
+                    self.collection.upsert(
+                        ids=batch["ids"],
+                        embeddings=batch["embeddings"],
+                        documents=batch["documents"],
+                        metadatas=[self._normalize_metadata(m) for m in batch["metadatas"]]
+                    )
+                    legacy.delete(ids=batch["ids"])
+                    moved += len(batch["ids"])
+
+                client.delete_collection(legacy.name)
+                print(f"✅ Kolekce {legacy.name} migrována ({moved} chunků)")
+            except Exception as e:
+                print(f"❌ Chyba při migraci kolekce {legacy.name}: {e}")
+
+    @staticmethod
+    def _normalize_metadata(metadata: Optional[Dict]) -> Dict:
+        """Převod metadat na skalární hodnoty podporované ChromaDB"""
+        normalized = {}
+        for key, value in (metadata or {}).items():
+            if isinstance(value, (list, tuple)):
+                value = ",".join(str(v) for v in value)
+            normalized[key] = value
+        return normalized
 
     def get_system_status(self) -> Dict[str, Any]:
-        """Získání systémového statusu"""
-        cpu_percent = psutil.cpu_percent(interval=1)
-        memory = psutil.virtual_memory()
-        disk = psutil.disk_usage('/')
+        """Získání systémového statusu (z cache sampleru, bez čekání)"""
+        status = get_system_sampler().get_status()
         
         return {
-            "cpu_usage": cpu_percent,
-            "ram_usage": memory.percent,
-            "ram_available": memory.available / (1024**3),  # GB
-            "disk_usage": disk.percent,
-            "disk_free": disk.free / (1024**3),  # GB
-            "is_idle": cpu_percent < settings.DEFAULT_CPU_THRESHOLD and memory.percent < settings.DEFAULT_RAM_THRESHOLD
+            "cpu_usage": status["cpu_usage"],
+            "ram_usage": status["ram_usage"],
+            "ram_available": status["ram_available"],
+            "disk_usage": status["disk_usage"],
+            "disk_free": status["disk_free"],
+            "is_idle": (
+                not status["warming_up"]
+                and status["cpu_usage_avg"] < settings.DEFAULT_CPU_THRESHOLD
+                and status["ram_usage"] < settings.DEFAULT_RAM_THRESHOLD
+            )
         }
 
     def should_process_now(self) -> bool:
@@ -118,8 +225,10 @@ class IndexerService:
         self.processing_status[status.folder_id] = status
         
         try:
+            loop = asyncio.get_running_loop()
+            
             # Získání seznamu souborů
-            files = self._get_files_from_folder(folder)
+            files = await loop.run_in_executor(None, self._get_files_from_folder, folder)
             status.total_files = len(files)
             
             if not files:
@@ -127,16 +236,8 @@ class IndexerService:
                 status.end_time = datetime.now()
                 return status
             
-            # Zpracování souborů
-            processed_files = 0
-            for file_path in files:
-                if not self.should_process_now():
-                    await asyncio.sleep(5)  # Počkat, pokud systém není idle
-                
-                await self._process_file(file_path, folder)
-                processed_files += 1
-                status.files_processed = processed_files
-                status.progress = (processed_files / status.total_files) * 100
+            # Zpracování souborů mimo event loop
+            await self._run_pipeline(files, folder, status)
             
             status.status = "completed"
             status.end_time = datetime.now()
@@ -172,19 +273,101 @@ class IndexerService:
         
         return files
 
-    async def _process_file(self, file_path: str, folder: WatchedFolder):
-        """Zpracování jednotlivého souboru"""
+    @classmethod
+    def _get_executors(cls):
+        """Líné vytvoření sdílených executorů pro extrakci a embedding"""
+        with cls._executor_lock:
+            if cls._extract_executor is None:
+                if settings.INDEXING_EXTRACT_PROCESSES > 0:
+                    cls._extract_executor = ProcessPoolExecutor(max_workers=settings.INDEXING_EXTRACT_PROCESSES)
+                else:
+                    cls._extract_executor = ThreadPoolExecutor(
+                        max_workers=settings.INDEXING_EXTRACT_WORKERS,
+                        thread_name_prefix="indexer-extract"
+                    )
+            if cls._embedding_executor is None:
+                # Jeden worker - model i zápisy do vektorové DB jsou sériové
+                cls._embedding_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="indexer-embed")
+        return cls._extract_executor, cls._embedding_executor
+
+    async def _run_pipeline(self, files: List[str], folder: WatchedFolder, status: IndexStatus):
+        """
+        Pipeline indexace: extrakce textu ve více workerech (vlákna nebo procesy),
+        dělení, embedding a zápis v dedikovaném workeru. Fronta s omezenou
+        velikostí brzdí extrakci, když embedding nestíhá.
+        """
+        loop = asyncio.get_running_loop()
+        extract_executor, embedding_executor = self._get_executors()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=settings.INDEXING_QUEUE_SIZE)
+        pending_files = iter(files)
+        
+        async def extract_worker():
+            for file_path in pending_files:
+                if not self.should_process_now():
+                    await asyncio.sleep(5)  # Počkat, pokud systém není idle
+                
+                try:
+                    text = await loop.run_in_executor(extract_executor, extract_text, file_path)
+                except Exception as e:
+                    print(f"❌ Chyba při extrakci textu {file_path}: {e}")
+                    text = ""
+                await queue.put((file_path, text))
+        
+        async def close_queue(workers):
+            try:
+                await asyncio.gather(*workers)
+            finally:
+                await queue.put(None)
+        
+        workers = [asyncio.create_task(extract_worker()) for _ in range(settings.INDEXING_EXTRACT_WORKERS)]
+        closer = asyncio.create_task(close_queue(workers))
+        
+        try:
+            processed_files = 0
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                
+                file_path, text = item
+                await loop.run_in_executor(embedding_executor, self._process_file, file_path, text, folder)
+                processed_files += 1
+                status.files_processed = processed_files
+                status.progress = (processed_files / status.total_files) * 100
+            
+            # Propagace případné chyby z extrakce
+            await closer
+        finally:
+            for worker in workers:
+                worker.cancel()
+            closer.cancel()
+            # Index se na disk uloží jednou za běh, ne po každém souboru
+            await loop.run_in_executor(embedding_executor, self._flush_vector_db)
+    
+    def _flush_vector_db(self):
+        """Uložení odložených zápisů vektorové DB"""
+        if not self.collection:
+            return
+        try:
+            self.collection.flush()
+            if self.quantized_index is not None:
+                self.quantized_index.save()
+        except Exception as e:
+            print(f"❌ Chyba při ukládání vektorové DB: {e}")
+
+    def _process_file(self, file_path: str, text: str, folder: WatchedFolder):
+        """Zpracování jednotlivého souboru (běží v embedding workeru)"""
         try:
-            # Extrakce textu
-            text = self._extract_text(file_path)
             if not text.strip():
+                # Soubor bez textu nesmí nechat v indexu staré chunky
+                self._delete_stale_chunks(file_path, set())
                 return
             
             # Rozdělení na chunky
             chunks = self._split_text(text)
             
             # Vytvoření embeddingů
-            embeddings = self._create_embeddings(chunks)
+            embeddings = self._create_embeddings([chunk.text for chunk in chunks])
             
             # Uložení do vektorové DB
             self._store_embeddings(file_path, chunks, embeddings, folder)
@@ -194,30 +377,11 @@ class IndexerService:
 
     def _extract_text(self, file_path: str) -> str:
         """Extrakce textu podle typu souboru"""
-        suffix = Path(file_path).suffix.lower()
-        
-        if suffix == ".pdf":
-            return DocumentProcessor.extract_text_from_pdf(file_path)
-        elif suffix == ".docx":
-            return DocumentProcessor.extract_text_from_docx(file_path)
-        elif suffix == ".txt":
-            return DocumentProcessor.extract_text_from_txt(file_path)
-        elif suffix == ".md":
-            return DocumentProcessor.extract_text_from_md(file_path)
-        else:
-            return ""
+        return extract_text(file_path)
 
-    def _split_text(self, text: str) -> List[str]:
-        """Rozdělení textu na chunky"""
-        from langchain.text_splitter import RecursiveCharacterTextSplitter
-        
-        splitter = RecursiveCharacterTextSplitter(
-            chunk_size=settings.CHUNK_SIZE,
-            chunk_overlap=settings.CHUNK_OVERLAP,
-            length_function=len,
-        )
-        
-        return splitter.split_text(text)
+    def _split_text(self, text: str) -> List[TextChunk]:
+        """Rozdělení textu na chunky s offsety"""
+        return self.chunker.split(text)
 
     def _create_embeddings(self, chunks: List[str]) -> List[List[float]]:
         """Vytvoření embeddingů pro chunky"""
@@ -227,80 +391,120 @@ class IndexerService:
         embeddings = self.embedding_model.encode(chunks)
         return embeddings.tolist()
 
-    def _store_embeddings(self, file_path: str, chunks: List[str], embeddings: List[List[float]], folder: WatchedFolder):
+    def _store_embeddings(self, file_path: str, chunks: List[TextChunk], embeddings: List[List[float]], folder: WatchedFolder):
         """Uložení embeddingů do vektorové DB"""
-        if not self.vector_db:
+        if not self.collection:
             return
         
         try:
-            collection_name = f"folder_{hashlib.md5(folder.path.encode()).hexdigest()[:8]}"
-            
-            # Vytvoření nebo získání kolekce
-            try:
-                collection = self.vector_db.get_collection(collection_name)
-            except:
-                collection = self.vector_db.create_collection(collection_name)
-            
             # Příprava dat
             ids = [f"{file_path}_{i}" for i in range(len(chunks))]
             metadatas = [
                 {
                     "file_path": file_path,
                     "folder_path": folder.path,
-                    "tags": folder.tags,
+                    "tags": ",".join(folder.tags),
                     "chunk_index": i,
-                    "total_chunks": len(chunks)
+                    "total_chunks": len(chunks),
+                    "char_start": chunk.start,
+                    "char_end": chunk.end
                 }
-                for i in range(len(chunks))
+                for i, chunk in enumerate(chunks)
             ]
             
-            # Přidání do kolekce
-            collection.add(
-                embeddings=embeddings,
-                documents=chunks,
-                metadatas=metadatas,
-                ids=ids
-            )
+            # Upsert po velkých dávkách - opakovaná indexace je idempotentní
+            batch_size = settings.VECTOR_UPSERT_BATCH_SIZE
+            documents = [chunk.text for chunk in chunks]
+            for start in range(0, len(ids), batch_size):
+                end = start + batch_size
+                self.collection.upsert(
+                    embeddings=embeddings[start:end],
+                    documents=documents[start:end],
+                    metadatas=metadatas[start:end],
+                    ids=ids[start:end]
+                )
+                if self.quantized_index is not None:
+                    self.quantized_index.add(ids[start:end], np.asarray(embeddings[start:end], dtype=np.float32))
+            
+            # Smazání chunků, které po zkrácení souboru přebývají
+            self._delete_stale_chunks(file_path, set(ids))
             
         except Exception as e:
             print(f"❌ Chyba při ukládání embeddingů: {e}")
 
-    async def search_documents(self, query: str, limit: int = 10, filters: Optional[Dict] = None) -> List[Dict]:
-        """Vyhledávání v dokumentech"""
-        if not self.embedding_model or not self.vector_db:
+    def _delete_stale_chunks(self, file_path: str, current_ids: set):
+        """Smazání chunků souboru, které nejsou v aktuální sadě ID"""
+        if not self.collection:
+            return
+        
+        existing = self.collection.get(where={"file_path": file_path}, include=[])
+        stale_ids = [chunk_id for chunk_id in existing["ids"] if chunk_id not in current_ids]
+        
+        batch_size = settings.VECTOR_UPSERT_BATCH_SIZE
+        for start in range(0, len(stale_ids), batch_size):
+            self.collection.delete(ids=stale_ids[start:start + batch_size])
+        if self.quantized_index is not None:
+            self.quantized_index.delete(stale_ids)
+
+    async def search_documents(self, query: str, limit: int = 10, filters: Optional[Dict] = None,
+                               folder_paths: Optional[List[str]] = None) -> List[Dict]:
+        """Vyhledávání v dokumentech (jeden ANN dotaz bez ohledu na počet složek)"""
+        if not self.embedding_model or not self.collection:
             return []
         
         try:
-            # Vytvoření embeddingu pro dotaz
-            query_embedding = self.embedding_model.encode([query]).tolist()[0]
+            # Vytvoření embeddingu pro dotaz (mimo event loop, nečeká za frontou indexace)
+            loop = asyncio.get_running_loop()
+            # Dotaz se neukládá do perzistentní cache embeddingů chunků
+            query_model = uncached_backend(self.embedding_model)
+            query_embeddings = await loop.run_in_executor(None, query_model.encode, [query])
+            query_embedding = query_embeddings.tolist()[0]
             
-            # Vyhledávání ve všech kolekcích
-            results = []
-            collections = self.vector_db.list_collections()
+            # Filtrování podle složek přes metadata
+            conditions = []
+            if filters:
+                conditions.append(filters)
+            if folder_paths:
+                conditions.append({"folder_path": {"$in": folder_paths}})
+            
+            if len(conditions) > 1:
+                where = {"$and": conditions}
+            else:
+                where = conditions[0] if conditions else None
             
-            for collection in collections:
-                search_results = collection.query(
-                    query_embeddings=[query_embedding],
-                    n_results=limit,
-                    where=filters
+            if self.quantized_index is not None:
+                search_results = await loop.run_in_executor(
+                    None,
+                    lambda: query_quantized(
+                        self.quantized_index, self.collection, np.asarray([query_embedding], dtype=np.float32),
+                        limit, where
+                    )
                 )
-                
-                for i, (doc, metadata, score) in enumerate(zip(
-                    search_results['documents'][0],
-                    search_results['metadatas'][0],
-                    search_results['distances'][0]
-                )):
-                    results.append({
-                        "content": doc,
-                        "source_file": metadata.get("file_path", ""),
-                        "file_path": metadata.get("file_path", ""),
-                        "score": 1 - score,  # Převedení distance na score
-                        "metadata": metadata
-                    })
+            else:
+                search_results = await loop.run_in_executor(
+                    None,
+                    lambda: self.collection.query(
+                        query_embeddings=[query_embedding],
+                        n_results=limit,
+                        where=where
+                    )
+                )
+            
+            results = []
+            for doc, metadata, score in zip(
+                search_results['documents'][0],
+                search_results['metadatas'][0],
+                search_results['distances'][0]
+            ):
+                results.append({
+                    "content": doc,
+                    "source_file": metadata.get("file_path", ""),
+                    "file_path": metadata.get("file_path", ""),
+                    "score": 1 - score,  # Převedení distance na score
+                    "metadata": metadata
+                })
             
-            # Seřazení podle score
-            results.sort(key=lambda x: x["score"], reverse=True)
-            return results[:limit]
+            return results
             
         except Exception as e:
             print(f"❌ Chyba při vyhledávání: {e}")
@@ -0,0 +1,349 @@
+import json
+import logging
+import os
+import threading
+from typing import List, Dict, Optional
+
+import numpy as np
+
+from .vector_store import (
+    VectorStore, PayloadStore, matches_where, select_payload,
+    DEFAULT_GET_INCLUDE, DEFAULT_QUERY_INCLUDE
+)
+
+logger = logging.getLogger(__name__)
+
+NUMPY_VECTOR_DTYPES = ("float32", "float16")
+
+class NumpyVectorStore(VectorStore):
+    """
+    Přesné vyhledávání hrubou silou nad memory-mapped maticí vektorů
+
+    Všechny vektory leží v jednom souvislém souboru (float32 nebo float16),
+    nové řádky se jen připojují na konec. Dotaz je jeden maticový součin
+    a výběr top-k přes argpartition - výsledky jsou přesné a studený start
+    je jen namapování souboru. Filtry se vyhodnotí jednou na boolean masku,
+    která se drží v cache do dalšího zápisu.
+
+    Pole norem, platnosti a ID řádků se po zápisu ukládají až ve flush()
+    (jednou za dávku). meta.json si pamatuje nejvyšší uložené ID payloadu,
+    takže po pádu před flush se nedokončené záznamy payloadu při načtení
+    smažou a řádky matice za uloženou velikostí se přepíšou.
+    """
+
+    backend = "numpy"
+
+    # Při tomto podílu neplatných řádků se matice zkompaktuje
+    COMPACT_INVALID_RATIO = 0.25
+    # Počet řádků na jeden maticový součin (omezuje dočasnou paměť pro převod na float32)
+    BLOCK_ROWS = 16384
+
+    def __init__(self, directory: str, dtype: str = "float32"):
+        """
+        Args:
+            directory: Adresář pro matici vektorů a payload
+            dtype: "float32" nebo "float16" (poloviční velikost, ale pomalejší dotaz
+                kvůli převodu na float32 po blocích)
+        """
+        if dtype not in NUMPY_VECTOR_DTYPES:
+            raise ValueError(f"Nepodporovaný typ vektorů: {dtype}")
+
+        self.directory = directory
+        self.configured_dtype = np.dtype(dtype)
+        self.dtype = self.configured_dtype
+        self.dimension: Optional[int] = None
+        self.size = 0
+        self._lock = threading.RLock()
+
+        os.makedirs(directory, exist_ok=True)
+        self.payload = PayloadStore(os.path.join(directory, "payload.db"))
+
+        self._vectors: Optional[np.ndarray] = None
+        self.norms = np.empty(0, dtype=np.float32)
+        self.valid = np.empty(0, dtype=bool)
+        self.row_ids = np.empty(0, dtype=np.int64)
+        self._rows: Optional[Dict[int, int]] = None
+        self._row_metadata: Optional[List[Optional[Dict]]] = None
+        self._masks: Dict[str, np.ndarray] = {}
+        self._dirty = False
+
+        self._load()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    @property
+    def _vectors_path(self) -> str:
+        return self._path("vectors.bin")
+
+    def _load(self):
+        """Namapování uložené matice (metadata se načtou až při prvním filtru)"""
+        meta_path = self._path("meta.json")
+        if not os.path.exists(meta_path):
+            self._discard_unsaved_payload(0)
+            return
+
+        with open(meta_path, "r") as f:
+            meta = json.load(f)
+        self.dimension = meta["dimension"]
+        self.dtype = np.dtype(meta["dtype"])
+        self.size = meta["size"]
+
+        self.norms = np.load(self._path("norms.npy"))[:self.size]
+        self.valid = np.load(self._path("valid.npy"))[:self.size]
+        self.row_ids = np.load(self._path("row_ids.npy"))[:self.size]
+        # meta.json ze starší verze nemá max_int_id - payload se bere jako platný
+        if "max_int_id" in meta:
+            self._discard_unsaved_payload(meta["max_int_id"])
+        self._map_vectors()
+
+    def _discard_unsaved_payload(self, saved_max_int_id: int):
+        """Srovnání payloadu s uloženými poli po pádu před flush"""
+        removed = self.payload.remove_after(saved_max_int_id)
+        if removed:
+            logger.warning(f"Smazáno {removed} záznamů payloadu, které nebyly v uložené matici")
+        # Řádky, jejichž payload se smazal po posledním uložení, jsou neplatné
+        if self.size:
+            stale = self.valid & ~np.isin(self.row_ids, self.payload.all_int_ids())
+            self.valid[stale] = False
+
+    def _map_vectors(self):
+        if self.size == 0:
+            self._vectors = None
+            return
+        self._vectors = np.memmap(
+            self._vectors_path, dtype=self.dtype, mode="r", shape=(self.size, self.dimension)
+        )
+
+    def _save(self):
+        np.save(self._path("norms.npy"), self.norms)
+        np.save(self._path("valid.npy"), self.valid)
+        np.save(self._path("row_ids.npy"), self.row_ids)
+        with open(self._path("meta.json"), "w") as f:
+            json.dump({
+                "dimension": self.dimension, "dtype": self.dtype.name, "size": self.size,
+                "max_int_id": self.payload.max_int_id()
+            }, f)
+        self._dirty = False
+
+    def flush(self):
+        """Uložení polí matice na disk, pokud se od posledního uložení změnila"""
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def _row_map(self) -> Dict[int, int]:
+        """Mapování celočíselných ID payloadu na řádky matice"""
+        if self._rows is None:
+            self._rows = {int(int_id): row for row, int_id in enumerate(self.row_ids) if self.valid[row]}
+        return self._rows
+
+    def _metadata_by_row(self) -> List[Optional[Dict]]:
+        """Metadata zarovnaná s řádky matice (pro vyhodnocení filtrů)"""
+        if self._row_metadata is None:
+            payload = self.payload.fetch([int(i) for i in self.row_ids[self.valid]])
+            self._row_metadata = [
+                payload[int(int_id)][2] if self.valid[row] and int(int_id) in payload else None
+                for row, int_id in enumerate(self.row_ids)
+            ]
+        return self._row_metadata
+
+    def _invalidate(self, rows: List[int]):
+        if not rows:
+            return
+        self.valid[rows] = False
+        row_map = self._row_map()
+        for row in rows:
+            row_map.pop(int(self.row_ids[row]), None)
+            if self._row_metadata is not None:
+                self._row_metadata[row] = None
+
+    def count(self) -> int:
+        return self.payload.count()
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        vectors = np.ascontiguousarray(embeddings, dtype=np.float32)
+        if not len(ids):
+            return
+
+        with self._lock:
+            if self.dimension is None:
+                self.dimension = vectors.shape[1]
+
+            stored = vectors.astype(self.dtype, copy=False)
+            # Vektory před payloadem a za poslední řádek - případný zbytek po pádu se přepíše
+            mode = "r+b" if os.path.exists(self._vectors_path) else "wb"
+            with open(self._vectors_path, mode) as f:
+                f.seek(self.size * self.dimension * self.dtype.itemsize)
+                f.write(stored.tobytes())
+                f.truncate()
+
+            # Přepisované záznamy se zneplatní a připojí znovu na konec
+            existing = self.payload.int_ids(list(ids))
+            if existing:
+                row_map = self._row_map()
+                self._invalidate([row_map[i] for i in existing.values() if i in row_map])
+                self.payload.remove(list(existing.values()))
+
+            int_ids = self.payload.insert(list(ids), list(documents), list(metadatas))
+
+            first_row = self.size
+            self.size += len(int_ids)
+            # Normy z uložené přesnosti, aby vzdálenosti seděly i pro float16
+            stored32 = stored.astype(np.float32)
+            self.norms = np.concatenate([self.norms, np.einsum("ij,ij->i", stored32, stored32)])
+            self.valid = np.concatenate([self.valid, np.ones(len(int_ids), dtype=bool)])
+            self.row_ids = np.concatenate([self.row_ids, np.array(int_ids, dtype=np.int64)])
+
+            row_map = self._row_map()
+            for offset, int_id in enumerate(int_ids):
+                row_map[int_id] = first_row + offset
+            if self._row_metadata is not None:
+                self._row_metadata.extend(dict(m or {}) for m in metadatas)
+
+            self._after_write()
+
+    def delete(self, ids=None, where=None):
+        with self._lock:
+            if ids is None and not where:
+                return
+            rows = select_payload(self.payload, ids, where, None, 0)
+            int_ids = [row[0] for row in rows]
+            if not int_ids:
+                return
+
+            row_map = self._row_map()
+            self._invalidate([row_map[i] for i in int_ids if i in row_map])
+            self.payload.remove(int_ids)
+            self._after_write()
+
+    def _after_write(self):
+        self._masks = {}
+        self._dirty = True
+        invalid = self.size - int(self.valid.sum())
+        if self.size and invalid / self.size >= self.COMPACT_INVALID_RATIO:
+            self._compact()
+            # Přepsaná matice musí hned odpovídat uloženým polím
+            self._save()
+        else:
+            self._map_vectors()
+
+    def _compact(self):
+        """Přepsání matice jen s platnými řádky"""
+        self._map_vectors()
+        keep = np.flatnonzero(self.valid)
+        tmp_path = self._vectors_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            for start in range(0, len(keep), self.BLOCK_ROWS):
+                f.write(np.ascontiguousarray(self._vectors[keep[start:start + self.BLOCK_ROWS]]).tobytes())
+        self._vectors = None
+        os.replace(tmp_path, self._vectors_path)
+
+        self.norms = self.norms[keep]
+        self.row_ids = self.row_ids[keep]
+        self.valid = np.ones(len(keep), dtype=bool)
+        self.size = len(keep)
+        self._rows = None
+        self._row_metadata = None
+        self._map_vectors()
+
+    def _mask(self, where: Optional[Dict]) -> np.ndarray:
+        """Boolean maska platných řádků odpovídajících filtru (cachovaná do dalšího zápisu)"""
+        if not where:
+            return self.valid
+        key = json.dumps(where, sort_keys=True)
+        mask = self._masks.get(key)
+        if mask is None:
+            mask = np.fromiter(
+                (m is not None and matches_where(m, where) for m in self._metadata_by_row()),
+                dtype=bool,
+                count=self.size
+            )
+            self._masks[key] = mask
+        return mask
+
+    def _distances(self, queries: np.ndarray) -> np.ndarray:
+        """Čtvercové L2 vzdálenosti všech řádků ke všem dotazům, tvar (dotazy, řádky)"""
+        distances = np.empty((len(queries), self.size), dtype=np.float32)
+        for start in range(0, self.size, self.BLOCK_ROWS):
+            block = np.asarray(self._vectors[start:start + self.BLOCK_ROWS], dtype=np.float32)
+            distances[:, start:start + len(block)] = queries @ block.T
+        # ||x - q||^2 = ||x||^2 - 2 x.q + ||q||^2
+        distances *= -2
+        distances += self.norms
+        distances += np.einsum("ij,ij->i", queries, queries)[:, None]
+        np.maximum(distances, 0, out=distances)
+        return distances
+
+    def query(self, query_embeddings, n_results=10, where=None, include=DEFAULT_QUERY_INCLUDE):
+        queries = np.ascontiguousarray(query_embeddings, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries.reshape(1, -1)
+
+        with self._lock:
+            if self.size == 0:
+                hits = [[] for _ in range(len(queries))]
+            else:
+                mask = self._mask(where)
+                candidates = int(mask.sum())
+                k = min(n_results, candidates)
+                distances = self._distances(queries)
+                distances[:, ~mask] = np.inf
+
+                hits = []
+                for row_distances in distances:
+                    if k == 0:
+                        hits.append([])
+                        continue
+                    top = np.argpartition(row_distances, k - 1)[:k]
+                    top = top[np.argsort(row_distances[top])]
+                    hits.append([(int(self.row_ids[row]), float(row_distances[row])) for row in top])
+
+            payload = self.payload.fetch(list({int_id for found in hits for int_id, _ in found}))
+
+        result = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        for found in hits:
+            found = [(payload[int_id], distance) for int_id, distance in found if int_id in payload]
+            result["ids"].append([item[0] for item, _ in found])
+            result["documents"].append([item[1] for item, _ in found])
+            result["metadatas"].append([item[2] for item, _ in found])
+            result["distances"].append([distance for _, distance in found])
+
+        for field in ("documents", "metadatas", "distances"):
+            if field not in include:
+                result[field] = None
+        return result
+
+    def get(self, ids=None, where=None, include=DEFAULT_GET_INCLUDE, limit=None, offset=0):
+        rows = select_payload(self.payload, ids, where, limit, offset)
+        result = {"ids": [row[1] for row in rows], "documents": None, "metadatas": None, "embeddings": None}
+        if "documents" in include:
+            result["documents"] = [row[2] for row in rows]
+        if "metadatas" in include:
+            result["metadatas"] = [row[3] for row in rows]
+        if "embeddings" in include:
+            with self._lock:
+                row_map = self._row_map()
+                result["embeddings"] = [
+                    np.asarray(self._vectors[row_map[row[0]]], dtype=np.float32).tolist() for row in rows
+                ]
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._vectors = None
+            self.dimension = None
+            self.dtype = self.configured_dtype
+            self.size = 0
+            self.norms = np.empty(0, dtype=np.float32)
+            self.valid = np.empty(0, dtype=bool)
+            self.row_ids = np.empty(0, dtype=np.int64)
+            self._rows = None
+            self._row_metadata = None
+            self._masks = {}
+            self._dirty = False
+            self.payload.clear()
+            for name in ("vectors.bin", "norms.npy", "valid.npy", "row_ids.npy", "meta.json"):
+                path = self._path(name)
+                if os.path.exists(path):
+                    os.remove(path)
@@ -1,15 +1,26 @@
+import asyncio
 import numpy as np
-from typing import List, Dict, Optional, Tuple
-import chromadb
-from chromadb.config import Settings
+from typing import List, Dict, Optional, Tuple, AsyncIterator
 import os
 import json
-import requests
 import logging
+import time
+import httpx
 from pathlib import Path
 
+from ..config.settings import settings
+from .embedding_cache import get_embedding_cache
+from .ollama_client import OllamaClient, AsyncOllamaClient, OllamaError, ConcurrencyLimit
+from .search_cache import SearchCache, cache_key
+from .vector_store import create_vector_store
+from .text_chunker import TextChunker
+from .context_builder import ContextBuilder, PackedContext
+from .document_chunks import iter_chunk_records, find_stale_chunk_ids, find_document_chunk_ids, aggregate_by_file
+
 logger = logging.getLogger(__name__)
 
+NO_DOCUMENTS_ANSWER = "Nenašel jsem žádné dokumenty, které by se k dotazu vztahovaly."
+
 class OllamaAISearchService:
     def __init__(self, 
                  ollama_url: str = "http://localhost:11434",
@@ -23,14 +34,21 @@ class OllamaAISearchService:
             ollama_url: URL Ollama API
             embedding_model: Název embedding modelu
             llm_model: Název LLM modelu pro generování
-            chroma_persist_directory: Adresář pro ukládání ChromaDB
+            chroma_persist_directory: Adresář pro ukládání vektorové DB
         """
         self.ollama_url = ollama_url
         self.embedding_model = embedding_model
         self.llm_model = llm_model
         self.chroma_persist_directory = chroma_persist_directory
-        self.chroma_client = None
         self.collection = None
+        # Sync i async klient sdílí jeden limit OLLAMA_MAX_PARALLEL
+        ollama_limit = ConcurrencyLimit(settings.OLLAMA_MAX_PARALLEL)
+        self.client = OllamaClient(ollama_url, limit=ollama_limit)
+        self.async_client = AsyncOllamaClient(ollama_url, limit=ollama_limit)
+        self.search_cache = SearchCache(settings.QUERY_CACHE_SIZE, settings.RESULT_CACHE_SIZE)
+        # Ollama nezveřejňuje tokenizer, chunky se dělí podle znaků
+        self.chunker = TextChunker(settings.CHUNK_SIZE, settings.CHUNK_OVERLAP)
+        self.context_builder = ContextBuilder()
         
         # Vytvoří adresář pro embeddings
         os.makedirs(chroma_persist_directory, exist_ok=True)
@@ -38,24 +56,17 @@ class OllamaAISearchService:
         self._initialize_services()
     
     def _initialize_services(self):
-        """Inicializuje Ollama a ChromaDB"""
+        """Inicializuje Ollama a vektorovou DB"""
         try:
             # Otestuje připojení k Ollama
             logger.info("Testuji připojení k Ollama...")
-            response = requests.get(f"{self.ollama_url}/api/tags")
-            if response.status_code != 200:
-                raise RuntimeError("Ollama není dostupné")
-            
-            # Inicializuje ChromaDB
-            logger.info("Inicializuji ChromaDB")
-            self.chroma_client = chromadb.PersistentClient(
-                path=self.chroma_persist_directory,
-                settings=Settings(anonymized_telemetry=False)
-            )
+            self.client.list_models()
             
-            # Vytvoří nebo načte kolekci
-            self.collection = self.chroma_client.get_or_create_collection(
-                name="dex_search_documents_ollama",
+            # Vytvoří nebo načte kolekci ve vektorové DB podle VECTOR_DB_TYPE
+            logger.info(f"Inicializuji vektorovou DB ({settings.VECTOR_DB_TYPE})")
+            self.collection = create_vector_store(
+                "dex_search_documents_ollama",
+                self.chroma_persist_directory,
                 metadata={"description": "Dex Search dokumenty s Ollama embeddings"}
             )
             
@@ -65,44 +76,70 @@ class OllamaAISearchService:
             logger.error(f"❌ Chyba při inicializaci Ollama AI Search: {e}")
             raise
     
-    def create_embeddings(self, texts: List[str]) -> List[List[float]]:
+    def create_embeddings(self, texts: List[str], use_cache: bool = True) -> List[List[float]]:
         """
         Vytvoří embeddings pomocí Ollama
         
         Args:
             texts: Seznam textů k vektorizaci
+            use_cache: Použít perzistentní cache embeddingů (ne pro dotazy - jednorázové
+                texty by z ní vytlačily chunky)
             
         Returns:
             Seznam embedding vektorů
         """
         try:
-            embeddings = []
-            for text in texts:
-                # Volá Ollama API pro embedding
-                response = requests.post(
-                    f"{self.ollama_url}/api/embeddings",
-                    json={
-                        "model": self.embedding_model,
-                        "prompt": text
-                    }
-                )
-                
-                if response.status_code == 200:
-                    embedding = response.json()["embedding"]
-                    embeddings.append(embedding)
-                else:
-                    logger.error(f"Chyba při vytváření embedding: {response.text}")
-                    raise RuntimeError("Chyba při vytváření embedding")
+            cache = get_embedding_cache() if use_cache else None
+            if cache is None:
+                return self._request_embeddings(texts)
             
-            return embeddings
+            # Texty, které už byly vektorizovány, se neposílají do Ollama
+            embeddings = cache.get_or_compute(
+                f"ollama:{self.embedding_model}",
+                texts,
+                self._request_embeddings
+            )
+            return embeddings.tolist()
             
         except Exception as e:
             logger.error(f"Chyba při vytváření embeddings: {e}")
             raise
     
+    async def create_embeddings_async(self, texts: List[str], use_cache: bool = True) -> List[List[float]]:
+        """
+        Vytvoří embeddings pomocí Ollama bez blokování event loopu
+        
+        Args:
+            texts: Seznam textů k vektorizaci
+            use_cache: Použít perzistentní cache embeddingů (ne pro dotazy)
+            
+        Returns:
+            Seznam embedding vektorů
+        """
+        cache = get_embedding_cache() if use_cache else None
+        if cache is None:
+            return await self.async_client.embed(self.embedding_model, texts)
+        
+        embeddings = await cache.get_or_compute_async(
+            f"ollama:{self.embedding_model}",
+            texts,
+            lambda missing: self.async_client.embed(self.embedding_model, missing)
+        )
+        return embeddings.tolist()
+    
+    def _embed_query(self, query: str) -> List[float]:
+        """Embedding dotazu přes LRU cache v paměti"""
+        return self.search_cache.get_query_embedding(query, lambda text: self.create_embeddings([text], use_cache=False)[0])
+    
+    def _request_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Vytvoří embeddings voláním Ollama API (dávky přes /api/embed)"""
+        return self.client.embed(self.embedding_model, texts)
+    
     def add_documents(self, documents: List[Dict]) -> bool:
         """
-        Přidá dokumenty do ChromaDB s Ollama embeddings
+        Přidá dokumenty do vektorové DB s Ollama embeddings
+        
+        Dokumenty se dělí na chunky s jedním vektorem na chunk.
         
         Args:
             documents: Seznam dokumentů
@@ -111,51 +148,123 @@ class OllamaAISearchService:
             True pokud se povedlo přidat dokumenty
         """
         if not self.collection:
-            raise RuntimeError("ChromaDB kolekce není inicializována")
+            raise RuntimeError("Vektorová kolekce není inicializována")
         
         try:
-            # Připraví data pro ChromaDB
-            ids = []
-            texts = []
-            metadatas = []
+            chunk_counts: Dict[int, int] = {}
+            batch = []
+            first_chunks = []
+            total_chunks = 0
             
-            for doc in documents:
-                # Vytvoří unikátní ID
-                doc_id = f"doc_{doc['id']}"
-                ids.append(doc_id)
-                
-                # Text pro embedding (kombinuje název a obsah)
-                text = f"{doc['file_name']}\n\n{doc['content_text']}"
-                texts.append(text)
-                
-                # Metadata
-                metadata = {
-                    'file_path': doc['file_path'],
-                    'file_name': doc['file_name'],
-                    'file_type': doc['file_type'],
-                    'watched_item_name': doc['watched_item_name'],
-                    'file_size': doc.get('file_size', 0)
-                }
-                metadatas.append(metadata)
+            for record in iter_chunk_records(documents, self.chunker):
+                chunk_counts[record.metadata['doc_id']] = record.metadata['total_chunks']
+                # První chunk nese content_hash pro synchronizaci - zapíše se až nakonec,
+                # aby dokument po chybě v další dávce nevypadal jako zaindexovaný
+                if record.metadata['chunk_index'] == 0:
+                    first_chunks.append(record)
+                    continue
+                batch.append(record)
+                if len(batch) >= settings.VECTOR_UPSERT_BATCH_SIZE:
+                    self._upsert_chunks(batch)
+                    total_chunks += len(batch)
+                    batch = []
+            if batch:
+                self._upsert_chunks(batch)
+                total_chunks += len(batch)
             
-            # Vytvoří embeddings pomocí Ollama
-            embeddings = self.create_embeddings(texts)
+            # Smaže chunky, které po zkrácení dokumentu přebývají
+            stale_ids = find_stale_chunk_ids(self.collection, documents, chunk_counts)
+            if stale_ids:
+                self.collection.delete(ids=stale_ids)
             
-            # Přidá do ChromaDB
-            self.collection.add(
-                embeddings=embeddings,
-                documents=texts,
-                metadatas=metadatas,
-                ids=ids
-            )
+            for start in range(0, len(first_chunks), settings.VECTOR_UPSERT_BATCH_SIZE):
+                self._upsert_chunks(first_chunks[start:start + settings.VECTOR_UPSERT_BATCH_SIZE])
+            total_chunks += len(first_chunks)
+            # Jedno uložení indexu na dávku (faiss/numpy odkládají zápis na disk)
+            self.collection.flush()
             
-            logger.info(f"Přidáno {len(documents)} dokumentů do Ollama AI indexu")
+            self.search_cache.bump()
+            logger.info(f"Přidáno {len(documents)} dokumentů ({total_chunks} chunků) do Ollama AI indexu")
             return True
             
         except Exception as e:
             logger.error(f"Chyba při přidávání dokumentů: {e}")
             return False
     
+    def _upsert_chunks(self, records: List) -> None:
+        """Vytvoří embeddings pro dávku chunků pomocí Ollama a zapíše je"""
+        embeddings = self.create_embeddings([record.embedding_text for record in records])
+        
+        self.collection.upsert(
+            ids=[record.id for record in records],
+            embeddings=embeddings,
+            documents=[record.document for record in records],
+            metadatas=[record.metadata for record in records]
+        )
+    
+    def delete_documents(self, doc_ids: List[int]) -> int:
+        """
+        Smaže dokumenty (všechny jejich chunky) z AI indexu
+        
+        Args:
+            doc_ids: ID dokumentů (indexed_files.id)
+            
+        Returns:
+            Počet smazaných záznamů
+        """
+        if not self.collection:
+            raise RuntimeError("Vektorová kolekce není inicializována")
+        
+        ids = find_document_chunk_ids(self.collection, doc_ids)
+        if ids:
+            self.collection.delete(ids=ids)
+            self.collection.flush()
+            self.search_cache.bump()
+        return len(ids)
+    
+    def _query_chunks(self, query: str, n_results: int,
+                      file_types: Optional[List[str]] = None,
+                      watched_items: Optional[List[str]] = None) -> List[Dict]:
+        """Nejbližší chunky k dotazu seřazené od nejlepšího"""
+        # Vytvoří embedding pro dotaz pomocí Ollama
+        query_embedding = self._embed_query(query)
+        
+        # Připraví filtry
+        where_clause = {}
+        if file_types:
+            where_clause['file_type'] = {"$in": file_types}
+        if watched_items:
+            where_clause['watched_item_name'] = {"$in": watched_items}
+        
+        results = self.collection.query(
+            query_embeddings=[query_embedding],
+            n_results=n_results,
+            where=where_clause if where_clause else None,
+            include=['metadatas', 'distances', 'documents']
+        )
+        
+        # Zformátuje výsledky
+        formatted_results = []
+        if results['ids'] and results['ids'][0]:
+            for i in range(len(results['ids'][0])):
+                metadata = results['metadatas'][0][i]
+                result = {
+                    'id': f"doc_{metadata['doc_id']}" if 'doc_id' in metadata else results['ids'][0][i],
+                    'chunk_id': results['ids'][0][i],
+                    'chunk_index': metadata.get('chunk_index'),
+                    'char_start': metadata.get('char_start'),
+                    'char_end': metadata.get('char_end'),
+                    'file_path': metadata['file_path'],
+                    'file_name': metadata['file_name'],
+                    'file_type': metadata['file_type'],
+                    'watched_item_name': metadata['watched_item_name'],
+                    'content_text': results['documents'][0][i],
+                    'relevance_score': 1.0 - results['distances'][0][i],
+                    'distance': results['distances'][0][i]
+                }
+                formatted_results.append(result)
+        return formatted_results
+    
     def search_documents(self, query: str, limit: int = 10, 
                         file_types: Optional[List[str]] = None,
                         watched_items: Optional[List[str]] = None) -> List[Dict]:
@@ -172,70 +281,113 @@ class OllamaAISearchService:
             Seznam nalezených dokumentů s relevancí
         """
         if not self.collection:
-            raise RuntimeError("ChromaDB kolekce není inicializována")
+            raise RuntimeError("Vektorová kolekce není inicializována")
+        
+        key = cache_key("search", query, limit, file_types or (), watched_items or ())
+        cached = self.search_cache.get_results(key)
+        if cached is not None:
+            return [dict(result) for result in cached]
+        generation = self.search_cache.generation
         
         try:
-            # Vytvoří embedding pro dotaz pomocí Ollama
-            query_embeddings = self.create_embeddings([query])
-            query_embedding = query_embeddings[0]
-            
-            # Připraví filtry
-            where_clause = {}
-            if file_types:
-                where_clause['file_type'] = {"$in": file_types}
-            if watched_items:
-                where_clause['watched_item_name'] = {"$in": watched_items}
-            
-            # Provede vyhledávání
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=limit,
-                where=where_clause if where_clause else None,
-                include=['metadatas', 'distances', 'documents']
+            # Víc chunků, spojí se podle souborů
+            chunk_results = self._query_chunks(
+                query, limit * settings.CHUNK_SEARCH_MULTIPLIER, file_types, watched_items
             )
+            formatted_results = aggregate_by_file(chunk_results, limit)
             
-            # Zformátuje výsledky
-            formatted_results = []
-            if results['ids'] and results['ids'][0]:
-                for i in range(len(results['ids'][0])):
-                    result = {
-                        'id': results['ids'][0][i],
-                        'file_path': results['metadatas'][0][i]['file_path'],
-                        'file_name': results['metadatas'][0][i]['file_name'],
-                        'file_type': results['metadatas'][0][i]['file_type'],
-                        'watched_item_name': results['metadatas'][0][i]['watched_item_name'],
-                        'content_text': results['documents'][0][i],
-                        'relevance_score': 1.0 - results['distances'][0][i],
-                        'distance': results['distances'][0][i]
-                    }
-                    formatted_results.append(result)
-            
-            return formatted_results
+            self.search_cache.put_results(key, formatted_results, generation)
+            return [dict(result) for result in formatted_results]
             
         except Exception as e:
             logger.error(f"Chyba při vyhledávání: {e}")
             return []
     
-    def generate_answer(self, query: str, context_documents: List[Dict], max_length: int = 500) -> str:
+    def search_chunks(self, query: str, limit: int = 5,
+                      file_types: Optional[List[str]] = None,
+                      watched_items: Optional[List[str]] = None) -> List[Dict]:
         """
-        Generuje odpověď pomocí Ollama LLM
+        Vyhledá nejrelevantnější chunky (bez spojení podle souborů) pro kontext LLM
         
         Args:
-            query: Uživatelský dotaz
-            context_documents: Seznam relevantních dokumentů
-            max_length: Maximální délka odpovědi
+            query: Vyhledávací dotaz
+            limit: Maximální počet chunků
+            file_types: Filtrování podle typů souborů
+            watched_items: Filtrování podle sledovaných položek
             
         Returns:
-            Generovaná odpověď
+            Chunky seřazené od nejrelevantnějšího
         """
-        try:
-            # Připraví kontext z dokumentů
-            context = ""
-            for i, doc in enumerate(context_documents[:3]):  # Použije max 3 dokumenty
-                context += f"Dokument {i+1} ({doc['file_name']}):\n{doc['content_text'][:1000]}...\n\n"
-            
-            # Vytvoří prompt pro LLM
-            prompt = f"""Na základě následujících dokumentů odpověz na otázku uživatele.
+        if not self.collection:
+            raise RuntimeError("Vektorová kolekce není inicializována")
+        
+        key = cache_key("chunks", query, limit, file_types or (), watched_items or ())
+        cached = self.search_cache.get_results(key)
+        if cached is not None:
+            return [dict(result) for result in cached]
+        generation = self.search_cache.generation
+        
+        chunk_results = self._query_chunks(query, limit, file_types, watched_items)
+        self.search_cache.put_results(key, chunk_results, generation)
+        return [dict(result) for result in chunk_results]
+    
+    async def _prefetch_query_embedding(self, query: str) -> None:
+        """Spočítá embedding dotazu asynchronně, aby ho synchronní vyhledávání vzalo z cache"""
+        if self.search_cache.query_embeddings.get(query) is None:
+            query_embedding = (await self.create_embeddings_async([query], use_cache=False))[0]
+            self.search_cache.query_embeddings.put(query, query_embedding)
+    
+    async def search_documents_async(self, query: str, limit: int = 10,
+                                     file_types: Optional[List[str]] = None,
+                                     watched_items: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Vyhledá dokumenty bez blokování event loopu
+        
+        Embedding dotazu se spočítá asynchronně a uloží do cache dotazů,
+        vektorové vyhledávání pak běží v executoru. Parametry jsou stejné
+        jako u search_documents.
+        """
+        await self._prefetch_query_embedding(query)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, lambda: self.search_documents(query, limit, file_types, watched_items)
+        )
+    
+    async def search_chunks_async(self, query: str, limit: int = 5,
+                                  file_types: Optional[List[str]] = None,
+                                  watched_items: Optional[List[str]] = None) -> List[Dict]:
+        """Vyhledá chunky bez blokování event loopu (parametry jako search_chunks)"""
+        await self._prefetch_query_embedding(query)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, lambda: self.search_chunks(query, limit, file_types, watched_items)
+        )
+    
+    @staticmethod
+    def citations(packed: PackedContext) -> List[Dict]:
+        """
+        Kompaktní citace úseků použitých jako kontext (bez textu)
+        
+        Číslo citace odpovídá "Dokument N" v promptu.
+        """
+        return [
+            {
+                'id': i + 1,
+                'file_path': passage.file_path,
+                'file_name': passage.file_name,
+                'chunk_index': passage.chunk_index,
+                'char_start': passage.char_start,
+                'char_end': passage.char_end,
+                'score': round(passage.score, 4)
+            }
+            for i, passage in enumerate(packed.passages)
+        ]
+    
+    def _answer_prompt(self, query: str, packed: PackedContext) -> str:
+        """Prompt pro odpověď z dokumentů"""
+        context = self.context_builder.format(packed)
+        
+        return f"""Na základě následujících dokumentů odpověz na otázku uživatele.
 
 Dokumenty:
 {context}
@@ -243,94 +395,178 @@ Dokumenty:
 Otázka: {query}
 
 Odpověď:"""
+    
+    async def generate_answer_async(self, query: str, context_documents: List[Dict], max_length: int = 500) -> str:
+        """
+        Generuje odpověď pomocí Ollama LLM bez blokování event loopu
+        
+        Zrušení korutiny (odpojení klienta) zavře spojení a Ollama přestane
+        generovat.
+        
+        Args:
+            query: Uživatelský dotaz
+            context_documents: Seznam relevantních dokumentů
+            max_length: Maximální délka odpovědi
             
-            # Volá Ollama API pro generování
-            response = requests.post(
-                f"{self.ollama_url}/api/generate",
-                json={
-                    "model": self.llm_model,
-                    "prompt": prompt,
-                    "stream": False,
-                    "options": {
-                        "num_predict": max_length,
-                        "temperature": 0.7
-                    }
-                }
+        Returns:
+            Generovaná odpověď
+        """
+        return await self._generate_packed_async(query, self.context_builder.build(context_documents), max_length)
+    
+    async def _generate_packed_async(self, query: str, packed: PackedContext, max_length: int) -> str:
+        """Odpověď z již sestaveného kontextu"""
+        try:
+            result = await self.async_client.generate(
+                self.llm_model,
+                self._answer_prompt(query, packed),
+                {"num_predict": max_length, "temperature": 0.7}
             )
-            
-            if response.status_code == 200:
-                result = response.json()
-                return result["response"]
-            else:
-                logger.error(f"Chyba při generování odpovědi: {response.text}")
-                return "Omlouvám se, nepodařilo se vygenerovat odpověď."
-                
-        except Exception as e:
+            return result["response"]
+        except OllamaError as e:
             logger.error(f"Chyba při generování odpovědi: {e}")
+            return "Omlouvám se, nepodařilo se vygenerovat odpověď."
+        except httpx.HTTPError as e:
+            logger.error(f"Chyba při generování odpovědi: {e!r}")
             return "Omlouvám se, došlo k chybě při generování odpovědi."
     
-    def get_search_suggestions(self, query: str, limit: int = 5) -> List[str]:
+    async def stream_answer(self, query: str, context_documents: List[Dict],
+                            max_length: int = 500) -> AsyncIterator[Tuple[str, Dict]]:
         """
-        Generuje návrhy pro vyhledávání pomocí Ollama
+        Generuje odpověď po tokenech (streamování z Ollama)
+        
+        Ukončení iterace (odpojení klienta) zavře spojení s Ollama, takže se
+        generování zastaví.
         
         Args:
-            query: Částečný dotaz
-            limit: Počet návrhů
+            query: Uživatelský dotaz
+            context_documents: Seznam relevantních dokumentů
+            max_length: Maximální délka odpovědi
             
-        Returns:
-            Seznam návrhů
+        Yields:
+            ("token", {"text"}) pro každou část odpovědi, nakonec ("done", metriky):
+            ttft_ms (čas do prvního tokenu), tokens, prompt_tokens, context_tokens,
+            tokens_per_second, elapsed_ms
         """
+        events = self._stream_packed(query, self.context_builder.build(context_documents), max_length)
         try:
-            prompt = f"""Na základě následujícího částečného dotazu vygeneruj {limit} podobných dotazů pro vyhledávání v dokumentech.
-
-Částečný dotaz: "{query}"
-
-Návrhy:"""
-            
-            response = requests.post(
-                f"{self.ollama_url}/api/generate",
-                json={
-                    "model": self.llm_model,
-                    "prompt": prompt,
-                    "stream": False,
-                    "options": {
-                        "num_predict": 200,
-                        "temperature": 0.8
-                    }
-                }
-            )
+            async for event in events:
+                yield event
+        finally:
+            await events.aclose()
+    
+    async def _stream_packed(self, query: str, packed: PackedContext,
+                             max_length: int) -> AsyncIterator[Tuple[str, Dict]]:
+        """Streamovaná odpověď z již sestaveného kontextu"""
+        start = time.perf_counter()
+        first_token_at = None
+        tokens = 0
+        final: Dict = {}
+        
+        async for chunk in self.async_client.stream_generate(
+            self.llm_model,
+            self._answer_prompt(query, packed),
+            {"num_predict": max_length, "temperature": 0.7}
+        ):
+            text = chunk.get("response", "")
+            if text:
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                tokens += 1
+                yield "token", {"text": text}
+            if chunk.get("done"):
+                final = chunk
+        
+        end = time.perf_counter()
+        # Ollama posílá v poslední části přesné počty a časy (ns), jinak se odhadnou z částí
+        eval_count = final.get("eval_count") or tokens
+        eval_duration = final.get("eval_duration")
+        if eval_duration:
+            generation_seconds = eval_duration / 1e9
+        else:
+            generation_seconds = end - (first_token_at or end)
+        
+        yield "done", {
+            "ttft_ms": round((first_token_at - start) * 1000, 1) if first_token_at else None,
+            "tokens": eval_count,
+            "prompt_tokens": final.get("prompt_eval_count"),
+            "context_tokens": packed.tokens,
+            "tokens_per_second": round(eval_count / generation_seconds, 1) if generation_seconds > 0 else None,
+            "elapsed_ms": round((end - start) * 1000, 1)
+        }
+    
+    async def ask(self, query: str, max_length: int = 500,
+                  file_types: Optional[List[str]] = None,
+                  watched_items: Optional[List[str]] = None) -> Dict:
+        """
+        Odpověď na dotaz z indexovaných dokumentů (vyhledání chunků + generování)
+        
+        Kontext se sestaví na serveru z nejlepších nalezených chunků v rozpočtu
+        tokenů, klient dostane jen odpověď a kompaktní citace (bez textu dokumentů).
+        
+        Args:
+            query: Uživatelský dotaz
+            max_length: Maximální délka odpovědi
+            file_types: Filtrování podle typů souborů
+            watched_items: Filtrování podle sledovaných položek
             
-            if response.status_code == 200:
-                result = response.json()
-                suggestions_text = result["response"]
-                
-                # Zpracuje návrhy
-                suggestions = []
-                lines = suggestions_text.strip().split('\n')
-                for line in lines:
-                    line = line.strip()
-                    if line and not line.startswith('Návrhy:') and len(line) > 3:
-                        suggestions.append(line)
-                        if len(suggestions) >= limit:
-                            break
-                
-                return suggestions[:limit]
-            else:
-                return []
-                
-        except Exception as e:
-            logger.error(f"Chyba při generování návrhů: {e}")
-            return []
+        Returns:
+            answer, citations, context_tokens a časy retrieval_ms, generation_ms
+        """
+        start = time.perf_counter()
+        chunks = await self.search_chunks_async(query, settings.LLM_CONTEXT_CANDIDATES, file_types, watched_items)
+        packed = self.context_builder.build(chunks)
+        retrieved = time.perf_counter()
+        
+        if packed.passages:
+            answer = await self._generate_packed_async(query, packed, max_length)
+        else:
+            answer = NO_DOCUMENTS_ANSWER
+        
+        return {
+            "answer": answer,
+            "citations": self.citations(packed),
+            "context_tokens": packed.tokens,
+            "retrieval_ms": round((retrieved - start) * 1000, 1),
+            "generation_ms": round((time.perf_counter() - retrieved) * 1000, 1)
+        }
+    
+    async def stream_ask(self, query: str, max_length: int = 500,
+                         file_types: Optional[List[str]] = None,
+                         watched_items: Optional[List[str]] = None) -> AsyncIterator[Tuple[str, Dict]]:
+        """
+        Jako ask, ale odpověď se generuje po tokenech
+        
+        Yields:
+            ("context", {"citations", "context_tokens", "retrieval_ms"}), pak události stream_answer
+        """
+        start = time.perf_counter()
+        chunks = await self.search_chunks_async(query, settings.LLM_CONTEXT_CANDIDATES, file_types, watched_items)
+        packed = self.context_builder.build(chunks)
+        yield "context", {
+            "citations": self.citations(packed),
+            "context_tokens": packed.tokens,
+            "retrieval_ms": round((time.perf_counter() - start) * 1000, 1)
+        }
+        
+        if not packed.passages:
+            yield "token", {"text": NO_DOCUMENTS_ANSWER}
+            yield "done", {"ttft_ms": None, "tokens": 0, "prompt_tokens": None, "context_tokens": 0,
+                           "tokens_per_second": None, "elapsed_ms": 0.0}
+            return
+        
+        events = self._stream_packed(query, packed, max_length)
+        try:
+            async for event in events:
+                yield event
+        finally:
+            await events.aclose()
     
     def clear_index(self) -> bool:
         """Vyčistí AI index"""
         try:
             if self.collection:
-                self.chroma_client.delete_collection("dex_search_documents_ollama")
-                self.collection = self.chroma_client.create_collection(
-                    name="dex_search_documents_ollama",
-                    metadata={"description": "Dex Search dokumenty s Ollama embeddings"}
-                )
+                self.collection.reset()
+                self.search_cache.bump()
                 logger.info("AI index vyčištěn")
                 return True
         except Exception as e:
@@ -346,7 +582,9 @@ Návrhy:"""
                     "total_documents": count,
                     "embedding_model": self.embedding_model,
                     "llm_model": self.llm_model,
-                    "chroma_persist_directory": self.chroma_persist_directory
+                    "vector_db": self.collection.backend,
+                    "chroma_persist_directory": self.chroma_persist_directory,
+                    "search_cache": self.search_cache.get_stats()
                 }
             return {"total_documents": 0}
         except Exception as e:
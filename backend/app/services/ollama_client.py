@@ -0,0 +1,408 @@
+import asyncio
+import json
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, AsyncIterator
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from ..config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+class OllamaError(RuntimeError):
+    """Chybná odpověď Ollama API"""
+
+class ConcurrencyLimit:
+    """
+    Limit souběžných požadavků na Ollama sdílený vlákny i korutinami
+
+    Sync klient čeká na slot blokujícím voláním, async klient přes future
+    svého event loopu - jeden limit tak platí pro indexaci ve vláknech
+    i pro async routes dohromady. Uvolněný slot se předá rovnou dalšímu
+    čekajícímu v pořadí příchodu.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._active = 0
+        self._lock = threading.Lock()
+        self._waiters: deque = deque()
+
+    def acquire(self) -> None:
+        """Počká na volný slot (blokuje vlákno)"""
+        with self._lock:
+            if self._active < self.limit and not self._waiters:
+                self._active += 1
+                return
+            waiter = _Waiter(event=threading.Event())
+            self._waiters.append(waiter)
+        waiter.event.wait()
+
+    async def acquire_async(self) -> None:
+        """Počká na volný slot bez blokování event loopu"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._active < self.limit and not self._waiters:
+                self._active += 1
+                return
+            waiter = _Waiter(future=loop.create_future())
+            self._waiters.append(waiter)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._lock:
+                granted = waiter.granted
+                if not granted:
+                    self._waiters.remove(waiter)
+            if granted:
+                # Slot už byl předán zrušené korutině, pošle se dál
+                self.release()
+            raise
+
+    def release(self) -> None:
+        """Uvolní slot, případně ho předá dalšímu čekajícímu"""
+        with self._lock:
+            if not self._waiters:
+                self._active -= 1
+                return
+            waiter = self._waiters.popleft()
+            waiter.granted = True
+        if waiter.event is not None:
+            waiter.event.set()
+            return
+        try:
+            waiter.future.get_loop().call_soon_threadsafe(_resolve, waiter.future)
+        except RuntimeError:
+            # Event loop čekajícího už neběží
+            self.release()
+
+    def __enter__(self) -> "ConcurrencyLimit":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+    async def __aenter__(self) -> "ConcurrencyLimit":
+        await self.acquire_async()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.release()
+
+class _Waiter:
+    """Čekající na slot - vlákno (event) nebo korutina (future)"""
+
+    __slots__ = ("event", "future", "granted")
+
+    def __init__(self, event: Optional[threading.Event] = None,
+                 future: Optional[asyncio.Future] = None):
+        self.event = event
+        self.future = future
+        self.granted = False
+
+def _resolve(future: asyncio.Future) -> None:
+    # Zrušenou future ošetří acquire_async (slot pošle dál)
+    if not future.done():
+        future.set_result(None)
+
+class OllamaClient:
+    """
+    Synchronní klient Ollama API
+
+    Všechny požadavky jdou přes jednu requests.Session s poolem keep-alive
+    spojení. Embeddingy se posílají po dávkách na /api/embed (pole "input"),
+    dávky běží souběžně, ale nejvýše max_parallel najednou - víc by Ollama
+    stejně jen řadila do fronty (OLLAMA_NUM_PARALLEL). Limit platí pro všechny
+    požadavky klienta a lze ho sdílet s AsyncOllamaClient.
+    """
+
+    def __init__(self, base_url: str,
+                 batch_size: Optional[int] = None,
+                 max_parallel: Optional[int] = None,
+                 connect_timeout: Optional[float] = None,
+                 read_timeout: Optional[float] = None,
+                 limit: Optional[ConcurrencyLimit] = None):
+        """
+        Args:
+            base_url: URL Ollama API
+            batch_size: Počet textů v jednom požadavku (výchozí settings.OLLAMA_EMBED_BATCH_SIZE)
+            max_parallel: Max. souběžných požadavků (výchozí settings.OLLAMA_MAX_PARALLEL)
+            connect_timeout: Timeout navázání spojení v s (výchozí settings.OLLAMA_CONNECT_TIMEOUT)
+            read_timeout: Timeout odpovědi v s (výchozí settings.OLLAMA_READ_TIMEOUT)
+            limit: Sdílený limit souběžných požadavků (výchozí vlastní s max_parallel)
+        """
+        self.base_url = base_url.rstrip("/")
+        self.batch_size = batch_size or settings.OLLAMA_EMBED_BATCH_SIZE
+        self.limit = limit or ConcurrencyLimit(max_parallel or settings.OLLAMA_MAX_PARALLEL)
+        self.max_parallel = self.limit.limit
+        self.timeout = (
+            connect_timeout or settings.OLLAMA_CONNECT_TIMEOUT,
+            read_timeout or settings.OLLAMA_READ_TIMEOUT
+        )
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_parallel)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        # Ollama < 0.3 nemá /api/embed, jen /api/embeddings s jedním textem
+        self._legacy_embeddings = False
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_parallel, thread_name_prefix="ollama-embed"
+                )
+            return self._executor
+
+    def list_models(self) -> List[Dict]:
+        """Modely dostupné v Ollama (zároveň test připojení)"""
+        with self.limit:
+            response = self.session.get(f"{self.base_url}/api/tags", timeout=self.timeout)
+        if response.status_code != 200:
+            raise OllamaError(f"Ollama není dostupné ({response.status_code})")
+        return response.json().get("models", [])
+
+    def embed(self, model: str, texts: List[str]) -> List[List[float]]:
+        """
+        Embeddingy textů
+
+        Args:
+            model: Název embedding modelu
+            texts: Texty k vektorizaci
+
+        Returns:
+            Embeddingy ve stejném pořadí jako texty
+        """
+        if not texts:
+            return []
+
+        batches = [texts[start:start + self.batch_size] for start in range(0, len(texts), self.batch_size)]
+        if len(batches) == 1:
+            return self._embed_batch(model, batches[0])
+
+        # map zachová pořadí dávek, počet vláken omezuje souběžné požadavky
+        embeddings: List[List[float]] = []
+        for batch_embeddings in self._get_executor().map(lambda batch: self._embed_batch(model, batch), batches):
+            embeddings.extend(batch_embeddings)
+        return embeddings
+
+    def _embed_batch(self, model: str, texts: List[str]) -> List[List[float]]:
+        """Jedna dávka embeddingů přes /api/embed"""
+        if self._legacy_embeddings:
+            return [self._embed_legacy(model, text) for text in texts]
+
+        with self.limit:
+            response = self.session.post(
+                f"{self.base_url}/api/embed",
+                json={"model": model, "input": texts},
+                timeout=self.timeout
+            )
+        if response.status_code == 404 and "model" not in response.text.lower():
+            logger.warning("Ollama nepodporuje /api/embed, používám /api/embeddings po jednom textu")
+            self._legacy_embeddings = True
+            return [self._embed_legacy(model, text) for text in texts]
+        if response.status_code != 200:
+            raise OllamaError(f"Chyba při vytváření embeddings: {response.text}")
+
+        embeddings = response.json()["embeddings"]
+        if len(embeddings) != len(texts):
+            raise OllamaError(f"Ollama vrátila {len(embeddings)} embeddingů pro {len(texts)} textů")
+        return embeddings
+
+    def _embed_legacy(self, model: str, text: str) -> List[float]:
+        """Embedding jednoho textu přes starší /api/embeddings"""
+        with self.limit:
+            response = self.session.post(
+                f"{self.base_url}/api/embeddings",
+                json={"model": model, "prompt": text},
+                timeout=self.timeout
+            )
+        if response.status_code != 200:
+            raise OllamaError(f"Chyba při vytváření embedding: {response.text}")
+        return response.json()["embedding"]
+
+    def close(self) -> None:
+        """Zavře spojení a vlákna"""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+        self.session.close()
+
+class AsyncOllamaClient:
+    """
+    Asynchronní klient Ollama API (httpx) pro volání z async routes
+
+    Požadavky neblokují event loop. ConcurrencyLimit omezuje souběžné
+    požadavky na max_parallel - další čekají v aplikaci, ne ve frontě Ollama,
+    takže jejich zrušení (např. odpojení klienta) nic nestojí. Se sdíleným
+    limitem se do něj počítají i požadavky sync klienta. Zrušená korutina
+    zavře spojení a Ollama přestane generovat.
+    """
+
+    def __init__(self, base_url: str,
+                 batch_size: Optional[int] = None,
+                 max_parallel: Optional[int] = None,
+                 connect_timeout: Optional[float] = None,
+                 read_timeout: Optional[float] = None,
+                 limit: Optional[ConcurrencyLimit] = None):
+        """
+        Args:
+            base_url: URL Ollama API
+            batch_size: Počet textů v jednom požadavku (výchozí settings.OLLAMA_EMBED_BATCH_SIZE)
+            max_parallel: Max. souběžných požadavků (výchozí settings.OLLAMA_MAX_PARALLEL)
+            connect_timeout: Timeout navázání spojení v s (výchozí settings.OLLAMA_CONNECT_TIMEOUT)
+            read_timeout: Timeout odpovědi v s (výchozí settings.OLLAMA_READ_TIMEOUT)
+            limit: Sdílený limit souběžných požadavků (výchozí vlastní s max_parallel)
+        """
+        self.base_url = base_url.rstrip("/")
+        self.batch_size = batch_size or settings.OLLAMA_EMBED_BATCH_SIZE
+        self.limit = limit or ConcurrencyLimit(max_parallel or settings.OLLAMA_MAX_PARALLEL)
+        self.max_parallel = self.limit.limit
+        self.connect_timeout = connect_timeout or settings.OLLAMA_CONNECT_TIMEOUT
+        self.read_timeout = read_timeout or settings.OLLAMA_READ_TIMEOUT
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Ollama < 0.3 nemá /api/embed, jen /api/embeddings s jedním textem
+        self._legacy_embeddings = False
+
+    def _timeout(self, read_timeout: Optional[float] = None) -> httpx.Timeout:
+        return httpx.Timeout(read_timeout or self.read_timeout, connect=self.connect_timeout)
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """httpx klient pro aktuální event loop"""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            # Klient je vázaný na event loop (např. nový loop po restartu v testech)
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self._timeout(),
+                limits=httpx.Limits(max_connections=self.max_parallel,
+                                    max_keepalive_connections=self.max_parallel)
+            )
+            self._loop = loop
+        return self._client
+
+    async def _send(self, path: str, payload: Dict, read_timeout: Optional[float] = None) -> httpx.Response:
+        client = self._get_client()
+        async with self.limit:
+            return await client.post(path, json=payload, timeout=self._timeout(read_timeout))
+
+    async def _post(self, path: str, payload: Dict, read_timeout: Optional[float] = None) -> Dict:
+        response = await self._send(path, payload, read_timeout)
+        if response.status_code != 200:
+            raise OllamaError(f"Ollama {path} vrátila {response.status_code}: {response.text}")
+        return response.json()
+
+    async def embed(self, model: str, texts: List[str]) -> List[List[float]]:
+        """
+        Embeddingy textů po dávkách přes /api/embed
+
+        Args:
+            model: Název embedding modelu
+            texts: Texty k vektorizaci
+
+        Returns:
+            Embeddingy ve stejném pořadí jako texty
+        """
+        batches = [texts[start:start + self.batch_size] for start in range(0, len(texts), self.batch_size)]
+        results = await asyncio.gather(*(self._embed_batch(model, batch) for batch in batches))
+
+        embeddings: List[List[float]] = []
+        for batch_embeddings in results:
+            embeddings.extend(batch_embeddings)
+        return embeddings
+
+    async def _embed_batch(self, model: str, texts: List[str]) -> List[List[float]]:
+        """Jedna dávka embeddingů přes /api/embed"""
+        if self._legacy_embeddings:
+            return await self._embed_legacy(model, texts)
+
+        response = await self._send("/api/embed", {"model": model, "input": texts})
+        if response.status_code == 404 and "model" not in response.text.lower():
+            logger.warning("Ollama nepodporuje /api/embed, používám /api/embeddings po jednom textu")
+            self._legacy_embeddings = True
+            return await self._embed_legacy(model, texts)
+        if response.status_code != 200:
+            raise OllamaError(f"Ollama /api/embed vrátila {response.status_code}: {response.text}")
+
+        embeddings = response.json()["embeddings"]
+        if len(embeddings) != len(texts):
+            raise OllamaError(f"Ollama vrátila {len(embeddings)} embeddingů pro {len(texts)} textů")
+        return embeddings
+
+    async def _embed_legacy(self, model: str, texts: List[str]) -> List[List[float]]:
+        """Embeddingy po jednom textu přes starší /api/embeddings"""
+        results = await asyncio.gather(*(
+            self._post("/api/embeddings", {"model": model, "prompt": text}) for text in texts
+        ))
+        return [result["embedding"] for result in results]
+
+    async def generate(self, model: str, prompt: str, options: Optional[Dict] = None,
+                       read_timeout: Optional[float] = None) -> Dict:
+        """
+        Generování bez streamování
+
+        Args:
+            model: Název LLM modelu
+            prompt: Prompt
+            options: Volby modelu (num_predict, temperature, ...)
+            read_timeout: Timeout odpovědi v s (výchozí read_timeout klienta)
+
+        Returns:
+            Odpověď Ollama (klíč "response" s textem)
+        """
+        return await self._post("/api/generate", {
+            "model": model,
+            "prompt": prompt,
+            "stream": False,
+            "options": options or {}
+        }, read_timeout)
+
+    async def stream_generate(self, model: str, prompt: str,
+                              options: Optional[Dict] = None) -> AsyncIterator[Dict]:
+        """
+        Streamované generování
+
+        Timeout čtení platí mezi jednotlivými částmi odpovědi. Ukončení
+        iterace (i zrušením) zavře spojení, takže Ollama generování zastaví.
+
+        Yields:
+            Části odpovědi Ollama ("response" s tokeny, poslední má "done": true)
+        """
+        client = self._get_client()
+        async with self.limit:
+            async with client.stream("POST", "/api/generate", json={
+                "model": model,
+                "prompt": prompt,
+                "stream": True,
+                "options": options or {}
+            }) as response:
+                if response.status_code != 200:
+                    body = await response.aread()
+                    raise OllamaError(f"Ollama /api/generate vrátila {response.status_code}: {body.decode(errors='replace')}")
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    yield chunk
+                    if chunk.get("done"):
+                        break
+
+    async def aclose(self) -> None:
+        """Zavře spojení"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._loop = None
@@ -0,0 +1,433 @@
+import json
+import logging
+import os
+import threading
+from typing import List, Dict, Optional, Tuple, Iterable
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+QUANTIZATION_MODES = ("int8", "binary")
+
+# Počet jedničkových bitů pro každý bajt (popcount pro Hammingovu vzdálenost)
+_POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+def int8_step(ranges: Tuple[np.ndarray, np.ndarray]) -> np.ndarray:
+    """Velikost kvantizačního kroku pro každou dimenzi"""
+    low, high = ranges
+    step = (high - low) / 255.0
+    step[step == 0] = 1.0
+    return step
+
+def quantize_int8(vectors: np.ndarray, ranges: Tuple[np.ndarray, np.ndarray]) -> np.ndarray:
+    """
+    Skalární kvantizace float32 vektorů na int8
+
+    Args:
+        vectors: Matice (n, dim) float32
+        ranges: Minimum a maximum pro každou dimenzi (kalibrace)
+
+    Returns:
+        Matice (n, dim) int8
+    """
+    low, high = ranges
+    step = int8_step(ranges)
+    codes = np.rint((vectors - low) / step) - 128
+    return np.clip(codes, -128, 127).astype(np.int8)
+
+def quantize_binary(vectors: np.ndarray) -> np.ndarray:
+    """
+    1bitová kvantizace (znaménko každé dimenze)
+
+    Args:
+        vectors: Matice (n, dim) float32
+
+    Returns:
+        Matice (n, ceil(dim / 8)) uint8 se zabalenými bity
+    """
+    return np.packbits(vectors > 0, axis=1)
+
+def hamming_distances(query_bits: np.ndarray, codes: np.ndarray) -> np.ndarray:
+    """Hammingova vzdálenost dotazu ke všem binárním kódům"""
+    xor = np.bitwise_xor(codes, query_bits)
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(xor).sum(axis=1, dtype=np.int32)
+    return _POPCOUNT_TABLE[xor].sum(axis=1, dtype=np.int32)
+
+class QuantizedVectorIndex:
+    """
+    Kvantizovaný vektorový index s přesným přeskórováním
+
+    V RAM drží pouze int8 nebo binární kódy. Plné float32 vektory leží
+    v memory-mapped souboru na disku a čtou se jen pro top kandidáty
+    hrubého vyhledávání. Vzdálenost je čtvercová L2 (stejná jako v ChromaDB).
+
+    Jde o vedlejší index pro rychlé hrubé vyhledávání, ne náhradu vektorové
+    DB - ta dál drží vlastní plné vektory (a metadata), takže se paměť ani
+    disk nešetří. Rozsahy int8 se kalibrují ze vzorku celého korpusu
+    a přepočítají se, když nová data z rozsahů vybočí.
+    """
+
+    # Počet řádků int8 kódů převáděných najednou na float32 při hrubém skóre
+    BLOCK_ROWS = 65536
+    # Maximální počet vektorů pro kalibraci rozsahů int8
+    CALIBRATION_SAMPLE_ROWS = 100000
+    # Rezerva rozsahů nad kalibračním vzorkem
+    CALIBRATION_MARGIN = 0.1
+
+    def __init__(self, directory: str, mode: str = "int8", rescore_multiplier: int = 4):
+        """
+        Args:
+            directory: Adresář pro uložení indexu
+            mode: "int8" nebo "binary"
+            rescore_multiplier: Kolikrát víc kandidátů se přeskóruje než se vrací
+        """
+        if mode not in QUANTIZATION_MODES:
+            raise ValueError(f"Nepodporovaný režim kvantizace: {mode}")
+
+        self.directory = directory
+        self.mode = mode
+        self.rescore_multiplier = max(1, rescore_multiplier)
+        self.dimension: Optional[int] = None
+        self.ids: List[str] = []
+        self.id_to_row: Dict[str, int] = {}
+        self.codes: Optional[np.ndarray] = None
+        self.norms: Optional[np.ndarray] = None  # Čtverce norem float vektorů
+        self.valid: Optional[np.ndarray] = None
+        self.ranges: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._vectors: Optional[np.memmap] = None
+        self._lock = threading.RLock()
+
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    @property
+    def _vectors_path(self) -> str:
+        return os.path.join(self.directory, "vectors.f32")
+
+    def __len__(self) -> int:
+        return 0 if self.valid is None else int(self.valid.sum())
+
+    def _load(self):
+        """Načtení indexu z disku"""
+        meta_path = os.path.join(self.directory, "meta.json")
+        if not os.path.exists(meta_path):
+            return
+
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("mode") != self.mode:
+            # Jiný režim - index se postaví znovu
+            return
+
+        self.dimension = meta["dimension"]
+        self.ids = meta["ids"]
+        self.id_to_row = {doc_id: row for row, doc_id in enumerate(self.ids)}
+        self.codes = np.load(os.path.join(self.directory, "codes.npy"))
+        self.norms = np.load(os.path.join(self.directory, "norms.npy"))
+        self.valid = np.load(os.path.join(self.directory, "valid.npy"))
+        if self.mode == "int8":
+            ranges = np.load(os.path.join(self.directory, "ranges.npy"))
+            self.ranges = (ranges[0], ranges[1])
+        self._open_vectors()
+
+    def save(self):
+        """Uložení indexu na disk (float vektory se zapisují průběžně)"""
+        with self._lock:
+            if self.dimension is None:
+                return
+            if self._vectors is not None:
+                self._vectors.flush()
+            np.save(os.path.join(self.directory, "codes.npy"), self.codes)
+            np.save(os.path.join(self.directory, "norms.npy"), self.norms)
+            np.save(os.path.join(self.directory, "valid.npy"), self.valid)
+            if self.ranges is not None:
+                np.save(os.path.join(self.directory, "ranges.npy"), np.stack(self.ranges))
+            with open(os.path.join(self.directory, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump({"mode": self.mode, "dimension": self.dimension, "ids": self.ids}, f)
+
+    def _open_vectors(self):
+        rows = len(self.ids)
+        if rows == 0:
+            self._vectors = None
+            return
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(rows, self.dimension))
+
+    def _encode(self, vectors: np.ndarray) -> np.ndarray:
+        if self.mode == "binary":
+            return quantize_binary(vectors)
+        return quantize_int8(vectors, self.ranges)
+
+    def add(self, ids: List[str], vectors: np.ndarray):
+        """
+        Přidání nebo přepsání vektorů
+
+        Args:
+            ids: ID vektorů
+            vectors: Matice (n, dim) float32
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if len(ids) == 0:
+            return
+
+        with self._lock:
+            if self.dimension is None:
+                self.dimension = vectors.shape[1]
+                self.codes = np.empty((0, self._code_width()), dtype=self._code_dtype())
+                self.norms = np.empty(0, dtype=np.float32)
+                self.valid = np.empty(0, dtype=bool)
+            elif vectors.shape[1] != self.dimension:
+                raise ValueError(f"Dimenze {vectors.shape[1]} neodpovídá indexu ({self.dimension})")
+
+            if self.mode == "int8":
+                if self.ranges is None:
+                    self.ranges = self._calibrate(vectors)
+                elif np.any(vectors < self.ranges[0]) or np.any(vectors > self.ranges[1]):
+                    # Hodnoty mimo rozsahy by se ořízly - kalibrace ze vzorku korpusu i nové dávky
+                    self._recalibrate(vectors)
+
+            codes = self._encode(vectors)
+            norms = np.einsum("ij,ij->i", vectors, vectors)
+
+            existing_rows, existing_pos, new_pos = [], [], []
+            for pos, doc_id in enumerate(ids):
+                row = self.id_to_row.get(doc_id)
+                if row is None:
+                    new_pos.append(pos)
+                else:
+                    existing_rows.append(row)
+                    existing_pos.append(pos)
+
+            if existing_rows:
+                self.codes[existing_rows] = codes[existing_pos]
+                self.norms[existing_rows] = norms[existing_pos]
+                self.valid[existing_rows] = True
+                self._vectors[existing_rows] = vectors[existing_pos]
+
+            if new_pos:
+                start = len(self.ids)
+                # Zápis za poslední uložený řádek - zbytek po pádu (nebo soubor bez
+                # meta.json) se přepíše, takže řádky vždy odpovídají ids
+                if self._vectors is not None:
+                    self._vectors.flush()
+                    self._vectors = None
+                mode = "r+b" if os.path.exists(self._vectors_path) else "wb"
+                with open(self._vectors_path, mode) as f:
+                    f.seek(start * self.dimension * np.dtype(np.float32).itemsize)
+                    f.write(vectors[new_pos].tobytes())
+                    f.truncate()
+
+                for offset, pos in enumerate(new_pos):
+                    self.ids.append(ids[pos])
+                    self.id_to_row[ids[pos]] = start + offset
+                self.codes = np.concatenate([self.codes, codes[new_pos]])
+                self.norms = np.concatenate([self.norms, norms[new_pos]])
+                self.valid = np.concatenate([self.valid, np.ones(len(new_pos), dtype=bool)])
+                self._open_vectors()
+
+    def _calibrate(self, vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Rozsahy int8 z minima a maxima vektorů s rezervou"""
+        low, high = vectors.min(axis=0), vectors.max(axis=0)
+        margin = (high - low) * self.CALIBRATION_MARGIN
+        return low - margin, high + margin
+
+    def _sample_vectors(self) -> np.ndarray:
+        """Náhodný vzorek platných float vektorů (nejvýše CALIBRATION_SAMPLE_ROWS)"""
+        rows = np.flatnonzero(self.valid) if self.valid is not None else np.empty(0, dtype=np.int64)
+        if len(rows) > self.CALIBRATION_SAMPLE_ROWS:
+            rows = np.sort(np.random.default_rng(0).choice(rows, self.CALIBRATION_SAMPLE_ROWS, replace=False))
+        if not len(rows):
+            return np.empty((0, self.dimension), dtype=np.float32)
+        return np.asarray(self._vectors[rows], dtype=np.float32)
+
+    def _recalibrate(self, extra: Optional[np.ndarray] = None):
+        """Nová kalibrace ze vzorku korpusu (a extra vektorů) a překódování všech řádků"""
+        sample = self._sample_vectors()
+        if extra is not None:
+            sample = np.vstack([sample, extra])
+        if not len(sample):
+            return
+        self.ranges = self._calibrate(sample)
+        for start in range(0, len(self.ids), self.BLOCK_ROWS):
+            block = np.asarray(self._vectors[start:start + self.BLOCK_ROWS], dtype=np.float32)
+            self.codes[start:start + len(block)] = quantize_int8(block, self.ranges)
+
+    def recalibrate(self):
+        """Kalibrace rozsahů int8 ze vzorku celého korpusu (po hromadném sestavení)"""
+        with self._lock:
+            if self.mode == "int8" and self.ids:
+                self._recalibrate()
+
+    def delete(self, ids: Iterable[str]):
+        """Označení vektorů jako smazaných"""
+        with self._lock:
+            for doc_id in ids:
+                row = self.id_to_row.get(doc_id)
+                if row is not None:
+                    self.valid[row] = False
+
+    def clear(self):
+        """Smazání celého indexu"""
+        with self._lock:
+            self._vectors = None
+            for name in ("vectors.f32", "codes.npy", "norms.npy", "valid.npy", "ranges.npy", "meta.json"):
+                path = os.path.join(self.directory, name)
+                if os.path.exists(path):
+                    os.remove(path)
+            self.dimension = None
+            self.ids = []
+            self.id_to_row = {}
+            self.codes = self.norms = self.valid = None
+            self.ranges = None
+
+    def search(self, query: np.ndarray, limit: int,
+               candidate_count: Optional[int] = None) -> List[Tuple[str, float]]:
+        """
+        Dvoufázové vyhledávání: hrubé nad kódy, přesné přeskórování float vektory
+
+        Args:
+            query: Vektor dotazu (dim,)
+            limit: Počet vrácených výsledků
+            candidate_count: Počet kandidátů pro přeskórování (výchozí limit * rescore_multiplier)
+
+        Returns:
+            Seznam (id, čtvercová L2 vzdálenost) seřazený od nejbližšího
+        """
+        return self.search_batch(np.asarray(query).reshape(1, -1), limit, candidate_count)[0]
+
+    def search_batch(self, queries: np.ndarray, limit: int,
+                     candidate_count: Optional[int] = None) -> List[List[Tuple[str, float]]]:
+        """
+        Dvoufázové vyhledávání pro více dotazů (kódy se projdou jednou pro všechny)
+
+        Args:
+            queries: Vektory dotazů (počet, dim)
+            limit: Počet vrácených výsledků pro každý dotaz
+            candidate_count: Počet kandidátů pro přeskórování (výchozí limit * rescore_multiplier)
+
+        Returns:
+            Výsledky ve stejném pořadí jako queries
+        """
+        queries = np.asarray(queries, dtype=np.float32)
+        with self._lock:
+            if not len(self) or limit <= 0:
+                return [[] for _ in range(len(queries))]
+
+            candidate_count = candidate_count or limit * self.rescore_multiplier
+            candidate_count = min(max(candidate_count, limit), len(self.ids))
+
+            coarse_scores = self._coarse_scores(queries.reshape(len(queries), -1))
+            coarse_scores[:, ~self.valid] = np.inf
+
+            results = []
+            for query, coarse in zip(queries.reshape(len(queries), -1), coarse_scores):
+                if candidate_count < len(coarse):
+                    candidates = np.argpartition(coarse, candidate_count - 1)[:candidate_count]
+                else:
+                    candidates = np.arange(len(coarse))
+                candidates = candidates[np.isfinite(coarse[candidates])]
+                if not len(candidates):
+                    results.append([])
+                    continue
+
+                # Přesné skóre z memory-mapped float vektorů (čtou se jen kandidáti)
+                candidates.sort()
+                exact = self._vectors[candidates]
+                diff = exact - query
+                distances = np.einsum("ij,ij->i", diff, diff)
+
+                order = np.argsort(distances)[:limit]
+                results.append([(self.ids[candidates[i]], float(distances[i])) for i in order])
+            return results
+
+    def _coarse_scores(self, queries: np.ndarray) -> np.ndarray:
+        """Aproximace vzdáleností dotazů (počet, dim) ke všem řádkům (menší = bližší)"""
+        if self.mode == "binary":
+            query_bits = quantize_binary(queries)
+            return np.stack([hamming_distances(bits, self.codes) for bits in query_bits]).astype(np.float32)
+
+        # ||v - q||^2 = ||v||^2 - 2 q.v + ||q||^2, q.v se počítá nad int8 kódy
+        low = self.ranges[0]
+        step = int8_step(self.ranges)
+        weighted = (queries * step).T
+        # Převod kódů na float32 po blocích - celá kopie by byla 4x větší než kódy
+        approx_dot = np.empty((len(queries), len(self.codes)), dtype=np.float32)
+        for start in range(0, len(self.codes), self.BLOCK_ROWS):
+            block = self.codes[start:start + self.BLOCK_ROWS]
+            approx_dot[:, start:start + len(block)] = (block.astype(np.float32) @ weighted).T
+        approx_dot += (queries @ (low + 128 * step))[:, None]
+        return self.norms - 2 * approx_dot
+
+    def _code_width(self) -> int:
+        return (self.dimension + 7) // 8 if self.mode == "binary" else self.dimension
+
+    def _code_dtype(self):
+        return np.uint8 if self.mode == "binary" else np.int8
+
+def open_quantized_index(directory: str, mode: str, collection, rescore_multiplier: int = 4,
+                         batch_size: int = 2000) -> QuantizedVectorIndex:
+    """
+    Načte kvantizovaný index a prázdný doplní z vektorové DB
+
+    Args:
+        directory: Adresář indexu
+        mode: "int8" nebo "binary"
+        collection: Vektorové úložiště se zdrojovými vektory
+        rescore_multiplier: Kolikrát víc kandidátů se přeskóruje než se vrací
+        batch_size: Počet vektorů načtených z vektorové DB najednou
+    """
+    index = QuantizedVectorIndex(directory, mode=mode, rescore_multiplier=rescore_multiplier)
+    if len(index) == 0 and collection.count() > 0:
+        logger.info(f"Sestavuji {mode} kvantizovaný index z vektorové DB")
+        offset = 0
+        while True:
+            batch = collection.get(include=['embeddings'], limit=batch_size, offset=offset)
+            if not batch['ids']:
+                break
+            index.add(batch['ids'], np.asarray(batch['embeddings'], dtype=np.float32))
+            offset += len(batch['ids'])
+        index.recalibrate()
+        index.save()
+    return index
+
+def query_quantized(index: QuantizedVectorIndex, collection, query_embeddings: np.ndarray,
+                    limit: int, where: Optional[Dict] = None) -> Dict:
+    """
+    Dvoufázové vyhledávání přes kvantizovaný index
+
+    Hrubé vyhledávání nad int8/binárními kódy pro všechny dotazy najednou,
+    přesné přeskórování float vektory a jedno dotažení metadat z vektorové
+    DB pro sjednocení kandidátů všech dotazů. S filtry se bere víc
+    kandidátů, protože část z nich filtr vyřadí.
+
+    Args:
+        index: Kvantizovaný index
+        collection: Vektorové úložiště s dokumenty a metadaty
+        query_embeddings: Vektory dotazů (počet, dim)
+        limit: Počet výsledků pro každý dotaz
+        where: Filtr metadat
+
+    Returns:
+        Výsledky ve stejném tvaru jako collection.query
+    """
+    candidate_limit = limit * 4 if where else limit
+    per_query = index.search_batch(query_embeddings, candidate_limit)
+
+    candidate_ids = list(dict.fromkeys(doc_id for candidates in per_query for doc_id, _ in candidates))
+    fetched = {'ids': [], 'metadatas': [], 'documents': []}
+    if candidate_ids:
+        fetched = collection.get(ids=candidate_ids, where=where, include=['metadatas', 'documents'])
+    rows = {
+        doc_id: (metadata, document)
+        for doc_id, metadata, document in zip(fetched['ids'], fetched['metadatas'], fetched['documents'])
+    }
+
+    results = {'ids': [], 'metadatas': [], 'documents': [], 'distances': []}
+    for candidates in per_query:
+        found = [(doc_id, distance) for doc_id, distance in candidates if doc_id in rows][:limit]
+        results['ids'].append([doc_id for doc_id, _ in found])
+        results['metadatas'].append([rows[doc_id][0] for doc_id, _ in found])
+        results['documents'].append([rows[doc_id][1] for doc_id, _ in found])
+        results['distances'].append([distance for _, distance in found])
+    return results
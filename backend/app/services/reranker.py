@@ -0,0 +1,141 @@
+import logging
+import threading
+import time
+from typing import Any, List, Dict, Optional
+
+from ..config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+class CrossEncoderReranker:
+    """
+    Přeřazení kandidátů cross-encoderem
+
+    Cross-encoder hodnotí dvojici (dotaz, text) najednou, takže je přesnější
+    než vzdálenost embeddingů, ale dražší. Proto se hodnotí jen prvních N
+    kandidátů, po dávkách a v časovém limitu - co se do limitu nevejde,
+    zůstane v pořadí z prvního kola. Čas na jednu dvojici se pamatuje
+    z předchozích dávek, takže limit platí i pro první dávku dotazu.
+    """
+
+    def __init__(self, model_id: str, batch_size: int = 16, max_chars: int = 2000,
+                 model: Optional[Any] = None):
+        """
+        Args:
+            model_id: HuggingFace ID cross-encoder modelu
+            batch_size: Počet dvojic v jedné dávce
+            max_chars: Délka textu kandidáta předaná modelu (zbytek model stejně ořízne)
+            model: Model s metodou predict (None = načte se CrossEncoder podle model_id)
+        """
+        self.model_id = model_id
+        self.batch_size = batch_size
+        self.max_chars = max_chars
+        if model is None:
+            from sentence_transformers import CrossEncoder
+            model = CrossEncoder(model_id, max_length=512)
+        self.model = model
+        # Naměřený čas na jednu dvojici v ms (None = zatím bez měření)
+        self.pair_ms: Optional[float] = None
+
+    def rerank(self, query: str, candidates: List[Dict], top_n: int,
+               budget_ms: Optional[float] = None, text_key: str = 'content_text') -> List[Dict]:
+        """
+        Přeřadí prvních top_n kandidátů
+
+        Dávky se zpracovávají od nejlepších kandidátů prvního kola. Podle
+        naměřeného času na dvojici se dávka zmenší na počet dvojic, které se
+        vejdou do zbytku limitu; když se nevejde ani jedna, ohodnocená část
+        se přeřadí a zbytek zůstane v původním pořadí. Bez předchozího měření
+        se nejdřív ohodnotí jediná dvojice.
+
+        Args:
+            query: Vyhledávací dotaz
+            candidates: Kandidáti seřazení prvním kolem
+            top_n: Počet kandidátů k přehodnocení
+            budget_ms: Časový limit v ms (None = bez limitu)
+            text_key: Klíč s textem kandidáta
+
+        Returns:
+            Kandidáti s klíčem 'rerank_score' (None u neohodnocených)
+        """
+        head = candidates[:top_n]
+        scores: List[float] = []
+        start = time.perf_counter()
+
+        while len(scores) < len(head):
+            size = self.batch_size
+            if budget_ms is not None:
+                elapsed = (time.perf_counter() - start) * 1000
+                pair_ms = self.pair_ms
+                size = min(size, int((budget_ms - elapsed) // pair_ms)) if pair_ms else 1
+                if elapsed >= budget_ms or size < 1:
+                    logger.info(f"Rerank přerušen po {len(scores)}/{len(head)} kandidátech ({elapsed:.0f} ms)")
+                    break
+
+            batch_start = time.perf_counter()
+            batch = head[len(scores):len(scores) + size]
+            pairs = [(query, (candidate.get(text_key) or '')[:self.max_chars]) for candidate in batch]
+            scores.extend(float(score) for score in self.model.predict(pairs, batch_size=self.batch_size))
+            self.pair_ms = (time.perf_counter() - batch_start) * 1000 / len(batch)
+
+        scored = [{**candidate, 'rerank_score': score} for candidate, score in zip(head, scores)]
+        scored.sort(key=lambda candidate: candidate['rerank_score'], reverse=True)
+        rest = [{**candidate, 'rerank_score': None} for candidate in candidates[len(scored):]]
+        return scored + rest
+
+_reranker: Optional[CrossEncoderReranker] = None
+_reranker_failed = False
+_reranker_lock = threading.Lock()
+_loading_lock = threading.Lock()
+_loading_thread: Optional[threading.Thread] = None
+
+def get_reranker(force: bool = False) -> Optional[CrossEncoderReranker]:
+    """
+    Sdílený reranker pro vyhledávání (model se na cestě požadavku nenačítá)
+
+    Načítá ho zahřívání po startu. Dokud model není načtený, vrací None
+    a načtení se spustí na pozadí - dotaz zatím použije pořadí prvního kola.
+
+    Args:
+        force: Použít i při vypnutém RERANKER_ENABLED (explicitní požadavek klienta)
+    """
+    global _loading_thread
+    if not settings.RERANKER_ENABLED and not force:
+        return None
+    if _reranker is not None or _reranker_failed:
+        return _reranker
+    with _loading_lock:
+        if _loading_thread is None or not _loading_thread.is_alive():
+            _loading_thread = threading.Thread(target=load_reranker, name="reranker-load", daemon=True)
+            _loading_thread.start()
+    return None
+
+def load_reranker() -> Optional[CrossEncoderReranker]:
+    """
+    Načte sdílený reranker (blokující - volá se ze zahřívání nebo na pozadí)
+
+    Po načtení se model dvakrát spustí naprázdno - druhé měření dá odhad
+    času na dvojici zahřátého modelu pro časový limit.
+
+    Returns:
+        Reranker, nebo None, pokud se model nepodařilo načíst
+    """
+    global _reranker, _reranker_failed
+    with _reranker_lock:
+        if _reranker is None and not _reranker_failed:
+            try:
+                reranker = CrossEncoderReranker(
+                    settings.RERANKER_MODEL,
+                    batch_size=settings.RERANK_BATCH_SIZE,
+                    max_chars=settings.RERANK_MAX_CHARS
+                )
+                warmup = [{'content_text': 'warmup'}] * reranker.batch_size
+                for _ in range(2):
+                    reranker.rerank("warmup", warmup, top_n=len(warmup))
+                _reranker = reranker
+                logger.info(f"Reranker načten: {settings.RERANKER_MODEL} ({reranker.pair_ms:.1f} ms na dvojici)")
+            except Exception as e:
+                # Další požadavky už načtení neopakují a použijí pořadí prvního kola
+                logger.error(f"Chyba při načítání rerankeru: {e}")
+                _reranker_failed = True
+        return _reranker
@@ -3,12 +3,12 @@ import schedule
 import time
 from datetime import datetime, time as dt_time
 from typing import List, Dict, Any, Optional
-import psutil
 import json
 from pathlib import Path
 
 from ..models.folder import WatchedFolder, ScheduleConfig, SystemStatus
 from ..config.settings import settings
+from .system_monitor import get_system_sampler
 
 class SchedulerService:
     """Služba pro plánování indexace"""
@@ -119,19 +119,19 @@ class SchedulerService:
 
     def _get_system_status(self) -> SystemStatus:
         """Získání systémového statusu"""
-        cpu_percent = psutil.cpu_percent(interval=1)
-        memory = psutil.virtual_memory()
-        disk = psutil.disk_usage('/')
+        status = get_system_sampler().get_status()
         
+        # Bez změřeného CPU (sampler se zahřívá) systém nečinný není
         is_idle = (
-            cpu_percent < self.schedule_config.cpu_threshold and
-            memory.percent < self.schedule_config.ram_threshold
+            not status["warming_up"] and
+            status["cpu_usage_avg"] < self.schedule_config.cpu_threshold and
+            status["ram_usage"] < self.schedule_config.ram_threshold
         )
         
         return SystemStatus(
-            cpu_usage=cpu_percent,
-            ram_usage=memory.percent,
-            disk_usage=disk.percent,
+            cpu_usage=status["cpu_usage"],
+            ram_usage=status["ram_usage"],
+            disk_usage=status["disk_usage"],
             is_idle=is_idle,
             current_time=datetime.now()
         )
@@ -140,7 +140,8 @@ class SchedulerService:
         """Zpracování složek čekajících na indexaci"""
         from .indexer import IndexerService
         
-        indexer = IndexerService()
+        # Načtení modelu neblokuje event loop
+        indexer = await asyncio.get_running_loop().run_in_executor(None, IndexerService)
         
         for folder in self.watched_folders:
             if not folder.enabled:
@@ -278,7 +279,8 @@ class SchedulerService:
         """Manuální indexace složky"""
         from .indexer import IndexerService
         
-        indexer = IndexerService()
+        # Načtení modelu neblokuje event loop
+        indexer = await asyncio.get_running_loop().run_in_executor(None, IndexerService)
         await indexer.index_folder(folder)
         
         # Aktualizace metadat
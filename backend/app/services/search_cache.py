@@ -0,0 +1,105 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+class LRUCache:
+    """Jednoduchá thread-safe LRU cache v paměti"""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get_stats(self) -> Dict:
+        return {"size": len(self._data), "max_size": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+class SearchCache:
+    """
+    Cache embeddingů dotazů a výsledků vyhledávání
+
+    Výsledky jsou vázané na generaci indexu. Každý zápis do indexu zvýší
+    generaci (bump), takže starší výsledky se už nikdy nevrátí. Embeddingy
+    dotazů na obsahu indexu nezávisí a zůstávají platné.
+    """
+
+    def __init__(self, query_cache_size: int = 1024, result_cache_size: int = 256):
+        self.query_embeddings = LRUCache(query_cache_size)
+        self.results = LRUCache(result_cache_size)
+        self.generation = 0
+        self._lock = threading.Lock()
+
+    def bump(self) -> int:
+        """Zvýšení generace indexu po zápisu"""
+        with self._lock:
+            self.generation += 1
+            self.results.clear()
+            return self.generation
+
+    def get_query_embedding(self, query: str, compute: Callable[[str], Any]) -> Any:
+        """Embedding dotazu z cache, nebo spočítaný a uložený"""
+        embedding = self.query_embeddings.get(query)
+        if embedding is None:
+            embedding = compute(query)
+            self.query_embeddings.put(query, embedding)
+        return embedding
+
+    def get_results(self, key: Hashable) -> Optional[Any]:
+        """Výsledky pro klíč v aktuální generaci"""
+        return self.results.get((self.generation, key))
+
+    def put_results(self, key: Hashable, results: Any, generation: int):
+        """
+        Uložení výsledků
+
+        Args:
+            key: Klíč (dotaz, filtry, limit, ...)
+            results: Výsledky
+            generation: Generace, ve které výpočet začal - výsledek
+                spočítaný během zápisu do indexu se neuloží
+        """
+        with self._lock:
+            if generation == self.generation:
+                self.results.put((generation, key), results)
+
+    def get_stats(self) -> Dict:
+        return {
+            "generation": self.generation,
+            "query_embeddings": self.query_embeddings.get_stats(),
+            "results": self.results.get_stats()
+        }
+
+def cache_key(*parts: Any) -> tuple:
+    """Hashovatelný klíč z parametrů dotazu (seznamy se převedou na seřazené n-tice)"""
+    normalized = []
+    for part in parts:
+        if isinstance(part, (list, tuple, set)):
+            part = tuple(sorted(part))
+        normalized.append(part)
+    return tuple(normalized)
@@ -0,0 +1,279 @@
+import re
+from functools import lru_cache
+from typing import List, Dict, NamedTuple, Optional, Tuple
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+class Match(NamedTuple):
+    """Výskyt slova z dotazu v textu"""
+    start: int
+    end: int
+    term: int  # Index slova v QueryMatcher.terms
+
+def query_terms(query: str) -> Tuple[str, ...]:
+    """Slova dotazu (malými písmeny, bez duplicit)"""
+    return tuple(dict.fromkeys(word for word in query.lower().split() if word))
+
+def lower_preserving_offsets(text: str) -> str:
+    """Převod na malá písmena, který nemění délku textu (offsety zůstanou platné)"""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    # Vzácné znaky, které se převodem prodlouží (např. "İ"), zůstanou beze změny
+    return "".join(ch.lower() if len(ch.lower()) == 1 else ch for ch in text)
+
+class QueryMatcher:
+    """
+    Vyhledání všech slov dotazu jedním průchodem textu
+
+    S nainstalovaným pyahocorasick se použije automat Aho-Corasick, jinak
+    regulární výraz s alternací slov (také jeden průchod v C, ale bez
+    překrývajících se shod).
+    """
+
+    def __init__(self, terms: Tuple[str, ...]):
+        self.terms = terms
+        self._automaton = None
+        self._pattern = None
+
+        if not terms:
+            return
+        if ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for index, term in enumerate(terms):
+                self._automaton.add_word(term, (index, len(term)))
+            self._automaton.make_automaton()
+        else:
+            # Delší slova první, aby alternace preferovala nejdelší shodu
+            ordered = sorted(terms, key=len, reverse=True)
+            self._pattern = re.compile("|".join(re.escape(term) for term in ordered))
+            self._term_index = {term: index for index, term in enumerate(terms)}
+
+    def find(self, lowered: str) -> List[Match]:
+        """
+        Všechny výskyty slov v textu
+
+        Args:
+            lowered: Text převedený přes lower_preserving_offsets
+
+        Returns:
+            Shody seřazené podle pozice
+        """
+        if self._automaton is not None:
+            matches = [
+                Match(end - length + 1, end + 1, index)
+                for end, (index, length) in self._automaton.iter(lowered)
+            ]
+            matches.sort()
+            return matches
+        if self._pattern is not None:
+            return [
+                Match(found.start(), found.end(), self._term_index[found.group()])
+                for found in self._pattern.finditer(lowered)
+            ]
+        return []
+
+@lru_cache(maxsize=256)
+def get_matcher(query: str) -> QueryMatcher:
+    """Matcher pro dotaz (sestavuje se jednou pro opakované dotazy i všechny výsledky)"""
+    return QueryMatcher(query_terms(query))
+
+def _select_windows(matches: List[Match], window: int, max_windows: int) -> List[Tuple[int, int]]:
+    """
+    Výběr nejlepších nepřekrývajících se oken
+
+    Okno začíná na každé shodě a sahá, dokud se shody vejdou do délky okna.
+    Shoda delší než okno tvoří okno sama. Skóre je počet různých slov
+    dotazu (hlavní kritérium) a počet shod.
+
+    Returns:
+        Dvojice (index první, index poslední shody) pro vybraná okna
+    """
+    candidates = []
+    counts: Dict[int, int] = {}
+    right = 0
+    for left, first in enumerate(matches):
+        # První shoda patří do okna vždy, i když je delší než okno
+        while right < len(matches) and (right == left or matches[right].end - first.start <= window):
+            counts[matches[right].term] = counts.get(matches[right].term, 0) + 1
+            right += 1
+        candidates.append(((len(counts), right - left), left, right - 1))
+        # Posun levého okraje - shoda vypadne z okna
+        counts[first.term] -= 1
+        if not counts[first.term]:
+            del counts[first.term]
+
+    candidates.sort(key=lambda candidate: (-candidate[0][0], -candidate[0][1], candidate[1]))
+    chosen: List[Tuple[int, int]] = []
+    for _, left, last in candidates:
+        span = (matches[left].start, matches[last].end)
+        if any(span[0] < matches[other_last].end and matches[other_left].start < span[1]
+               for other_left, other_last in chosen):
+            continue
+        chosen.append((left, last))
+        if len(chosen) >= max_windows:
+            break
+    return chosen
+
+def _expand_window(text: str, start: int, end: int, window: int) -> Tuple[int, int]:
+    """Rozšíření rozsahu shod na délku okna a zarovnání na hranice slov"""
+    padding = max(0, window - (end - start)) // 2
+    start = max(0, start - padding)
+    end = min(len(text), start + max(window, end - start))
+    start = max(0, min(start, end - window))
+
+    # Posun na nejbližší mezeru, aby okno nezačínalo ani nekončilo uprostřed slova
+    if start > 0:
+        space = text.find(" ", start, start + 20)
+        if space != -1:
+            start = space + 1
+    if end < len(text):
+        space = text.rfind(" ", end - 20, end)
+        if space > start:
+            end = space
+    return start, end
+
+def _merge_highlights(spans) -> List[List[int]]:
+    """Spojí překrývající se rozsahy shod (Aho-Corasick vrací i shody uvnitř delších slov)"""
+    merged: List[List[int]] = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+def find_snippets(text: str, query: str, snippet_length: int = 200,
+                  max_snippets: int = 3) -> Tuple[List[Dict], List[Match]]:
+    """
+    Nejlepší úryvky textu pro dotaz
+
+    Args:
+        text: Text (chunk nebo dokument)
+        query: Vyhledávací dotaz
+        snippet_length: Délka úryvku ve znacích
+        max_snippets: Maximální počet úryvků
+
+    Returns:
+        Úryvky seřazené podle pozice v textu a všechny shody. Úryvek má klíče
+        text, start, end (offsety v text) a highlights (offsety shod v úryvku).
+    """
+    matcher = get_matcher(query)
+    lowered = lower_preserving_offsets(text)
+    matches = matcher.find(lowered)
+    if not matches:
+        return [], matches
+
+    snippets = []
+    for left, last in _select_windows(matches, snippet_length, max_snippets):
+        start, end = _expand_window(text, matches[left].start, matches[last].end, snippet_length)
+        snippets.append({
+            'text': text[start:end],
+            'start': start,
+            'end': end,
+            'highlights': _merge_highlights(
+                (match.start - start, match.end - start)
+                for match in matches[left:last + 1]
+                if match.start >= start and match.end <= end
+            )
+        })
+    snippets.sort(key=lambda snippet: snippet['start'])
+    return snippets, matches
+
+def format_snippet(snippet: Dict, text_length: int) -> str:
+    """Úryvek jako text s "..." na oříznutých koncích"""
+    formatted = snippet['text']
+    if snippet['start'] > 0:
+        formatted = "..." + formatted
+    if snippet['end'] < text_length:
+        formatted = formatted + "..."
+    return formatted
+
+def parse_marked_snippet(marked: str, match_start: str, match_end: str,
+                         ellipsis: str) -> Optional[Tuple[Dict, str]]:
+    """
+    Úryvek se značkami shod (např. z FTS5 snippet()) ve tvaru find_snippets
+
+    Args:
+        marked: Úryvek se značkami
+        match_start: Značka začátku shody
+        match_end: Značka konce shody
+        ellipsis: Značka oříznutého začátku nebo konce
+
+    Returns:
+        Dvojice (úryvek, text s "..." na oříznutých koncích) nebo None, pokud
+        úryvek neobsahuje žádnou shodu. Offsety úryvku v dokumentu nejsou
+        známé, start a end jsou None.
+    """
+    truncated_start = marked.startswith(ellipsis)
+    truncated_end = marked.endswith(ellipsis) and len(marked) > len(ellipsis)
+    marked = marked[len(ellipsis) if truncated_start else 0:len(marked) - (len(ellipsis) if truncated_end else 0)]
+
+    parts: List[str] = []
+    highlights: List[List[int]] = []
+    length = 0
+    position = 0
+    while True:
+        begin = marked.find(match_start, position)
+        if begin == -1:
+            break
+        finish = marked.find(match_end, begin)
+        if finish == -1:
+            break
+        parts.append(marked[position:begin])
+        length += begin - position
+        term = marked[begin + len(match_start):finish]
+        highlights.append([length, length + len(term)])
+        parts.append(term)
+        length += len(term)
+        position = finish + len(match_end)
+    if not highlights:
+        return None
+    parts.append(marked[position:])
+    text = "".join(parts)
+
+    snippet = {'text': text, 'start': None, 'end': None, 'highlights': _merge_highlights(highlights)}
+    formatted = ("..." if truncated_start else "") + text + ("..." if truncated_end else "")
+    return snippet, formatted
+
+def analyze_relevance(query: str, text: str, file_name: str, matches: List[Match]) -> Dict:
+    """
+    Analýza shody dotazu s dokumentem z již nalezených shod (bez dalšího průchodu textem)
+
+    Args:
+        query: Vyhledávací dotaz
+        text: Text, ve kterém byly shody nalezeny
+        file_name: Název souboru
+        matches: Výsledek find_snippets pro text
+
+    Returns:
+        Slovník s analýzou relevance
+    """
+    terms = get_matcher(query).terms
+    analysis = {
+        'exact_matches': 0,
+        'partial_matches': 0,
+        'semantic_matches': 0,
+        'filename_relevance': 0,
+        'content_relevance': 0
+    }
+    if not terms:
+        return analysis
+
+    found_terms = {match.term for match in matches}
+    # Celé slovo = shoda není obklopená písmenem nebo číslicí
+    whole_word_terms = {
+        match.term for match in matches
+        if (match.start == 0 or not text[match.start - 1].isalnum())
+        and (match.end == len(text) or not text[match.end].isalnum())
+    }
+    filename_lower = file_name.lower()
+
+    analysis['exact_matches'] = len(found_terms)
+    analysis['partial_matches'] = len(found_terms - whole_word_terms)
+    analysis['filename_relevance'] = sum(1 for term in terms if term in filename_lower)
+    analysis['content_relevance'] = len(whole_word_terms) / len(terms)
+    return analysis
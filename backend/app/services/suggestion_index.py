@@ -0,0 +1,189 @@
+import bisect
+import heapq
+import logging
+import threading
+import time
+import unicodedata
+from collections import defaultdict
+from pathlib import PurePath
+from typing import List, Dict, Optional, Tuple
+
+from ..config.settings import settings
+from ..models.database import Database
+
+logger = logging.getLogger(__name__)
+
+# Minimální délka navrhovaného termu
+MIN_TERM_LENGTH = 3
+# Pro prefixy do této délky jsou nejčastější termy předpočítané
+SHORT_PREFIX_LENGTH = 2
+SHORT_PREFIX_TOP = 50
+
+def normalize_term(text: str) -> str:
+    """Klíč termu - malá písmena bez diakritiky (stejně jako FTS tokenizer)"""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+class SuggestionIndex:
+    """
+    Prefixový index pro návrhy při psaní
+
+    Termy obsahu (FTS slovník udržovaný triggery při indexaci), názvy souborů
+    a názvy složek z cest jsou v paměti jako seřazené pole klíčů s četnostmi.
+    Dotaz je bisect na rozsah klíčů s daným prefixem; pro krátké prefixy,
+    jejichž rozsah může být obrovský, jsou nejčastější termy předpočítané.
+    Index se přestaví po indexaci (invalidate) nebo po SUGGESTION_REFRESH_SECONDS,
+    a to na pozadí - do té doby odpovídá původní index.
+    """
+
+    def __init__(self, db: Database, max_terms: Optional[int] = None,
+                 refresh_seconds: Optional[float] = None):
+        """
+        Args:
+            db: Databáze indexovaných souborů
+            max_terms: Max. počet termů obsahu (výchozí settings.SUGGESTION_MAX_TERMS)
+            refresh_seconds: Max. stáří indexu (výchozí settings.SUGGESTION_REFRESH_SECONDS)
+        """
+        self.db = db
+        self.max_terms = max_terms or settings.SUGGESTION_MAX_TERMS
+        self.refresh_seconds = refresh_seconds or settings.SUGGESTION_REFRESH_SECONDS
+        # (klíče, (text, četnost) pro každý klíč, prefix -> indexy nejčastějších)
+        self._data: Tuple[List[str], List[Tuple[str, int]], Dict[str, List[int]]] = ([], [], {})
+        self._built_at: Optional[float] = None
+        self._stale = False
+        self._building = False
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data[0])
+
+    def _collect(self) -> Dict[str, List]:
+        """Termy z databáze: klíč -> [zobrazovaný text, četnost]"""
+        entries: Dict[str, List] = {}
+
+        def add(display: str, count: int):
+            key = normalize_term(display)
+            if len(key) < MIN_TERM_LENGTH:
+                return
+            entry = entries.get(key)
+            if entry is None:
+                entries[key] = [display, count]
+            else:
+                entry[1] += count
+
+        # Názvy souborů a složek první - zachovají diakritiku, kterou FTS slovník nemá
+        for file_name, file_path in self.db.get_file_names():
+            add(file_name.lower(), 1)
+            for part in PurePath(file_path).parts[:-1]:
+                add(part.lower(), 1)
+
+        for term, doc_count in self.db.get_term_frequencies(MIN_TERM_LENGTH, self.max_terms):
+            add(term, doc_count)
+
+        return entries
+
+    def rebuild(self) -> None:
+        """Sestaví index z databáze"""
+        self._stale = False
+        start = time.perf_counter()
+        entries = self._collect()
+
+        keys = sorted(entries)
+        values = [(entries[key][0], entries[key][1]) for key in keys]
+
+        groups: Dict[str, List[int]] = defaultdict(list)
+        for index, key in enumerate(keys):
+            for length in range(1, min(SHORT_PREFIX_LENGTH, len(key)) + 1):
+                groups[key[:length]].append(index)
+        short = {
+            prefix: heapq.nlargest(SHORT_PREFIX_TOP, indices, key=lambda index: values[index][1])
+            for prefix, indices in groups.items()
+        }
+
+        # Jedno přiřazení - souběžné dotazy vidí buď starý, nebo nový index
+        self._data = (keys, values, short)
+        self._built_at = time.monotonic()
+        logger.info(f"Index návrhů sestaven: {len(keys)} termů za {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    def invalidate(self) -> None:
+        """Označí index k přestavění (volá se po změně indexovaných souborů)"""
+        self._stale = True
+
+    def _background_rebuild(self) -> None:
+        try:
+            self.rebuild()
+        except Exception as e:
+            logger.error(f"Chyba při sestavování indexu návrhů: {e}")
+        finally:
+            self._building = False
+
+    def ensure_built(self) -> None:
+        """Sestaví index, pokud ještě není (souběžná volání počkají na jedno sestavení)"""
+        if self._built_at is None:
+            with self._lock:
+                if self._built_at is None:
+                    self.rebuild()
+
+    def _ensure_fresh(self) -> None:
+        """První dotaz počká na sestavení, zastaralý index se přestaví na pozadí"""
+        if self._built_at is None:
+            self.ensure_built()
+            return
+
+        if self._stale or time.monotonic() - self._built_at > self.refresh_seconds:
+            with self._lock:
+                if self._building:
+                    return
+                self._building = True
+            threading.Thread(target=self._background_rebuild, daemon=True).start()
+
+    def _lookup(self, prefix: str, limit: int) -> List[Tuple[str, int]]:
+        """Nejčastější termy s daným prefixem klíče"""
+        keys, values, short = self._data
+        if len(prefix) <= SHORT_PREFIX_LENGTH and limit <= SHORT_PREFIX_TOP:
+            indices = short.get(prefix, [])[:limit]
+        else:
+            low = bisect.bisect_left(keys, prefix)
+            high = bisect.bisect_left(keys, prefix + "\U0010ffff", low)
+            indices = heapq.nlargest(limit, range(low, high), key=lambda index: values[index][1])
+        return [values[index] for index in indices]
+
+    def suggest(self, query: str, limit: int = 10) -> List[str]:
+        """
+        Návrhy pro rozepsaný dotaz
+
+        Doplňuje se poslední slovo dotazu, předchozí slova zůstanou. Víceslovný
+        dotaz se navíc doplňuje celý (názvy souborů a složek s mezerami).
+
+        Args:
+            query: Rozepsaný dotaz
+            limit: Maximální počet návrhů
+
+        Returns:
+            Návrhy seřazené podle četnosti
+        """
+        words = query.split()
+        if not words or limit <= 0:
+            return []
+        self._ensure_fresh()
+
+        suggestions: List[str] = []
+        if len(words) > 1:
+            suggestions.extend(display for display, _ in self._lookup(normalize_term(" ".join(words)), limit))
+
+        lead = " ".join(words[:-1])
+        for display, _ in self._lookup(normalize_term(words[-1]), limit):
+            suggestions.append(f"{lead} {display}" if lead else display)
+
+        return list(dict.fromkeys(suggestions))[:limit]
+
+_suggestion_index: Optional[SuggestionIndex] = None
+_suggestion_index_lock = threading.Lock()
+
+def get_suggestion_index(db: Optional[Database] = None) -> SuggestionIndex:
+    """Sdílený index návrhů"""
+    global _suggestion_index
+    with _suggestion_index_lock:
+        if _suggestion_index is None:
+            _suggestion_index = SuggestionIndex(db or Database())
+        return _suggestion_index
@@ -0,0 +1,168 @@
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Optional
+
+import psutil
+
+from ..config.settings import settings
+
+class SystemLoadSampler:
+    """
+    Vzorkování zátěže systému na pozadí
+
+    Vlákno periodicky měří CPU, RAM a diskové I/O a drží klouzavé okno
+    vzorků. Čtení stavu je okamžité (žádné blokující psutil.cpu_percent).
+    Měří výhradně vlákno - před jeho prvním vzorkem vrací get_status stav
+    "warming_up" místo měření ve vlákně volajícího.
+    """
+
+    def __init__(self, interval: float = 1.0, window: int = 30):
+        """
+        Args:
+            interval: Perioda vzorkování v sekundách
+            window: Počet vzorků v klouzavém okně
+        """
+        self.interval = interval
+        self.samples: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_disk_io = None
+        self._last_time = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Spuštění vzorkovacího vlákna"""
+        with self._lock:
+            if self.is_running:
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="system-load-sampler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Zastavení vzorkovacího vlákna"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval * 2)
+        self._thread = None
+
+    def _run(self):
+        # První volání cpu_percent(None) vrací nesmyslných 0.0 a jen nastaví
+        # referenční bod - první vzorek se změří až po jednom intervalu
+        psutil.cpu_percent(interval=None)
+        with self._lock:
+            self._last_disk_io = self._read_disk_io()
+            self._last_time = time.monotonic()
+
+        while not self._stop_event.wait(self.interval):
+            try:
+                self._take_sample()
+                self._ready.set()
+            except Exception as e:
+                print(f"❌ Chyba při vzorkování zátěže systému: {e}")
+
+    @staticmethod
+    def _read_disk_io():
+        try:
+            return psutil.disk_io_counters()
+        except Exception:
+            return None
+
+    def _take_sample(self):
+        """Změření jednoho vzorku (jen ze vzorkovacího vlákna)"""
+        now = time.monotonic()
+        cpu_percent = psutil.cpu_percent(interval=None)
+        memory = psutil.virtual_memory()
+        disk = psutil.disk_usage('/')
+        disk_io = self._read_disk_io()
+
+        # Rozdíl proti minulému měření a uložení vzorku pod jedním zámkem
+        with self._lock:
+            read_rate = write_rate = 0.0
+            elapsed = now - self._last_time if self._last_time else 0
+            if disk_io and self._last_disk_io and elapsed > 0:
+                read_rate = (disk_io.read_bytes - self._last_disk_io.read_bytes) / elapsed
+                write_rate = (disk_io.write_bytes - self._last_disk_io.write_bytes) / elapsed
+            self._last_disk_io = disk_io
+            self._last_time = now
+
+            self.samples.append({
+                "cpu_usage": cpu_percent,
+                "ram_usage": memory.percent,
+                "ram_available": memory.available / (1024**3),  # GB
+                "disk_usage": disk.percent,
+                "disk_free": disk.free / (1024**3),  # GB
+                "disk_read_bytes_per_sec": read_rate,
+                "disk_write_bytes_per_sec": write_rate,
+            })
+
+    def get_status(self, timeout: float = 0.0) -> Dict[str, Any]:
+        """
+        Okamžité čtení stavu z cache
+
+        Args:
+            timeout: Max. čekání na první vzorek po startu v s (volající
+                z event loopu nechávají 0 - nečekat)
+
+        Returns:
+            Poslední vzorek doplněný o průměr CPU a diskového I/O přes okno
+            a "warming_up": False. Bez vzorku ani po timeoutu stav se
+            "warming_up": True, RAM a diskem a hodnotami CPU a I/O None.
+        """
+        if not self.is_running:
+            self.start()
+        if timeout > 0:
+            self._ready.wait(timeout)
+
+        with self._lock:
+            samples = list(self.samples)
+
+        if not samples:
+            return self._warming_up_status()
+
+        latest = dict(samples[-1])
+        latest["warming_up"] = False
+        count = len(samples)
+        latest["cpu_usage_avg"] = sum(s["cpu_usage"] for s in samples) / count
+        latest["disk_read_bytes_per_sec_avg"] = sum(s["disk_read_bytes_per_sec"] for s in samples) / count
+        latest["disk_write_bytes_per_sec_avg"] = sum(s["disk_write_bytes_per_sec"] for s in samples) / count
+        latest["window_seconds"] = count * self.interval
+        return latest
+
+    @staticmethod
+    def _warming_up_status() -> Dict[str, Any]:
+        """Stav před prvním vzorkem - RAM a disk jsou okamžité, CPU a I/O zatím neznámé"""
+        memory = psutil.virtual_memory()
+        disk = psutil.disk_usage('/')
+        return {
+            "warming_up": True,
+            "cpu_usage": None,
+            "ram_usage": memory.percent,
+            "ram_available": memory.available / (1024**3),  # GB
+            "disk_usage": disk.percent,
+            "disk_free": disk.free / (1024**3),  # GB
+            "disk_read_bytes_per_sec": None,
+            "disk_write_bytes_per_sec": None,
+            "cpu_usage_avg": None,
+            "disk_read_bytes_per_sec_avg": None,
+            "disk_write_bytes_per_sec_avg": None,
+            "window_seconds": 0.0
+        }
+
+# Sdílená instance pro celou aplikaci
+system_sampler = SystemLoadSampler(
+    interval=settings.SYSTEM_SAMPLE_INTERVAL,
+    window=settings.SYSTEM_SAMPLE_WINDOW
+)
+
+def get_system_sampler() -> SystemLoadSampler:
+    """Získání běžícího sdíleného sampleru"""
+    if not system_sampler.is_running:
+        system_sampler.start()
+    return system_sampler
@@ -0,0 +1,188 @@
+from typing import List, NamedTuple, Optional, Any
+
+class TextChunk(NamedTuple):
+    """Chunk textu s pozicí v původním dokumentu"""
+    text: str
+    start: int  # Offset prvního znaku v původním textu
+    end: int  # Offset za posledním znakem (text == source[start:end])
+
+class TextChunker:
+    """
+    Rychlé dělení textu na chunky s uchováním znakových offsetů.
+
+    Instance se vytváří jednou a používá opakovaně. Bez tokenizeru dělí
+    podle počtu znaků a řeže přednostně na hranicích odstavců, řádků a slov
+    (stejné priority jako RecursiveCharacterTextSplitter). S tokenizerem
+    dělí podle počtu tokenů, takže chunky se vejdou do max_seq_length
+    embedding modelu.
+    """
+
+    SEPARATORS = ("\n\n", "\n", " ")
+
+    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200,
+                 tokenizer: Optional[Any] = None, max_tokens: Optional[int] = None,
+                 token_overlap: Optional[int] = None):
+        """
+        Args:
+            chunk_size: Maximální délka chunku ve znacích
+            chunk_overlap: Překryv sousedních chunků ve znacích
+            tokenizer: HuggingFace (fast) tokenizer pro dělení podle tokenů
+            max_tokens: Maximální počet tokenů v chunku (bez speciálních tokenů)
+            token_overlap: Překryv sousedních chunků v tokenech
+        """
+        if chunk_overlap >= chunk_size:
+            raise ValueError("chunk_overlap musí být menší než chunk_size")
+
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.tokenizer = tokenizer
+        self.max_tokens = max_tokens
+        self.token_overlap = token_overlap
+
+        if tokenizer is not None:
+            if not max_tokens:
+                raise ValueError("Pro dělení podle tokenů je potřeba max_tokens")
+            if self.token_overlap is None:
+                # Stejný poměr překryvu jako u znakového dělení
+                self.token_overlap = max_tokens * chunk_overlap // chunk_size
+            if self.token_overlap >= max_tokens:
+                raise ValueError("token_overlap musí být menší než max_tokens")
+
+    @classmethod
+    def for_model(cls, model: Any, chunk_size: int, chunk_overlap: int,
+                  token_aware: bool = True) -> "TextChunker":
+        """
+        Vytvoří chunker pro embedding model
+
+        Args:
+            model: Embedding model s atributy tokenizer a max_seq_length
+            chunk_size: Maximální délka chunku ve znacích
+            chunk_overlap: Překryv chunků ve znacích
+            token_aware: Dělit podle tokenů, pokud to model umožňuje
+
+        Returns:
+            Chunker (podle tokenů, nebo znakový jako fallback)
+        """
+        tokenizer = getattr(model, "tokenizer", None) if model is not None else None
+        max_seq_length = getattr(model, "max_seq_length", None) if model is not None else None
+
+        if token_aware and tokenizer is not None and max_seq_length and getattr(tokenizer, "is_fast", False):
+            # Rezerva na speciální tokeny ([CLS], [SEP])
+            max_tokens = max_seq_length - 2
+            return cls(chunk_size, chunk_overlap, tokenizer=tokenizer, max_tokens=max_tokens)
+
+        return cls(chunk_size, chunk_overlap)
+
+    def split(self, text: str) -> List[TextChunk]:
+        """
+        Rozdělí text na chunky
+
+        Args:
+            text: Vstupní text
+
+        Returns:
+            Seznam chunků s offsety do původního textu
+        """
+        if not text:
+            return []
+        if self.tokenizer is not None:
+            return self._split_by_tokens(text)
+        return self._split_by_chars(text)
+
+    def split_text(self, text: str) -> List[str]:
+        """Rozdělí text na chunky a vrátí pouze jejich texty"""
+        return [chunk.text for chunk in self.split(text)]
+
+    def _split_by_chars(self, text: str) -> List[TextChunk]:
+        """Znakové dělení s řezem na nejlepším dostupném oddělovači"""
+        chunks = []
+        length = len(text)
+        size = self.chunk_size
+        overlap = self.chunk_overlap
+        start = self._skip_whitespace(text, 0, length)
+
+        while start < length:
+            end = min(start + size, length)
+
+            if end < length:
+                end = self._find_break(text, start, end)
+
+            chunk = self._make_chunk(text, start, end)
+            if chunk is not None:
+                chunks.append(chunk)
+
+            if end >= length:
+                break
+
+            # Další chunk začíná s překryvem, ale vždy se posune dopředu
+            next_start = max(end - overlap, start + 1)
+            if next_start < end:
+                next_start = self._align_start(text, next_start, end)
+            start = self._skip_whitespace(text, next_start, length)
+
+        return chunks
+
+    def _find_break(self, text: str, start: int, end: int) -> int:
+        """Najde konec chunku na oddělovači s nejvyšší prioritou"""
+        # Řez v první polovině okna by vytvářel zbytečně malé chunky
+        min_end = start + (end - start) // 2
+        for separator in self.SEPARATORS:
+            pos = text.rfind(separator, min_end, end)
+            if pos != -1:
+                return pos + len(separator)
+        return end
+
+    def _align_start(self, text: str, start: int, limit: int) -> int:
+        """Posune začátek překryvu na začátek slova"""
+        if start == 0 or text[start - 1].isspace():
+            return start
+        pos = start
+        while pos < limit and not text[pos].isspace():
+            pos += 1
+        return pos if pos < limit else start
+
+    def _split_by_tokens(self, text: str) -> List[TextChunk]:
+        """Dělení podle tokenů embedding modelu (text se tokenizuje jen jednou)"""
+        encoding = self.tokenizer(
+            text,
+            add_special_tokens=False,
+            return_offsets_mapping=True,
+            return_attention_mask=False,
+            return_token_type_ids=False,
+            truncation=False,
+            verbose=False,
+        )
+        offsets = [offset for offset in encoding["offset_mapping"] if offset[1] > offset[0]]
+        if not offsets:
+            return []
+
+        chunks = []
+        step = self.max_tokens - self.token_overlap
+        total = len(offsets)
+
+        for first in range(0, total, step):
+            last = min(first + self.max_tokens, total) - 1
+            chunk = self._make_chunk(text, offsets[first][0], offsets[last][1])
+            if chunk is not None:
+                chunks.append(chunk)
+            if last == total - 1:
+                break
+
+        return chunks
+
+    @staticmethod
+    def _skip_whitespace(text: str, pos: int, length: int) -> int:
+        while pos < length and text[pos].isspace():
+            pos += 1
+        return pos
+
+    @staticmethod
+    def _make_chunk(text: str, start: int, end: int) -> Optional[TextChunk]:
+        """Vytvoří chunk bez okrajových bílých znaků"""
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if start >= end:
+            return None
+        return TextChunk(text[start:end], start, end)
@@ -0,0 +1,444 @@
+import json
+import os
+import sqlite3
+import threading
+from typing import List, Dict, Optional, Any, Iterable, Tuple
+
+from ..config.settings import settings
+
+VECTOR_DB_TYPES = ("chromadb", "faiss", "numpy")
+
+DEFAULT_GET_INCLUDE = ("metadatas", "documents")
+DEFAULT_QUERY_INCLUDE = ("metadatas", "documents", "distances")
+
+def matches_where(metadata: Dict[str, Any], where: Optional[Dict]) -> bool:
+    """
+    Vyhodnocení filtru ve formátu ChromaDB nad metadaty
+
+    Podporuje $and, $or, $eq, $ne, $in, $nin, $gt, $gte, $lt, $lte
+    a zkrácený zápis {"pole": hodnota}.
+    """
+    if not where:
+        return True
+
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_where(metadata, sub) for sub in condition):
+                return False
+            continue
+        if key == "$or":
+            if not any(matches_where(metadata, sub) for sub in condition):
+                return False
+            continue
+
+        value = metadata.get(key)
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+
+        for operator, operand in condition.items():
+            if operator == "$eq" and value != operand:
+                return False
+            if operator == "$ne" and value == operand:
+                return False
+            if operator == "$in" and value not in operand:
+                return False
+            if operator == "$nin" and value in operand:
+                return False
+            if operator in ("$gt", "$gte", "$lt", "$lte"):
+                if value is None:
+                    return False
+                if operator == "$gt" and not value > operand:
+                    return False
+                if operator == "$gte" and not value >= operand:
+                    return False
+                if operator == "$lt" and not value < operand:
+                    return False
+                if operator == "$lte" and not value <= operand:
+                    return False
+
+    return True
+
+class VectorStore:
+    """
+    Rozhraní vektorového úložiště
+
+    Metody i tvar výsledků odpovídají ChromaDB kolekci, takže služby mohou
+    backend měnit bez úprav volajícího kódu. Vzdálenost je čtvercová L2.
+    """
+
+    backend = "base"
+
+    def count(self) -> int:
+        raise NotImplementedError
+
+    def add(self, ids: List[str], embeddings, documents: List[str], metadatas: List[Dict]):
+        self.upsert(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+
+    def upsert(self, ids: List[str], embeddings, documents: List[str], metadatas: List[Dict]):
+        raise NotImplementedError
+
+    def get(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None,
+            include: Iterable[str] = DEFAULT_GET_INCLUDE, limit: Optional[int] = None,
+            offset: int = 0) -> Dict:
+        raise NotImplementedError
+
+    def query(self, query_embeddings, n_results: int = 10, where: Optional[Dict] = None,
+              include: Iterable[str] = DEFAULT_QUERY_INCLUDE) -> Dict:
+        raise NotImplementedError
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None):
+        raise NotImplementedError
+
+    def flush(self):
+        """Uložení odložených zápisů na disk (volá se po dávce zápisů)"""
+
+    def reset(self):
+        """Smazání všech záznamů"""
+        raise NotImplementedError
+
+class ChromaVectorStore(VectorStore):
+    """Úložiště nad ChromaDB kolekcí"""
+
+    backend = "chromadb"
+
+    def __init__(self, name: str, directory: str, metadata: Optional[Dict] = None):
+        import chromadb
+        from chromadb.config import Settings
+
+        self.name = name
+        self.metadata = metadata
+        self.client = chromadb.PersistentClient(
+            path=directory,
+            settings=Settings(anonymized_telemetry=False)
+        )
+        self.collection = self.client.get_or_create_collection(name=name, metadata=metadata)
+
+    def count(self) -> int:
+        return self.collection.count()
+
+    def add(self, ids, embeddings, documents, metadatas):
+        self.collection.add(ids=ids, embeddings=_to_lists(embeddings), documents=documents, metadatas=metadatas)
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        self.collection.upsert(ids=ids, embeddings=_to_lists(embeddings), documents=documents, metadatas=metadatas)
+
+    def get(self, ids=None, where=None, include=DEFAULT_GET_INCLUDE, limit=None, offset=0):
+        return self.collection.get(ids=ids, where=where, include=list(include), limit=limit, offset=offset or None)
+
+    def query(self, query_embeddings, n_results=10, where=None, include=DEFAULT_QUERY_INCLUDE):
+        return self.collection.query(
+            query_embeddings=_to_lists(query_embeddings),
+            n_results=n_results,
+            where=where,
+            include=list(include)
+        )
+
+    def delete(self, ids=None, where=None):
+        self.collection.delete(ids=ids, where=where)
+
+    def reset(self):
+        self.client.delete_collection(self.name)
+        self.collection = self.client.create_collection(name=self.name, metadata=self.metadata)
+
+# Pole metadat uložená i ve sloupcích s indexem - filtry nad nimi běží v SQLite
+PAYLOAD_INDEXED_FIELDS = {"file_path": "TEXT", "doc_id": "INTEGER", "chunk_index": "INTEGER"}
+
+def _indexed_values(metadata: Optional[Dict]) -> List[Any]:
+    values = []
+    for field in PAYLOAD_INDEXED_FIELDS:
+        value = (metadata or {}).get(field)
+        values.append(value if isinstance(value, (str, int, float)) else None)
+    return values
+
+def where_to_sql(where: Optional[Dict]) -> Tuple[Optional[str], List[Any], bool]:
+    """
+    Převod filtru ve formátu ChromaDB na SQL podmínku nad indexovanými sloupci
+
+    Podmínky nad ostatními poli se vynechají - výsledek SQL je pak nadmnožina
+    a filtr se dovyhodnotí v Pythonu (matches_where).
+
+    Returns:
+        (SQL podmínka nebo None, parametry, zda SQL vyjadřuje celý filtr)
+    """
+    if not where:
+        return None, [], True
+
+    parts: List[str] = []
+    params: List[Any] = []
+    exact = True
+    for key, condition in where.items():
+        if key in ("$and", "$or"):
+            subs = [where_to_sql(sub) for sub in condition]
+            if key == "$or" and any(sql is None for sql, _, _ in subs):
+                # Nepřeložitelná větev $or může vybrat cokoliv
+                exact = False
+                continue
+            translated = [(sql, sub_params) for sql, sub_params, _ in subs if sql is not None]
+            exact = exact and all(sub_exact and sql is not None for sql, _, sub_exact in subs)
+            if translated:
+                joiner = " AND " if key == "$and" else " OR "
+                parts.append("(" + joiner.join(sql for sql, _ in translated) + ")")
+                for _, sub_params in translated:
+                    params.extend(sub_params)
+            continue
+
+        if key not in PAYLOAD_INDEXED_FIELDS:
+            exact = False
+            continue
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+
+        for operator, operand in condition.items():
+            if operator == "$eq":
+                parts.append(f"{key} IS ?")
+                params.append(operand)
+            elif operator == "$ne":
+                parts.append(f"{key} IS NOT ?")
+                params.append(operand)
+            elif operator in ("$in", "$nin"):
+                values = [value for value in operand if value is not None]
+                placeholders = ",".join("?" * len(values))
+                if operator == "$in":
+                    sql = f"{key} IN ({placeholders})" if values else "0"
+                    if None in operand:
+                        sql = f"({sql} OR {key} IS NULL)"
+                else:
+                    sql = f"({key} IS NULL OR {key} NOT IN ({placeholders}))" if values else "1"
+                    if None in operand:
+                        sql = f"({sql} AND {key} IS NOT NULL)"
+                parts.append(sql)
+                params.extend(values)
+            elif operator in ("$gt", "$gte", "$lt", "$lte"):
+                sign = {"$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}[operator]
+                parts.append(f"{key} {sign} ?")
+                params.append(operand)
+            else:
+                exact = False
+
+    if not parts:
+        return None, [], False
+    return " AND ".join(parts), params, exact
+
+class PayloadStore:
+    """
+    Dokumenty a metadata pro backendy, které ukládají jen vektory
+
+    Každý záznam má kromě textového ID i celočíselné ID, pod kterým je
+    vektor uložen v indexu. Pole z PAYLOAD_INDEXED_FIELDS jsou navíc ve
+    sloupcích s indexem, takže výběr chunků souboru nebo dokumentu
+    nečte celou tabulku.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        columns = "".join(f", {field} {kind}" for field, kind in PAYLOAD_INDEXED_FIELDS.items())
+        self._conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS items (
+                int_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                id TEXT UNIQUE NOT NULL,
+                document TEXT,
+                metadata TEXT{columns}
+            )
+        ''')
+        self._migrate_indexed_fields()
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_items_file_path ON items(file_path)')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_items_doc_id ON items(doc_id, chunk_index)')
+        self._conn.commit()
+
+    def _migrate_indexed_fields(self):
+        """Doplnění indexovaných sloupců do starší tabulky (jednorázově)"""
+        existing = {row[1] for row in self._conn.execute('PRAGMA table_info(items)')}
+        missing = [field for field in PAYLOAD_INDEXED_FIELDS if field not in existing]
+        if not missing:
+            return
+        for field in missing:
+            self._conn.execute(f'ALTER TABLE items ADD COLUMN {field} {PAYLOAD_INDEXED_FIELDS[field]}')
+        rows = self._conn.execute('SELECT int_id, metadata FROM items').fetchall()
+        assignments = ", ".join(f"{field} = ?" for field in PAYLOAD_INDEXED_FIELDS)
+        self._conn.executemany(
+            f'UPDATE items SET {assignments} WHERE int_id = ?',
+            [(*_indexed_values(json.loads(metadata or "{}")), int_id) for int_id, metadata in rows]
+        )
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM items').fetchone()[0]
+
+    def max_int_id(self) -> int:
+        """Nejvyšší přidělené celočíselné ID (0 pro prázdnou tabulku)"""
+        with self._lock:
+            return self._conn.execute('SELECT COALESCE(MAX(int_id), 0) FROM items').fetchone()[0]
+
+    def all_int_ids(self) -> List[int]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute('SELECT int_id FROM items ORDER BY int_id')]
+
+    def int_ids(self, ids: List[str]) -> Dict[str, int]:
+        """Mapování textových ID na celočíselná (jen existující)"""
+        found = {}
+        with self._lock:
+            for start in range(0, len(ids), 500):
+                batch = ids[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f'SELECT id, int_id FROM items WHERE id IN ({placeholders})', batch
+                ).fetchall()
+                found.update(rows)
+        return found
+
+    def insert(self, ids: List[str], documents: List[str], metadatas: List[Dict]) -> List[int]:
+        """Vložení nových záznamů, vrací jejich celočíselná ID"""
+        int_ids = []
+        fields = ", ".join(PAYLOAD_INDEXED_FIELDS)
+        placeholders = ", ".join("?" * len(PAYLOAD_INDEXED_FIELDS))
+        with self._lock:
+            for doc_id, document, metadata in zip(ids, documents, metadatas):
+                cursor = self._conn.execute(
+                    f'INSERT INTO items (id, document, metadata, {fields}) VALUES (?, ?, ?, {placeholders})',
+                    (doc_id, document, json.dumps(metadata or {}), *_indexed_values(metadata))
+                )
+                int_ids.append(cursor.lastrowid)
+            self._conn.commit()
+        return int_ids
+
+    def update(self, rows: List[Tuple[str, str, Dict]]):
+        """Přepsání dokumentu a metadat existujících záznamů"""
+        assignments = "".join(f", {field} = ?" for field in PAYLOAD_INDEXED_FIELDS)
+        with self._lock:
+            self._conn.executemany(
+                f'UPDATE items SET document = ?, metadata = ?{assignments} WHERE id = ?',
+                [
+                    (document, json.dumps(metadata or {}), *_indexed_values(metadata), doc_id)
+                    for doc_id, document, metadata in rows
+                ]
+            )
+            self._conn.commit()
+
+    def remove(self, int_ids: List[int]):
+        with self._lock:
+            self._conn.executemany('DELETE FROM items WHERE int_id = ?', [(i,) for i in int_ids])
+            self._conn.commit()
+
+    def remove_after(self, int_id: int) -> int:
+        """Smazání záznamů s vyšším celočíselným ID (zápisy, které nestihly do uloženého indexu)"""
+        with self._lock:
+            cursor = self._conn.execute('DELETE FROM items WHERE int_id > ?', (int_id,))
+            self._conn.commit()
+            return cursor.rowcount
+
+    def fetch(self, int_ids: List[int]) -> Dict[int, Tuple[str, str, Dict]]:
+        """Načtení záznamů podle celočíselných ID"""
+        found = {}
+        with self._lock:
+            for start in range(0, len(int_ids), 500):
+                batch = [int(i) for i in int_ids[start:start + 500]]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f'SELECT int_id, id, document, metadata FROM items WHERE int_id IN ({placeholders})', batch
+                ).fetchall()
+                for int_id, doc_id, document, metadata in rows:
+                    found[int_id] = (doc_id, document, json.loads(metadata or "{}"))
+        return found
+
+    def scan(self, ids: Optional[List[str]] = None, condition: Optional[str] = None,
+             params: Iterable[Any] = (), limit: Optional[int] = None, offset: int = 0):
+        """
+        Iterace přes záznamy (int_id, id, dokument, metadata)
+
+        Bez ids v pořadí vložení, jinak v pořadí ids.
+
+        Args:
+            ids: Textová ID (None = všechny záznamy)
+            condition: SQL podmínka nad sloupci tabulky (viz where_to_sql)
+            params: Parametry podmínky
+            limit: Max. počet záznamů (jen bez ids)
+            offset: Počet přeskočených záznamů (jen bez ids)
+        """
+        params = list(params)
+        extra = f" AND ({condition})" if condition else ""
+        with self._lock:
+            if ids is None:
+                sql = f'SELECT int_id, id, document, metadata FROM items WHERE 1{extra} ORDER BY int_id'
+                if limit is not None or offset:
+                    sql += ' LIMIT ? OFFSET ?'
+                    params += [-1 if limit is None else limit, offset]
+                rows = self._conn.execute(sql, params).fetchall()
+            else:
+                rows = []
+                for start in range(0, len(ids), 500):
+                    batch = ids[start:start + 500]
+                    placeholders = ",".join("?" * len(batch))
+                    rows.extend(self._conn.execute(
+                        f'SELECT int_id, id, document, metadata FROM items WHERE id IN ({placeholders}){extra}',
+                        batch + params
+                    ).fetchall())
+                order = {doc_id: pos for pos, doc_id in enumerate(ids)}
+                rows.sort(key=lambda row: order[row[1]])
+        for int_id, doc_id, document, metadata in rows:
+            yield int_id, doc_id, document, json.loads(metadata or "{}")
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM items')
+            self._conn.commit()
+
+def _to_lists(embeddings) -> List[List[float]]:
+    """ChromaDB vyžaduje Python listy"""
+    if hasattr(embeddings, "tolist"):
+        return embeddings.tolist()
+    return [e.tolist() if hasattr(e, "tolist") else list(e) for e in embeddings]
+
+def select_payload(store: PayloadStore, ids: Optional[List[str]], where: Optional[Dict],
+                   limit: Optional[int], offset: int) -> List[Tuple[int, str, str, Dict]]:
+    """Výběr záznamů pro get() - filtr, offset a limit"""
+    condition, params, exact = where_to_sql(where)
+    if exact and ids is None:
+        # Celý filtr běží v SQLite včetně stránkování
+        return list(store.scan(None, condition, params, limit, offset))
+
+    selected = []
+    skipped = 0
+    for row in store.scan(ids, condition, params):
+        if not matches_where(row[3], where):
+            continue
+        if skipped < offset:
+            skipped += 1
+            continue
+        selected.append(row)
+        if limit is not None and len(selected) >= limit:
+            break
+    return selected
+
+def create_vector_store(name: str, directory: Optional[str] = None, metadata: Optional[Dict] = None,
+                        backend: Optional[str] = None) -> VectorStore:
+    """
+    Vytvoření vektorového úložiště podle settings.VECTOR_DB_TYPE
+
+    Args:
+        name: Název kolekce
+        directory: Kořenový adresář pro data (výchozí settings.EMBEDDINGS_DIR)
+        metadata: Metadata kolekce (jen ChromaDB)
+        backend: Přepsání typu backendu
+
+    Returns:
+        Instance vektorového úložiště
+    """
+    backend = backend or settings.VECTOR_DB_TYPE
+    directory = directory or settings.EMBEDDINGS_DIR
+
+    if backend == "chromadb":
+        return ChromaVectorStore(name, directory, metadata=metadata)
+    if backend == "faiss":
+        from .faiss_vector_store import FaissVectorStore
+        return FaissVectorStore(
+            os.path.join(directory, "faiss", name),
+            index_type=settings.FAISS_INDEX_TYPE,
+            mmap=settings.FAISS_MMAP
+        )
+    if backend == "numpy":
+        from .numpy_vector_store import NumpyVectorStore
+        return NumpyVectorStore(os.path.join(directory, "numpy", name), dtype=settings.NUMPY_VECTOR_DTYPE)
+    raise ValueError(f"Nepodporovaný typ vektorové DB: {backend}")
@@ -0,0 +1,85 @@
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class WarmupManager:
+    """
+    Zahřívání modelů a indexů na pozadí po startu aplikace
+
+    Enginy se zahřívají postupně v pořadí registrace (souběžné načítání
+    modelů by si konkurovalo o CPU a paměť), každý ve vlákně executoru, takže
+    API odpovídá hned od startu. Stav slouží readiness endpointu.
+    """
+
+    PENDING = "pending"
+    WARMING = "warming"
+    READY = "ready"
+    FAILED = "failed"
+    DISABLED = "disabled"
+
+    def __init__(self):
+        self._warmups: Dict[str, Callable[[], Optional[bool]]] = {}
+        self._engines: Dict[str, Dict] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def register(self, name: str, warm: Callable[[], Optional[bool]]) -> None:
+        """
+        Zaregistruje engine k zahřátí
+
+        Args:
+            name: Název enginu v readiness odpovědi
+            warm: Blokující funkce, která engine načte a provede jeden dotaz;
+                vrací False, pokud je engine vypnutý
+        """
+        self._warmups[name] = warm
+        self._engines[name] = {"status": self.PENDING, "elapsed_ms": None, "error": None}
+
+    def start(self) -> None:
+        """Spustí zahřívání na pozadí (volá se z lifespan)"""
+        if self._warmups and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Zruší zahřívání, které ještě neskončilo"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        for name, warm in self._warmups.items():
+            engine = self._engines[name]
+            engine["status"] = self.WARMING
+            start = time.perf_counter()
+            try:
+                enabled = await loop.run_in_executor(None, warm)
+                engine["status"] = self.DISABLED if enabled is False else self.READY
+            except Exception as e:
+                engine["status"] = self.FAILED
+                engine["error"] = str(e) or e.__class__.__name__
+                logger.error(f"Zahřátí enginu {name} selhalo: {engine['error']}")
+            engine["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+            logger.info(f"Engine {name}: {engine['status']} ({engine['elapsed_ms']} ms)")
+
+    def status(self) -> Dict:
+        """
+        Stav zahřívání
+
+        Returns:
+            ready (žádný engine nečeká ani se nezahřívá) a stav jednotlivých enginů
+        """
+        engines = {name: dict(engine) for name, engine in self._engines.items()}
+        waiting: List[str] = [
+            name for name, engine in engines.items()
+            if engine["status"] in (self.PENDING, self.WARMING)
+        ]
+        return {"ready": not waiting, "engines": engines}
+
+warmup_manager = WarmupManager()
@@ -0,0 +1,74 @@
+"""
+Benchmark dělení textu: TextChunker vs. RecursiveCharacterTextSplitter
+
+Spuštění (z adresáře backend):
+    python benchmarks/bench_chunker.py [--size-kb 512] [--files 200]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.text_chunker import TextChunker
+
+WORDS = ["dokument", "vyhledávání", "index", "soubor", "složka", "embedding",
+         "model", "dotaz", "výsledek", "kontext", "odstavec", "věta"]
+
+def make_text(size: int, seed: int) -> str:
+    """Vygeneruje text s odstavci, řádky a slovy"""
+    rnd = random.Random(seed)
+    parts = []
+    length = 0
+    while length < size:
+        sentence = " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(5, 20))) + "."
+        separator = rnd.choice([" ", " ", " ", "\n", "\n\n"])
+        parts.append(sentence + separator)
+        length += len(sentence) + len(separator)
+    return "".join(parts)
+
+def run(name: str, split, texts) -> float:
+    start = time.perf_counter()
+    total_chunks = 0
+    for text in texts:
+        total_chunks += len(split(text))
+    elapsed = time.perf_counter() - start
+    print(f"{name:<40} {elapsed * 1000:9.1f} ms  {total_chunks:7d} chunků")
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-kb", type=int, default=64)
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=200)
+    args = parser.parse_args()
+
+    texts = [make_text(args.size_kb * 1024, seed) for seed in range(args.files)]
+    print(f"{args.files} souborů po {args.size_kb} KB, chunk {args.chunk_size}/{args.chunk_overlap}\n")
+
+    chunker = TextChunker(args.chunk_size, args.chunk_overlap)
+    native = run("TextChunker (znaky, s offsety)", chunker.split, texts)
+
+    try:
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+    except ImportError:
+        print("langchain není nainstalován, srovnání přeskočeno")
+        return
+
+    def langchain_split(text):
+        # Původní chování: nový splitter pro každý soubor
+        splitter = RecursiveCharacterTextSplitter(
+            chunk_size=args.chunk_size,
+            chunk_overlap=args.chunk_overlap,
+            length_function=len,
+        )
+        return splitter.split_text(text)
+
+    baseline = run("RecursiveCharacterTextSplitter", langchain_split, texts)
+    print(f"\nZrychlení: {baseline / native:.1f}x")
+
+if __name__ == "__main__":
+    main()
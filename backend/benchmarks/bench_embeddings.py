@@ -0,0 +1,82 @@
+"""
+Parita a propustnost embedding backendů (PyTorch vs. ONNX Runtime)
+
+Spuštění (z adresáře backend):
+    python benchmarks/bench_embeddings.py [--model all-MiniLM-L6-v2] [--texts 512]
+
+Skript skončí s nenulovým kódem, pokud je minimální kosinová podobnost
+mezi backendy pod prahem --min-similarity.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.embeddings import SentenceTransformerBackend, OnnxEmbeddingBackend
+
+SENTENCES = [
+    "Faktura za služby za měsíc březen byla odeslána zákazníkovi.",
+    "The quarterly report shows a steady increase in revenue.",
+    "Instalace vyžaduje Python 3.11 a Node.js 18.",
+    "Meeting notes: discuss the migration of the search index.",
+    "Smlouva nabývá účinnosti dnem podpisu oběma stranami.",
+    "Embedding models map text to dense vectors for semantic search.",
+]
+
+def make_texts(count: int):
+    texts = []
+    for i in range(count):
+        repeat = 1 + i % 8
+        texts.append(" ".join(SENTENCES[(i + j) % len(SENTENCES)] for j in range(repeat)))
+    return texts
+
+def throughput(backend, texts, batch_size: int) -> float:
+    backend.encode(texts[:batch_size], batch_size=batch_size)  # Warm-up
+    start = time.perf_counter()
+    backend.encode(texts, batch_size=batch_size)
+    return len(texts) / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--texts", type=int, default=512)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--min-similarity", type=float, default=0.99)
+    args = parser.parse_args()
+
+    texts = make_texts(args.texts)
+
+    torch_backend = SentenceTransformerBackend(args.model)
+    backends = [
+        ("PyTorch", torch_backend),
+        ("ONNX fp32", OnnxEmbeddingBackend(args.model, quantize=False, intra_op_threads=args.threads)),
+        ("ONNX int8", OnnxEmbeddingBackend(args.model, quantize=True, intra_op_threads=args.threads)),
+    ]
+
+    reference = torch_backend.encode(texts, batch_size=args.batch_size)
+    reference /= np.linalg.norm(reference, axis=1, keepdims=True)
+
+    failed = False
+    print(f"{'backend':<12} {'texty/s':>10} {'min cos':>9} {'prům. cos':>10}")
+    for name, backend in backends:
+        rate = throughput(backend, texts, args.batch_size)
+        embeddings = backend.encode(texts, batch_size=args.batch_size)
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+        similarity = np.einsum("ij,ij->i", reference, embeddings)
+        print(f"{name:<12} {rate:10.1f} {similarity.min():9.4f} {similarity.mean():10.4f}")
+
+        # Kvantizovaný model má povolenou mírně nižší shodu
+        threshold = args.min_similarity - (0.02 if name == "ONNX int8" else 0.0)
+        if similarity.min() < threshold:
+            failed = True
+            print(f"  ❌ {name}: parita pod prahem {threshold}")
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Propustnost Ollama embeddingů: jeden požadavek na text vs. dávky přes /api/embed
+
+Bez --url se spustí lokální mock Ollama (benchmarks/mock_ollama.py)
+s latencí --latency-ms na požadavek.
+
+Spuštění (z adresáře backend):
+    python benchmarks/bench_ollama_embed.py [--texts 2000] [--batch-size 64] [--parallel 4]
+    python benchmarks/bench_ollama_embed.py --url http://localhost:11434 --model nomic-embed-text
+"""
+import argparse
+import os
+import sys
+import time
+
+import requests
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.ollama_client import OllamaClient
+from mock_ollama import MockOllamaServer
+
+def make_texts(count: int):
+    return [f"Dokument {i}: faktura za služby, smlouva o dílo číslo {i * 7}." for i in range(count)]
+
+def embed_per_text(url: str, model: str, texts):
+    """Původní způsob - nové spojení a jeden požadavek na každý text"""
+    embeddings = []
+    for text in texts:
+        response = requests.post(f"{url}/api/embeddings", json={"model": model, "prompt": text})
+        response.raise_for_status()
+        embeddings.append(response.json()["embedding"])
+    return embeddings
+
+def run(name: str, texts, embed, server=None):
+    before = dict(server.stats) if server else None
+    start = time.perf_counter()
+    embeddings = embed(texts)
+    elapsed = time.perf_counter() - start
+    assert len(embeddings) == len(texts)
+
+    line = f"{name:<28} {len(texts) / elapsed:10.1f} {elapsed:8.2f}"
+    if server:
+        line += (f" {server.stats['requests'] - before['requests']:10d}"
+                 f" {server.stats['connections'] - before['connections']:8d}")
+    print(line)
+    return embeddings
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default=None, help="Skutečná Ollama (bez = mock server)")
+    parser.add_argument("--model", default="nomic-embed-text")
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--parallel", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--legacy-texts", type=int, default=200,
+                        help="Počet textů pro pomalou variantu po jednom")
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        server = MockOllamaServer(latency=args.latency_ms / 1000, per_item_latency=0.0002,
+                                  parallel=args.parallel).start()
+        url = server.url
+
+    texts = make_texts(args.texts)
+    header = f"{'varianta':<28} {'texty/s':>10} {'čas [s]':>8}"
+    if server:
+        header += f" {'požadavky':>10} {'spojení':>8}"
+    print(header)
+
+    try:
+        run(f"po jednom ({args.legacy_texts} textů)", texts[:args.legacy_texts],
+            lambda batch: embed_per_text(url, args.model, batch), server)
+
+        sequential = OllamaClient(url, batch_size=args.batch_size, max_parallel=1)
+        run(f"dávky {args.batch_size}, 1 souběžně", texts, lambda batch: sequential.embed(args.model, batch), server)
+        sequential.close()
+
+        client = OllamaClient(url, batch_size=args.batch_size, max_parallel=args.parallel)
+        run(f"dávky {args.batch_size}, {args.parallel} souběžně", texts,
+            lambda batch: client.embed(args.model, batch), server)
+        client.close()
+
+        if server:
+            print(f"max. souběžných požadavků na serveru: {server.stats['max_in_flight']}")
+    finally:
+        if server:
+            server.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark rerankingu cross-encoderem v časovém limitu
+
+Před měřením ověří s pomalým falešným modelem, že rerank dodrží
+RERANK_BUDGET_MS i při první dávce (studený i zahřátý odhad).
+
+Spuštění (z adresáře backend):
+    python benchmarks/bench_reranker.py [--candidates 100] [--budget-ms 300]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config.settings import settings
+from app.services.reranker import CrossEncoderReranker
+
+class SlowModel:
+    """Falešný cross-encoder s pevným časem na dvojici"""
+
+    def __init__(self, pair_ms: float):
+        self.pair_ms = pair_ms
+
+    def predict(self, pairs, batch_size=None):
+        time.sleep(self.pair_ms * len(pairs) / 1000)
+        return [float(len(text)) for _, text in pairs]
+
+def make_candidates(count: int):
+    return [{'content_text': f"kandidát {i} " + "text " * (i % 7)} for i in range(count)]
+
+def check():
+    """Limit platí i pro první dávku a při vyčerpaném limitu se nic nehodnotí"""
+    budget_ms = 100
+    # Tolerance na jednu dvojici a plánování vláken
+    tolerance_ms = 30
+    candidates = make_candidates(64)
+
+    for pair_ms in (5, 20, 150):
+        reranker = CrossEncoderReranker("fake", batch_size=16, model=SlowModel(pair_ms))
+        for attempt in ("studený", "zahřátý"):
+            start = time.perf_counter()
+            results = reranker.rerank("dotaz", candidates, top_n=64, budget_ms=budget_ms)
+            elapsed = (time.perf_counter() - start) * 1000
+            scored = sum(result['rerank_score'] is not None for result in results)
+            assert len(results) == len(candidates)
+            # Studený odhad se měří na jediné dvojici, ta může limit překročit sama
+            limit = max(budget_ms, pair_ms) if attempt == "studený" else budget_ms
+            assert elapsed <= limit + tolerance_ms, (pair_ms, attempt, elapsed)
+            print(f"{pair_ms:4d} ms/dvojice, {attempt}: {elapsed:6.1f} ms, ohodnoceno {scored}/64")
+
+    reranker = CrossEncoderReranker("fake", batch_size=16, model=SlowModel(5))
+    results = reranker.rerank("dotaz", candidates, top_n=64, budget_ms=0)
+    assert all(result['rerank_score'] is None for result in results)
+    print("Limit dodržen")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--candidates", type=int, default=100)
+    parser.add_argument("--budget-ms", type=float, default=settings.RERANK_BUDGET_MS)
+    args = parser.parse_args()
+
+    check()
+
+    try:
+        reranker = CrossEncoderReranker(
+            settings.RERANKER_MODEL,
+            batch_size=settings.RERANK_BATCH_SIZE,
+            max_chars=settings.RERANK_MAX_CHARS
+        )
+    except Exception as e:
+        print(f"Model {settings.RERANKER_MODEL} není dostupný, měření přeskočeno: {e}")
+        return
+
+    candidates = make_candidates(args.candidates)
+    reranker.rerank("zahřátí", candidates[:reranker.batch_size], top_n=reranker.batch_size)
+    start = time.perf_counter()
+    results = reranker.rerank("vyhledávání dokumentů", candidates, top_n=args.candidates, budget_ms=args.budget_ms)
+    elapsed = (time.perf_counter() - start) * 1000
+    scored = sum(result['rerank_score'] is not None for result in results)
+    print(f"\n{settings.RERANKER_MODEL}: {elapsed:.1f} ms, ohodnoceno {scored}/{args.candidates} "
+          f"({reranker.pair_ms:.2f} ms na dvojici)")
+
+if __name__ == "__main__":
+    main()
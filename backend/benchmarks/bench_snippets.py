@@ -0,0 +1,73 @@
+"""
+Benchmark úryvků a zvýraznění shod (find_snippets)
+
+Před měřením ověří okrajové případy (shoda delší než úryvek, bez shody,
+shody na koncích textu).
+
+Spuštění (z adresáře backend):
+    python benchmarks/bench_snippets.py [--size-kb 64] [--files 200]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.snippets import find_snippets, ahocorasick
+
+WORDS = ["dokument", "vyhledávání", "index", "soubor", "složka", "embedding",
+         "model", "dotaz", "výsledek", "kontext", "odstavec", "věta"]
+
+def make_text(size: int, seed: int) -> str:
+    """Vygeneruje text ze slov oddělených mezerami"""
+    rnd = random.Random(seed)
+    words = []
+    length = 0
+    while length < size:
+        word = rnd.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)
+
+def check():
+    """Okrajové případy - úryvek musí obsahovat shodu a offsety musí sedět"""
+    cases = [
+        ("xx " + "a" * 250 + " yy", "a" * 250),  # Shoda delší než úryvek
+        ("a" * 250 + " b", "a" * 250 + " b"),
+        ("začátek " + "slovo " * 100 + "konec", "začátek konec"),
+        ("bez shody", "dotaz"),
+        ("", "dotaz"),
+    ]
+    for text, query in cases:
+        snippets, matches = find_snippets(text, query)
+        assert bool(snippets) == bool(matches), (text[:20], query[:20])
+        for snippet in snippets:
+            assert snippet['text'] == text[snippet['start']:snippet['end']]
+            assert snippet['highlights'], (text[:20], query[:20])
+    print(f"Okrajové případy: {len(cases)} v pořádku")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-kb", type=int, default=64)
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--query", default="vyhledávání dokument kontext")
+    args = parser.parse_args()
+
+    check()
+
+    texts = [make_text(args.size_kb * 1024, seed) for seed in range(args.files)]
+    engine = "Aho-Corasick" if ahocorasick is not None else "regex"
+    print(f"{args.files} souborů po {args.size_kb} KB, dotaz \"{args.query}\" ({engine})\n")
+
+    start = time.perf_counter()
+    total_matches = 0
+    for text in texts:
+        _, matches = find_snippets(text, args.query)
+        total_matches += len(matches)
+    elapsed = time.perf_counter() - start
+    print(f"{'find_snippets':<40} {elapsed * 1000:9.1f} ms  {total_matches:7d} shod")
+
+if __name__ == "__main__":
+    main()
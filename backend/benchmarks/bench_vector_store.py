@@ -0,0 +1,98 @@
+"""
+Benchmark vektorových backendů: přesný NumPy vs. FAISS (pokud je nainstalován)
+
+Měří čas zápisu, studeného startu, latenci dotazu a recall@k vůči přesnému
+výsledku.
+
+Spuštění (z adresáře backend):
+    python benchmarks/bench_vector_store.py [--rows 200000] [--dim 384] [--queries 100]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.numpy_vector_store import NumpyVectorStore
+
+def fill(store, vectors: np.ndarray, batch_size: int) -> float:
+    start = time.perf_counter()
+    for offset in range(0, len(vectors), batch_size):
+        batch = vectors[offset:offset + batch_size]
+        ids = [f"chunk_{offset + i}" for i in range(len(batch))]
+        store.upsert(ids, batch, [""] * len(batch), [{"group": (offset + i) % 10} for i in range(len(batch))])
+    return time.perf_counter() - start
+
+def measure(name: str, open_store, vectors: np.ndarray, queries: np.ndarray, truth, k: int, batch_size: int):
+    store = open_store()
+    build = fill(store, vectors, batch_size)
+    del store
+
+    start = time.perf_counter()
+    store = open_store()
+    cold = time.perf_counter() - start
+
+    latencies = []
+    hits = 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        result = store.query(query[None, :], n_results=k)
+        latencies.append(time.perf_counter() - start)
+        hits += len(set(result["ids"][0]) & expected)
+
+    start = time.perf_counter()
+    store.query(queries[:10], n_results=k, where={"group": 3})
+    filtered = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000
+    print(
+        f"{name:<22} zápis {build:7.2f} s  start {cold * 1000:7.1f} ms  "
+        f"dotaz p50 {np.percentile(latencies_ms, 50):6.2f} ms  p95 {np.percentile(latencies_ms, 95):6.2f} ms  "
+        f"filtr {filtered * 100:6.2f} ms/dotaz  recall@{k} {hits / (len(queries) * k):.3f}"
+    )
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=20000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((args.rows, args.dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = vectors[rng.choice(args.rows, args.queries, replace=False)] + 0.05 * rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+
+    truth = []
+    for query in queries:
+        distances = ((vectors - query) ** 2).sum(axis=1)
+        truth.append({f"chunk_{i}" for i in np.argpartition(distances, args.k)[:args.k]})
+
+    print(f"{args.rows} vektorů, dimenze {args.dim}, {args.queries} dotazů\n")
+    workdir = tempfile.mkdtemp(prefix="bench_vectors_")
+    try:
+        for dtype in ("float32", "float16"):
+            path = os.path.join(workdir, f"numpy_{dtype}")
+            measure(f"numpy {dtype}", lambda: NumpyVectorStore(path, dtype=dtype),
+                    vectors, queries, truth, args.k, args.batch_size)
+
+        try:
+            from app.services.faiss_vector_store import FaissVectorStore
+            for index_type in ("hnsw", "ivf"):
+                path = os.path.join(workdir, f"faiss_{index_type}")
+                measure(f"faiss {index_type}", lambda: FaissVectorStore(path, index_type=index_type),
+                        vectors, queries, truth, args.k, args.batch_size)
+        except ImportError:
+            print("faiss není nainstalován, srovnání přeskočeno")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
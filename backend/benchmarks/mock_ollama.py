@@ -0,0 +1,224 @@
+"""
+Lokální mock Ollama API pro benchmarky a ruční testy bez skutečného modelu
+
+Implementuje /api/tags, /api/embed, /api/embeddings a /api/generate (včetně
+streamování NDJSON) s nastavitelnou latencí. S legacy=True se chová jako
+Ollama < 0.3 (bez /api/embed). Jako Ollama zpracuje nejvýše
+--parallel požadavků najednou, ostatní čekají ve frontě.
+
+Spuštění (z adresáře backend):
+    python benchmarks/mock_ollama.py [--port 11435] [--latency-ms 20]
+
+Použití v kódu:
+    with MockOllamaServer(latency=0.02) as server:
+        client = OllamaClient(server.url)
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+WORDS = ["dokument", "obsahuje", "informace", "o", "smlouvě", "a", "fakturách", "podle", "dotazu", "."]
+
+def fake_embedding(text: str, dimension: int) -> List[float]:
+    """Deterministický embedding textu (stejný text = stejný vektor)"""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    rng = random.Random(seed)
+    vector = [rng.uniform(-1.0, 1.0) for _ in range(dimension)]
+    norm = sum(value * value for value in vector) ** 0.5
+    return [value / norm for value in vector]
+
+class MockOllamaServer:
+    """Mock Ollama server v samostatném vlákně"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 latency: float = 0.02, per_item_latency: float = 0.001,
+                 token_latency: float = 0.01, parallel: int = 4, dimension: int = 64,
+                 legacy: bool = False):
+        """
+        Args:
+            host: Adresa serveru
+            port: Port (0 = volný port)
+            latency: Režie jednoho požadavku v s
+            per_item_latency: Čas na jeden text v embedding požadavku v s
+            token_latency: Čas na jeden generovaný token v s
+            parallel: Max. souběžně zpracovaných požadavků (OLLAMA_NUM_PARALLEL)
+            dimension: Dimenze embeddingů
+            legacy: Bez /api/embed (Ollama < 0.3), jen /api/embeddings
+        """
+        self.latency = latency
+        self.per_item_latency = per_item_latency
+        self.token_latency = token_latency
+        self.dimension = dimension
+        self.legacy = legacy
+        self._slots = threading.Semaphore(parallel)
+        self._stats_lock = threading.Lock()
+        self.stats: Dict[str, int] = {"requests": 0, "connections": 0, "in_flight": 0,
+                                      "max_in_flight": 0, "cancelled": 0}
+
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockOllamaServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "MockOllamaServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _count(self, key: str, delta: int = 1) -> None:
+        with self._stats_lock:
+            self.stats[key] += delta
+            if key == "in_flight":
+                self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                server._count("connections")
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status: int, payload: Dict) -> None:
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _read_json(self) -> Dict:
+                length = int(self.headers.get("Content-Length") or 0)
+                return json.loads(self.rfile.read(length) or b"{}")
+
+            def do_GET(self):
+                server._count("requests")
+                if self.path == "/api/tags":
+                    self._send_json(200, {"models": [{"name": "mock-embed"}, {"name": "mock-llm"}]})
+                else:
+                    self._send_json(404, {"error": "404 page not found"})
+
+            def do_POST(self):
+                server._count("requests")
+                payload = self._read_json()
+                with server._slots:
+                    server._count("in_flight")
+                    try:
+                        if self.path == "/api/embed" and not server.legacy:
+                            self._embed(payload)
+                        elif self.path == "/api/embeddings":
+                            self._embeddings(payload)
+                        elif self.path == "/api/generate":
+                            self._generate(payload)
+                        else:
+                            self._send_json(404, {"error": "404 page not found"})
+                    finally:
+                        server._count("in_flight", -1)
+
+            def _embed(self, payload: Dict) -> None:
+                texts = payload.get("input") or []
+                if isinstance(texts, str):
+                    texts = [texts]
+                time.sleep(server.latency + server.per_item_latency * len(texts))
+                self._send_json(200, {
+                    "model": payload.get("model"),
+                    "embeddings": [fake_embedding(text, server.dimension) for text in texts]
+                })
+
+            def _embeddings(self, payload: Dict) -> None:
+                time.sleep(server.latency + server.per_item_latency)
+                self._send_json(200, {"embedding": fake_embedding(payload.get("prompt", ""), server.dimension)})
+
+            def _generate(self, payload: Dict) -> None:
+                num_predict = (payload.get("options") or {}).get("num_predict") or 32
+                tokens = [WORDS[i % len(WORDS)] + " " for i in range(num_predict)]
+                prompt_tokens = len(payload.get("prompt", "").split())
+                time.sleep(server.latency)
+
+                if payload.get("stream", True) is False:
+                    time.sleep(server.token_latency * len(tokens))
+                    self._send_json(200, {"model": payload.get("model"), "response": "".join(tokens),
+                                          "done": True, "prompt_eval_count": prompt_tokens,
+                                          "eval_count": len(tokens)})
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                start = time.perf_counter()
+                try:
+                    for token in tokens:
+                        time.sleep(server.token_latency)
+                        self._write_chunk({"model": payload.get("model"), "response": token, "done": False})
+                    self._write_chunk({
+                        "model": payload.get("model"), "response": "", "done": True,
+                        "prompt_eval_count": prompt_tokens, "eval_count": len(tokens),
+                        "eval_duration": int((time.perf_counter() - start) * 1e9)
+                    })
+                    self.wfile.write(b"0\r\n\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    # Klient spojení zavřel - generování se ukončí jako v Ollama
+                    server._count("cancelled")
+                    self.close_connection = True
+
+            def _write_chunk(self, payload: Dict) -> None:
+                data = (json.dumps(payload) + "\n").encode("utf-8")
+                self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+        return Handler
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--item-latency-ms", type=float, default=1.0)
+    parser.add_argument("--token-latency-ms", type=float, default=10.0)
+    parser.add_argument("--parallel", type=int, default=4)
+    parser.add_argument("--dimension", type=int, default=768)
+    parser.add_argument("--legacy", action="store_true", help="Bez /api/embed (Ollama < 0.3)")
+    args = parser.parse_args()
+
+    server = MockOllamaServer(
+        args.host, args.port,
+        latency=args.latency_ms / 1000,
+        per_item_latency=args.item_latency_ms / 1000,
+        token_latency=args.token_latency_ms / 1000,
+        parallel=args.parallel,
+        dimension=args.dimension,
+        legacy=args.legacy
+    )
+    print(f"Mock Ollama běží na {server.url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 import uvicorn
 import os
@@ -10,10 +11,41 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.routes import files, search, ai_search, ollama_ai_search
 from app.models.database import Database
+from app.config.settings import settings
+from app.services.system_monitor import system_sampler
+from app.services.warmup import warmup_manager
+from app.services.reranker import load_reranker
+from app.services.suggestion_index import get_suggestion_index
 
 # Globální instance databáze
 db: Database = None
 
+def warm_ai_search():
+    """Načte embedding model a vektorovou DB a spočítá jeden embedding"""
+    ai_search.get_ai_search_service().create_embeddings(["warmup"])
+
+def warm_reranker():
+    """Načte cross-encoder (jen pokud je reranking zapnutý)"""
+    if not settings.RERANKER_ENABLED:
+        return False
+    if load_reranker() is None:
+        raise RuntimeError("Reranker se nepodařilo načíst")
+
+def warm_suggestions():
+    """Sestaví prefixový index návrhů"""
+    get_suggestion_index(db).ensure_built()
+
+def warm_ollama():
+    """Ověří připojení k Ollama a načte embedding model do paměti"""
+    ollama_ai_search.get_ollama_ai_search_service().create_embeddings(["warmup"])
+
+WARMUPS = {
+    "ai_search": warm_ai_search,
+    "reranker": warm_reranker,
+    "suggestions": warm_suggestions,
+    "ollama": warm_ollama
+}
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan events pro FastAPI"""
@@ -21,12 +53,25 @@ async def lifespan(app: FastAPI):
     global db
     print("🚀 Spouštím Dex Search API...")
     db = Database()
+    system_sampler.start()
+    
+    # Modely se načítají na pozadí - API odpovídá hned, stav je na /api/ready
+    for name in settings.WARMUP_ENGINES:
+        if name in WARMUPS:
+            warmup_manager.register(name, WARMUPS[name])
+        else:
+            print(f"⚠️ Neznámý engine pro zahřátí: {name}")
+    warmup_manager.start()
     print("✅ API je připraveno!")
     
     yield
     
     # Shutdown
     print("🛑 Ukončuji Dex Search API...")
+    await warmup_manager.stop()
+    if ollama_ai_search.ollama_ai_search_service is not None:
+        await ollama_ai_search.ollama_ai_search_service.async_client.aclose()
+    system_sampler.stop()
 
 # Vytvoření FastAPI aplikace
 app = FastAPI(
@@ -56,6 +101,12 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "message": "Dex Search API běží"}
 
+@app.get("/api/ready")
+async def readiness_check():
+    """Readiness endpoint - 503, dokud se zahřívají nakonfigurované enginy"""
+    status = warmup_manager.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -64,6 +115,7 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "health": "/api/health",
+            "ready": "/api/ready",
             "files": "/api/files",
             "search": "/api/search"
         }